@@ -2,17 +2,23 @@ from flask import Flask, render_template, request, redirect, flash, jsonify, url
 import os
 from works import create_dash_app
 from werkzeug.utils import secure_filename
-from data_config import get_dataset_path, fetch_enrollment_records_from_csv, fetch_summary_data_from_csv, get_strand_distribution_by_region
+from data_config import dataset_registry, get_dataset_path, get_active_dataset, activate_dataset, restore_active_dataset, fetch_enrollment_records_from_csv, summarize_enrollment, move_dataset_file, remove_dataset_file, build_dataset_aggregates
 from data_cleaning import clean_data
+from cleaning_jobs import submit_job, get_job
+from dataset_manifest import load_dataset_manifest, record_dataset, forget_dataset
+from dataset_preview import render_preview, PREVIEW_PAGE_ROWS
+from dataset_store import sqlite_store_enabled, build_sqlite_store
+from dataset_catalog import dataset_catalog, find_available_datasets, notify_datasets_changed
+from staged_uploads import stage_upload, claim_staged_upload, discard_staged_upload, discard_expired_stages
+from warmup import start_warmup, warmup_status
+from callback_cache import report_callback_cache
 from datetime import datetime
 from report import create_dash_app_report
 import pandas as pd
-import base64
 import uuid
-import shutil
 
 # Import functions from your new comparison module
-from comparison import find_available_datasets, prepare_comparison_charts_data
+from comparison import prepare_comparison_charts_data
 
 app = Flask(__name__)
 app.secret_key = 'secret123'
@@ -26,12 +32,18 @@ ACTIVE_DATASET_FOLDER = os.path.join(BASE_DIR, 'active_dataset')
 TEMP_UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'temp_folder')
 # ✅ New: Folder where cleaned datasets will be stored by school year
 DATA_MANAGEMENT_FOLDER = os.path.join(os.path.dirname(__file__), 'data_management')
+# School years listed on the data management page
+SCHOOL_YEARS = [f"{year}-{year+1}" for year in range(2016, 2025)]
 
 # Ensure all folders exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(CLEANED_FOLDER, exist_ok=True)
 os.makedirs(DATA_MANAGEMENT_FOLDER, exist_ok=True)
 os.makedirs(TEMP_UPLOAD_FOLDER, exist_ok=True)
+for year in SCHOOL_YEARS:
+    os.makedirs(os.path.join(DATA_MANAGEMENT_FOLDER, year), exist_ok=True)
+# Drop uploads staged before a restart and never confirmed
+discard_expired_stages()
 
 # Allowed file types
 ALLOWED_EXTENSIONS = {'csv'}
@@ -56,43 +68,6 @@ def save_data():
         print("No dataset path to save.")
     # Add other saving mechanisms as needed
 
-# --- Helper function to find available datasets ---
-def find_available_datasets():
-    """
-    Scans the DATA_MANAGEMENT_FOLDER for school year subdirectories
-    containing CSV files.
-
-    Returns:
-        dict: A dictionary mapping school years (like 'YYYY-YYYY') to
-              the full path of the first CSV file found in that year's folder.
-              Sorted by year descending (latest first).
-        list: A sorted list of available school year strings.
-    """
-    datasets = {}
-    years = []
-    if not os.path.exists(DATA_MANAGEMENT_FOLDER):
-        return {}, []
-
-    for year_dir in os.listdir(DATA_MANAGEMENT_FOLDER):
-        year_path = os.path.join(DATA_MANAGEMENT_FOLDER, year_dir)
-        if os.path.isdir(year_path):
-            # Basic check if the directory name looks like a school year
-            if "-" in year_dir: # Add more robust check if needed
-                for filename in os.listdir(year_path):
-                    if filename.lower().endswith(".csv"):
-                        full_path = os.path.join(year_path, filename)
-                        datasets[year_dir] = full_path
-                        years.append(year_dir)
-                        break # Found the first CSV, move to next year dir
-    
-    # Sort years descending (e.g., 2024-2025, 2023-2024)
-    years.sort(reverse=True)
-    # Create sorted dictionary based on sorted years
-    sorted_datasets = {year: datasets[year] for year in years}
-    
-    return sorted_datasets, years
-
-
 @app.route("/")
 def index():
     return render_template("account.html")
@@ -177,6 +152,63 @@ import os
 from datetime import datetime
 from werkzeug.utils import secure_filename
 
+def ingest_dataset(progress, raw_path, final_path, replaced_paths, success_message):
+    """
+    Cleaning job body shared by /upload, /upload_confirm and /replace: cleans raw_path,
+    removes the datasets it replaces and moves the result to final_path.
+    """
+    cleaned_path = None
+    try:
+        cleaned_path = clean_data(raw_path, progress=progress)
+        if not cleaned_path or not os.path.exists(cleaned_path):
+            raise ValueError("Data cleaning process failed to produce an output file.")
+
+        # Old datasets are only removed once the new one cleaned successfully
+        active_path = get_active_dataset()[0]
+        replaces_active = any(active_path and os.path.abspath(path) == active_path for path in replaced_paths)
+        for replaced_path in replaced_paths:
+            if os.path.exists(replaced_path):
+                remove_dataset_file(replaced_path)
+                forget_dataset(replaced_path)
+        move_dataset_file(cleaned_path, final_path)
+        build_dataset_aggregates(final_path)
+        if sqlite_store_enabled():
+            progress('indexing')
+            try:
+                build_sqlite_store(final_path)
+            except Exception as e:
+                # Rebuilt on first query instead
+                print(f"Warning: Could not build SQLite store for {final_path}: {e}")
+        record_dataset(final_path)
+        notify_datasets_changed()
+        if replaces_active:
+            # The dashboards move on to the replacement instead of a deleted file
+            activate_dataset(final_path)
+        return {
+            "message": success_message,
+            "path": os.path.relpath(final_path, DATA_MANAGEMENT_FOLDER),
+            "last_updated": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+        if cleaned_path and os.path.exists(cleaned_path):
+            os.remove(cleaned_path)
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
+    return jsonify(job)
+
+def cleaning_job_started(job_id):
+    """Response for a queued cleaning job: JSON for API clients, else back to the upload page to poll it."""
+    status_url = url_for('job_status', job_id=job_id)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({"job_id": job_id, "status_url": status_url}), 202
+    return redirect(url_for('upload', job=job_id))
+
 @app.route("/upload", methods=["GET", "POST"])
 def upload():
     if request.method == "POST":
@@ -203,9 +235,8 @@ def upload():
 
             if existing_files:
                 # Step 3: Trigger the modal
-                # Instead of saving to a temp file, we'll read the file data and pass it to the modal
-                file_data = file.read()
-                file_b64 = base64.b64encode(file_data).decode('utf-8')
+                # The file is staged on disk once; the modal only carries its token back to /upload_confirm
+                token = stage_upload(file, school_year=school_year, filename=filename)
 
                 return render_template(
                     "upload.html",
@@ -213,70 +244,55 @@ def upload():
                     warning_message="This school year already has an active dataset. Uploading a new dataset will replace the current one.",
                     school_year=school_year,
                     filename=filename,
-                    file_data=file_b64  # Pass the file data as base64
+                    upload_token=token
                 )
             else:
-                # Step 4: If no existing file, proceed with upload
-                temp_file_path = os.path.join(UPLOAD_FOLDER, renamed_filename)
+                # Step 4: If no existing file, queue the upload for cleaning
+                temp_file_path = os.path.join(TEMP_UPLOAD_FOLDER, f"upload_{uuid.uuid4().hex}_{renamed_filename}")
                 file.save(temp_file_path)
-                try:
-                    cleaned_path = clean_data(temp_file_path)
-                    final_path = os.path.join(school_year_folder, renamed_filename)
-                    os.replace(cleaned_path, final_path)
-                    os.remove(temp_file_path)
-
-                    last_updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    flash(f"Cleaned dataset for {school_year} uploaded successfully!")
-                    return render_template("upload.html", last_updated=last_updated)
-                except Exception as e:
-                    os.remove(temp_file_path)
-                    flash(f"Data processing failed: {str(e)}")
-                    return redirect(request.url)
+                final_path = os.path.join(school_year_folder, renamed_filename)
+                job_id = submit_job('upload', school_year_folder, ingest_dataset, temp_file_path, final_path, [],
+                                    f"Cleaned dataset for {school_year} uploaded successfully!")
+                return cleaning_job_started(job_id)
 
         flash("Invalid file type. Please upload a .csv file.")
         return redirect(request.url)
 
+    job_id = request.args.get('job')
+    if job_id and get_job(job_id) is not None:
+        return render_template("upload.html", job_status_url=url_for('job_status', job_id=job_id))
     return render_template("upload.html")
 
 @app.route("/upload_confirm", methods=["POST"])
 def upload_confirm():
-    school_year = request.form.get('school_year')
-    filename = request.form.get('filename')
-    file_data_b64 = request.form.get('file_data')
-
-    if not all([school_year, filename, file_data_b64]):
-        flash("Missing data for replacement.")
-        return redirect(request.url)
+    staged = claim_staged_upload(request.form.get('upload_token'))
+    if staged is None:
+        flash("This upload has expired or was already used. Please upload the file again.")
+        return redirect(url_for('upload'))
 
+    temp_file_path, metadata = staged
+    school_year = metadata['school_year']
     school_year_folder = os.path.join(DATA_MANAGEMENT_FOLDER, school_year)
-    renamed_filename = f"{school_year}_Dataset_({filename}).csv"
+    renamed_filename = f"{school_year}_Dataset_({metadata['filename']}).csv"
     final_path = os.path.join(school_year_folder, renamed_filename)
 
     try:
-        # Decode the base64 file data
-        file_data = base64.b64decode(file_data_b64)
-
-        # Save the decoded data to a temporary file
-        temp_file_path = os.path.join(UPLOAD_FOLDER, renamed_filename)
-        with open(temp_file_path, 'wb') as f:
-            f.write(file_data)
-
-        existing_files = [f for f in os.listdir(school_year_folder) if f.endswith(".csv")]
-        # Step 5: Remove the old file and replace with the new one
-        for existing_file in existing_files:
-            os.remove(os.path.join(school_year_folder, existing_file))
-
-        cleaned_path = clean_data(temp_file_path)
-        os.replace(cleaned_path, final_path)
-        os.remove(temp_file_path) # Clean up the temporary file
-
-        last_updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        flash(f"Existing dataset for {school_year} replaced successfully. Rerun TANAW to activate it!")
-        return redirect(url_for('upload')) # Redirect back to the upload page
+        # Step 5: The job replaces the old file(s) with the new one once it is cleaned
+        existing_files = [os.path.join(school_year_folder, f) for f in os.listdir(school_year_folder) if f.endswith(".csv")]
+        job_id = submit_job('upload_confirm', school_year_folder, ingest_dataset, temp_file_path, final_path, existing_files,
+                            f"Existing dataset for {school_year} replaced successfully. Rerun TANAW to activate it!")
+        return cleaning_job_started(job_id)
 
     except Exception as e:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
         flash(f"File replacement failed: {str(e)}")
-        return redirect(request.url)
+        return redirect(url_for('upload'))
+
+@app.route("/upload_cancel", methods=["POST"])
+def upload_cancel():
+    discard_staged_upload(request.form.get('upload_token'))
+    return redirect(url_for('upload'))
 
 @app.route('/clean', methods=['GET', 'POST'])
 def clean():
@@ -302,42 +318,24 @@ def clean():
 
 @app.route("/data_management")
 def data_management():
-    school_years = [f"{year}-{year+1}" for year in range(2016, 2025)]
-    datasets = []
-
     # Path to the currently active dataset
-    active_dataset_path = os.path.join(CLEANED_FOLDER, 'Cleaned_School_DataSet.csv')
-    active_data = None
-
-    # Read the active dataset if it exists
-    if os.path.exists(active_dataset_path):
-        with open(active_dataset_path, "r", encoding="utf-8") as f:
-            active_data = f.read()
-
-    for year in school_years:
-        year_folder = os.path.join(DATA_MANAGEMENT_FOLDER, year)
-
-        # Ensure the school year folder exists
-        if not os.path.exists(year_folder):
-            os.makedirs(year_folder)
-
-        # List and evaluate datasets within the year folder
-        for file in os.listdir(year_folder):
-            if file.endswith(".csv"):
-                full_path = os.path.join(year_folder, file)
-
-                # Check if this file is the active dataset
-                is_active = False
-                if active_data is not None:
-                    with open(full_path, "r", encoding="utf-8") as f:
-                        if f.read() == active_data:
-                            is_active = True
-
-                datasets.append({
-                    "filename": f"{year}/{file}",
-                    "year": year,
-                    "active": is_active
-                })
+    active_dataset_path = get_active_dataset()[0] or os.path.join(CLEANED_FOLDER, 'Cleaned_School_DataSet.csv')
+
+    # File facts come from the manifest; only new or modified files are read and hashed
+    manifest = load_dataset_manifest(SCHOOL_YEARS, active_dataset_path)
+    active_sha256 = manifest['active']['sha256'] if manifest['active'] else None
+
+    datasets = []
+    for key, entry in manifest['datasets'].items():
+        if entry['year'] not in SCHOOL_YEARS:
+            continue
+        datasets.append({
+            "filename": key,
+            "year": entry['year'],
+            "active": active_sha256 is not None and entry['sha256'] == active_sha256,
+            "rows": entry['rows'],
+            "size": entry['size'],
+        })
 
     return render_template("data_management.html", datasets=datasets, active_year=None)
 
@@ -346,9 +344,14 @@ def preview():
     filename = request.form.get("filename")
     file_path = os.path.join(DATA_MANAGEMENT_FOLDER, filename)
     if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        preview_html = df.head(20).to_html(classes="table preview-table")
-        return jsonify({"html": preview_html})
+        # Only the requested page (and columns) is read, via the row index built at ingest
+        columns = [col for col in request.form.getlist("columns") if col]
+        try:
+            fragment = render_preview(file_path, request.form.get("page", 0), request.form.get("page_size", PREVIEW_PAGE_ROWS), columns)
+        except (ValueError, pd.errors.ParserError) as e:
+            print(f"Preview failed for {file_path}: {e}")
+            return jsonify({"html": "<p>Error loading preview.</p>"})
+        return jsonify(fragment)
     return jsonify({"html": "<p>Error loading preview.</p>"})
 
 @app.route("/replace", methods=["POST"])
@@ -356,10 +359,6 @@ def replace():
     original_filename_with_path = request.form.get("filename")
     new_file = request.files.get("new_file")
 
-    # --- Variables for temporary paths ---
-    temp_raw_path = None
-    cleaned_temp_output_path = None
-
     # --- Initial checks ---
     if not original_filename_with_path or not new_file:
         flash("Filename or new file missing.", 'error')
@@ -395,89 +394,20 @@ def replace():
         # --- Save uploaded file temporarily ---
         os.makedirs(TEMP_UPLOAD_FOLDER, exist_ok=True)
         # Create a unique temp filename to avoid conflicts
-        temp_filename = f"temp_replace_{uuid.uuid4()}_{uploaded_filename}"
+        temp_filename = f"temp_replace_{uuid.uuid4()}_{secure_filename(uploaded_filename)}"
         temp_raw_path = os.path.join(TEMP_UPLOAD_FOLDER, temp_filename)
         new_file.save(temp_raw_path)
         print(f"Saved uploaded file temporarily to: {temp_raw_path}")
 
-        # --- Clean the temporary file using the ORIGINAL clean_data ---
+    except (ValueError, TypeError, OSError) as e:
+        flash(f"Error during replacement process: {str(e)}", 'error')
+        return redirect(url_for("data_management"))
 
-        print(f"Attempting to clean '{temp_raw_path}' using original clean_data...")
-        try:
-            # Call your unmodified clean_data function
-            cleaned_temp_output_path = clean_data(temp_raw_path)
-
-            # Basic check: Ensure clean_data returned a string path
-            if not cleaned_temp_output_path or not isinstance(cleaned_temp_output_path, str):
-                 print("clean_data did not return a valid path string.")
-                 # Treat as failure, raise an error to be caught by outer except block
-                 raise ValueError("Data cleaning process failed to produce an output file path.")
-            if not os.path.exists(cleaned_temp_output_path):
-                 print(f"clean_data returned path '{cleaned_temp_output_path}' but file does not exist.")
-                 raise ValueError("Data cleaning process failed, output file not found.")
-
-            print(f"clean_data successful, returned path: {cleaned_temp_output_path}")
-
-        except (ValueError, TypeError, OSError, Exception) as clean_error:
-            # Catch potential errors specifically from clean_data
-            print(f"Data cleaning function failed with error: {clean_error}")
-            flash(f"Data cleaning failed for '{uploaded_filename}': {str(clean_error)}. The original dataset was not replaced.", 'error')
-            raise clean_error
-
-        print(f"Moving cleaned file from '{cleaned_temp_output_path}' to '{new_target_path}'")
-        shutil.move(cleaned_temp_output_path, new_target_path)
-
-        # --- Success: File moved, now remove the original old file ---
-        print(f"Cleaned file moved successfully. Removing old file: {old_file_path}")
-        try:
-            os.remove(old_file_path)
-            print(f"Removed old file: {old_file_path}")
-        except OSError as e:
-            # Log error but proceed; maybe flash a warning
-            print(f"Warning: Could not remove old file '{old_file_path}'. Error: {e}")
-            flash(f"Warning: Replaced data, but could not remove old file '{os.path.basename(original_filename_with_path)}'.", 'warning')
-
-
-        saved_relative_path = os.path.join(relative_dir, new_target_filename_only)
-        #flash(f"Dataset '{os.path.basename(original_filename_with_path)}' replaced and cleaned successfully (saved as '{saved_relative_path}').", 'success')
-
-    # --- Outer error handling ---
-    except (ValueError, TypeError, OSError) as e: # Catch errors from file ops, path processing, or re-raised clean_error
-        if "Data cleaning failed" not in str(e): # Simple check
-             flash(f"Error during replacement process: {str(e)}", 'error')
-        # Ensure the old file is NOT removed if we land here due to an error BEFORE os.remove(old_file_path)
-    except Exception as e:
-        flash(f"An unexpected error occurred during replacement: {str(e)}", 'error')
-        print(f"Unexpected error in /replace: {e}") # Log details for debugging
-    finally:
-        # --- Clean up temporary files ---
-        # Always remove the initial raw temporary file if it exists
-        if temp_raw_path and os.path.exists(temp_raw_path):
-            try:
-                os.remove(temp_raw_path)
-                print(f"Removed temporary raw input file: {temp_raw_path}")
-            except OSError as e:
-                print(f"Error removing temporary raw input file '{temp_raw_path}': {e}")
-
-        # Attempt to clean up the temporary *output* file from clean_data IF it exists
-        # This handles cases where clean_data succeeded but the move failed, or if clean_data errored *after* creating the file.
-        if cleaned_temp_output_path and os.path.exists(cleaned_temp_output_path):
-            # Check if it still exists (it shouldn't if the move was successful)
-             print(f"Cleaning up temporary output file: {cleaned_temp_output_path}")
-             try:
-                 # Optionally remove the 'cleaned_files' directory if it's empty and inside TEMP_UPLOAD_FOLDER
-                 cleaned_dir = os.path.dirname(cleaned_temp_output_path)
-                 os.remove(cleaned_temp_output_path) # Remove the file first
-                 if os.path.basename(cleaned_dir) == 'cleaned_files' and \
-                    os.path.normpath(os.path.dirname(cleaned_dir)) == os.path.normpath(TEMP_UPLOAD_FOLDER) and \
-                    not os.listdir(cleaned_dir): # Check if empty after removing file
-                      os.rmdir(cleaned_dir)
-                      print(f"Removed empty temporary cleaned_files directory: {cleaned_dir}")
-             except OSError as e:
-                 print(f"Error removing temporary output file or dir '{cleaned_temp_output_path}': {e}")
-
-
-    return redirect(url_for("data_management")) 
+    # --- Clean in the background; the old file is removed only if cleaning succeeds ---
+    job_id = submit_job('replace', os.path.join(DATA_MANAGEMENT_FOLDER, relative_dir), ingest_dataset,
+                        temp_raw_path, new_target_path, [old_file_path],
+                        f"Dataset '{os.path.basename(original_filename_with_path)}' replaced and cleaned successfully.")
+    return jsonify({"job_id": job_id, "status_url": url_for('job_status', job_id=job_id)}), 202
 
 @app.route("/download", methods=["POST"])
 def download():
@@ -493,7 +423,9 @@ def delete():
     filename = request.form.get("filename")
     file_path = os.path.join(DATA_MANAGEMENT_FOLDER, filename)
     if os.path.exists(file_path):
-        os.remove(file_path)
+        remove_dataset_file(file_path)
+        forget_dataset(file_path)
+        notify_datasets_changed()
         flash("File deleted successfully.")
     else:
         flash("File not found.")
@@ -504,6 +436,15 @@ def delete():
 def download_template():
     return send_file("static/sample_template.csv", as_attachment=True)
 
+@app.route('/api/datasets')
+def get_datasets():
+    return jsonify(dataset_catalog.describe())
+
+@app.route('/api/cache_stats')
+def cache_stats():
+    """Hit/miss counters and sizes of the in-process dataset and report callback caches."""
+    return jsonify({'datasets': dataset_registry.stats(), 'reportCallbacks': report_callback_cache.stats()})
+
 @app.route('/api/enrollment_data')
 @app.route('/api/enrollment_data')
 def get_enrollment_data():
@@ -531,39 +472,58 @@ def get_enrollment_data():
     try:
         # Use the dynamically determined file_path
         # Note: fetch_enrollment_records_from_csv seems unused here based on previous code
-        summary_data = fetch_summary_data_from_csv(file_path)
-        strand_data = get_strand_distribution_by_region(file_path)
+        # One pass over the dataset builds every block, strand x region matrix included
+        summary_data = summarize_enrollment(file_path)
 
-        # Check if data loading was successful (functions might return {} on error)
+        # Check if data loading was successful
         if not summary_data:
              return jsonify({"error": f"Failed to load summary data from {file_path}"}), 500
 
-        summary_data['strandRegionMatrix'] = strand_data
         return jsonify(summary_data)
     except Exception as e:
         print(f"API Error: Failed to process data for {file_path}: {e}")
         return jsonify({"error": f"Internal server error processing data: {str(e)}"}), 500
 
 
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the startup warm-up has loaded the dashboards' data, 503 before."""
+    status = warmup_status()
+    return jsonify(status), (200 if status['ready'] else 503)
+
+def latest_uploaded_dataset():
+    """Most recently uploaded or replaced dataset in data_management, or None."""
+    paths = [path for path in find_available_datasets()[0].values() if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+@app.route('/activate', methods=['POST'])
+def activate():
+    filename = request.form.get("filename")
+    file_path = os.path.abspath(os.path.join(DATA_MANAGEMENT_FOLDER, filename or ''))
+    inside_data_folder = file_path.startswith(os.path.abspath(DATA_MANAGEMENT_FOLDER) + os.sep)
+    if not filename or not inside_data_folder or not file_path.endswith('.csv') or not os.path.exists(file_path):
+        flash("File not found.")
+        return redirect(url_for("data_management"))
+    version = activate_dataset(file_path)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({"active": filename, "version": version})
+    flash(f"'{os.path.basename(filename)}' is now the active dataset.", 'success')
+    return redirect(url_for("data_management"))
+
 @app.route('/rerun_app', methods=['POST'])
 def rerun_app():
-    print("Rerunning the Flask application (simulated).")
     save_data()
 
+    # Activates the newest upload inside this process; the dashboards rebuild from it on their next request
+    dataset_path = latest_uploaded_dataset()
     try:
-        with open(__file__, 'r') as f:
-            content = f.readlines()
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        content.append(f"# Triggering auto-reload at {timestamp}\n")
-
-        with open(__file__, 'w') as f:
-            f.writelines(content) 
-
-        flash("TANAW is now Reloaded!", 'success')
-
+        if dataset_path is None:
+            flash("No uploaded dataset to activate yet.", "warning")
+        else:
+            activate_dataset(dataset_path)
+            flash("TANAW is now Reloaded!", 'success')
     except Exception as e:
-        flash(f"Error triggering auto-reload: {str(e)}", "error")
+        flash(f"Error activating dataset: {str(e)}", "error")
 
     return redirect(url_for('home'))
 
@@ -574,7 +534,6 @@ def compare():
     Handles the comparison page, allowing users to select and compare data
     from two different school years.
     """
-    # Call find_available_datasets from the comparison module
     available_datasets, available_years = find_available_datasets()
 
     selected_year_1 = session.get('selected_comparison_year_1', None)
@@ -675,17 +634,29 @@ def compare():
                            comparison_data=comparison_data # Pass the data structure for template to use
                           )
 
-# Mount Dash app
+# Dashboards show the dataset activated before the last restart, if any
+restore_active_dataset()
+
+# Mount Dash app (neither loads any data here; see warm_up_dashboards)
 dash_app_works = create_dash_app(app)
 dash_app_report = create_dash_app_report(app)
 
+def warm_latest_year_summary():
+    available_datasets, years = find_available_datasets()
+    if years:
+        summarize_enrollment(available_datasets[years[0]])
+
+def warm_up_dashboards():
+    """Loads the active dataset and precomputes the default dashboard views in the background."""
+    return start_warmup([
+        ('report dashboard', dash_app_report.warm_up),
+        ('enrollment dashboard', dash_app_works.warm_up),
+        ('latest school year summary', warm_latest_year_summary),
+    ])
+
+# The debug reloader's watcher process never serves requests, so only its child warms up
+if __name__ != "__main__" or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warm_up_dashboards()
+
 if __name__ == "__main__":
-    app.run(debug=True)# Triggering auto-reload at 2025-04-22 02:13:27
-# Triggering auto-reload at 2025-04-22 03:01:20
-# Triggering auto-reload at 2025-04-22 03:36:24
-# Triggering auto-reload at 2025-04-23 01:42:02
-# Triggering auto-reload at 2025-04-23 01:46:16
-# Triggering auto-reload at 2025-04-23 02:24:32
-# Triggering auto-reload at 2025-04-23 16:38:01
-# Triggering auto-reload at 2025-04-23 18:44:15
-# Triggering auto-reload at 2025-04-23 19:35:36
+    app.run(debug=True)
@@ -0,0 +1,341 @@
+// Client-side filtering for the report (TANAW_REPORT_CLIENTSIDE=1, see report.build_clientside_aggregate).
+// Mirrors report.py's update_dashboard / update_geo_figures over the Region x Division x Sector
+// aggregate in the client-report-aggregate Store, so filter changes never reach the server.
+(function () {
+    var GRADE_ORDER = ['K', 'G1', 'G2', 'G3', 'G4', 'G5', 'G6', 'G7', 'G8', 'G9', 'G10', 'G11', 'G12', 'Elem NG', 'JHS NG'];
+    var PARITY_GRADES = GRADE_ORDER.slice(0, 13);
+    var GRADE_PREFIX = /^(K|G\d{1,2}|Elem NG|JHS NG)\b/;
+    var PARITY_PREFIX = /^(K|G\d{1,2})\b/;
+    var SHS_COLUMN = /^(G11|G12) (.*) (Male|Female)$/;
+    var SHS_TREND_COLUMN = /^(G11|G12)\s+(.+)\s+(Male|Female)$/;
+    var ELEMENTARY_GRADES = ['K', 'G1', 'G2', 'G3', 'G4', 'G5', 'G6'];
+    var JUNIOR_HIGH_GRADES = ['G7', 'G8', 'G9', 'G10'];
+
+    function isSet(value) {
+        return value !== null && value !== undefined && value !== '' && value !== 'Unknown';
+    }
+
+    function formatNumber(value) {
+        return Number(value).toLocaleString('en-US');
+    }
+
+    // Indices of the aggregate cells matching the filters; a filter on a missing dimension matches nothing
+    function selectCells(aggregate, filters) {
+        var cells = [];
+        var active = Object.keys(filters).filter(function (dim) { return isSet(filters[dim]); });
+        for (var i = 0; i < aggregate.cells; i++) {
+            var keep = active.every(function (dim) {
+                var values = aggregate.dimensions[dim];
+                return values !== undefined && String(values[i]) === String(filters[dim]);
+            });
+            if (keep) cells.push(i);
+        }
+        return cells;
+    }
+
+    // {column: total over cells}
+    function columnSums(aggregate, cells) {
+        var sums = {};
+        aggregate.columns.forEach(function (col, c) {
+            var values = aggregate.values[c];
+            var total = 0;
+            for (var k = 0; k < cells.length; k++) total += values[cells[k]];
+            sums[col] = total;
+        });
+        return sums;
+    }
+
+    function sumColumns(sums, columns) {
+        return columns.reduce(function (total, col) { return total + sums[col]; }, 0);
+    }
+
+    function titled(layout, title, aggregate) {
+        layout.title = {text: title, x: 0.5, font: {size: 14}};
+        layout.template = aggregate.template;
+        layout.height = 400;
+        layout.width = 600;
+        return layout;
+    }
+
+    function placeholderFigure(title, aggregate) {
+        return {
+            data: [],
+            layout: titled({
+                annotations: [{
+                    text: 'No data available for this visualization based on current filters.',
+                    xref: 'paper', yref: 'paper', x: 0.5, y: 0.5, showarrow: false,
+                    font: {size: 12, color: '#888'}
+                }],
+                xaxis: {visible: false},
+                yaxis: {visible: false}
+            }, title, aggregate)
+        };
+    }
+
+    function kpiCard(title, valueType, value) {
+        return {
+            type: 'Div', namespace: 'dash_html_components',
+            props: {className: 'kpi-card', children: [
+                {type: 'H3', namespace: 'dash_html_components', props: {className: 'kpi-title', children: title}},
+                {type: valueType, namespace: 'dash_html_components', props: {className: 'kpi-value', children: value}}
+            ]}
+        };
+    }
+
+    // One bar trace per group, in order of first appearance (what plotly express does with color=)
+    function groupedBarTraces(rows, x, group, colors) {
+        var groups = [];
+        var traces = {};
+        rows.forEach(function (row) {
+            var name = row[group];
+            if (!traces[name]) {
+                groups.push(name);
+                traces[name] = {
+                    type: 'bar', name: name, legendgroup: name, offsetgroup: name, alignmentgroup: 'True',
+                    orientation: 'v', showlegend: true, textposition: 'auto',
+                    marker: {color: colors[name], pattern: {shape: ''}}, x: [], y: []
+                };
+            }
+            traces[name].x.push(row[x]);
+            traces[name].y.push(row.value);
+        });
+        return groups.map(function (name) { return traces[name]; });
+    }
+
+    function pieFigure(labels, values, title, legendTitle, aggregate) {
+        return {
+            data: [{
+                type: 'pie', labels: labels, values: values, hole: 0.4, showlegend: true,
+                domain: {x: [0, 1], y: [0, 1]}, textposition: 'outside', textinfo: 'percent+label',
+                pull: labels.map(function () { return 0.05; })
+            }],
+            layout: titled({
+                legend: {title: {text: legendTitle}, tracegroupgap: 0},
+                piecolorway: aggregate.colors.qualitative,
+                uniformtext: {minsize: 10, mode: 'hide'}
+            }, title, aggregate)
+        };
+    }
+
+    function regionFigure(aggregate, cells) {
+        var regions = aggregate.dimensions.Region;
+        if (!regions || !cells.length || !aggregate.columns.length) {
+            return placeholderFigure('Total Enrollment by Region', aggregate);
+        }
+        var totals = {};
+        cells.forEach(function (i) {
+            var total = 0;
+            for (var c = 0; c < aggregate.columns.length; c++) total += aggregate.values[c][i];
+            totals[regions[i]] = (totals[regions[i]] || 0) + total;
+        });
+        var rows = Object.keys(totals)
+            .filter(function (region) { return totals[region] > 0 && region !== 'Unknown'; })
+            .sort(function (a, b) { return totals[b] - totals[a]; });
+        if (!rows.length) return placeholderFigure('Total Enrollment by Region', aggregate);
+        return {
+            data: [{
+                type: 'bar', orientation: 'v', textposition: 'auto', showlegend: false, alignmentgroup: 'True',
+                marker: {color: aggregate.colors.qualitative[0], pattern: {shape: ''}},
+                x: rows, y: rows.map(function (region) { return totals[region]; })
+            }],
+            layout: titled({
+                barmode: 'relative',
+                legend: {tracegroupgap: 0},
+                xaxis: {title: {text: 'Region'}, categoryorder: 'total descending'},
+                yaxis: {title: {text: 'Enrollment Count'}}
+            }, 'Total Enrollment by Region', aggregate)
+        };
+    }
+
+    function parityFigure(aggregate, sums, columns) {
+        var title = 'Enrollment by Grade Level and Gender';
+        var totals = {};
+        var rows = [];
+        columns.forEach(function (col) {
+            var grade = col.match(PARITY_PREFIX);
+            if (!grade || !(sums[col] > 0) || PARITY_GRADES.indexOf(grade[1]) < 0) return;
+            var gender = (col.match(/(Male|Female)$/) || [null, 'Unknown'])[1];
+            var key = grade[1] + '|' + gender;
+            if (totals[key] === undefined) {
+                totals[key] = 0;
+                rows.push({grade: grade[1], gender: gender});
+            }
+            totals[key] += sums[col];
+        });
+        if (!rows.length) return placeholderFigure(title, aggregate);
+        rows.sort(function (a, b) {
+            return PARITY_GRADES.indexOf(a.grade) - PARITY_GRADES.indexOf(b.grade) || (a.gender < b.gender ? -1 : a.gender > b.gender ? 1 : 0);
+        });
+        rows.forEach(function (row) { row.value = totals[row.grade + '|' + row.gender]; });
+        return {
+            data: groupedBarTraces(rows, 'grade', 'gender', aggregate.colors.gender),
+            layout: titled({
+                barmode: 'group',
+                legend: {title: {text: 'Gender'}, tracegroupgap: 0},
+                xaxis: {title: {text: 'Grade Level'}, categoryorder: 'array', categoryarray: PARITY_GRADES},
+                yaxis: {title: {text: 'Students'}}
+            }, title + ' (Filtered)', aggregate)
+        };
+    }
+
+    function sectorFigure(aggregate, cells, columns) {
+        var sectors = aggregate.dimensions.Sector;
+        if (!sectors || !cells.length || !columns.length) {
+            return placeholderFigure('Enrollment Distribution by Sector', aggregate);
+        }
+        var indices = columns.map(function (col) { return aggregate.columns.indexOf(col); });
+        var totals = {};
+        cells.forEach(function (i) {
+            var total = 0;
+            indices.forEach(function (c) { total += aggregate.values[c][i]; });
+            totals[sectors[i]] = (totals[sectors[i]] || 0) + total;
+        });
+        var labels = Object.keys(totals).sort().filter(function (sector) { return totals[sector] > 0 && sector !== 'Unknown'; });
+        if (!labels.length) return placeholderFigure('Enrollment Distribution by Sector', aggregate);
+        return pieFigure(labels, labels.map(function (sector) { return totals[sector]; }),
+                         'Enrollment Distribution by Sector (Filtered)', 'Sector', aggregate);
+    }
+
+    function stageFigure(aggregate, sums, columns) {
+        function startsWithGrade(col, grades) {
+            return grades.some(function (grade) { return col.indexOf(grade + ' ') === 0; });
+        }
+        var stages = [
+            ['Elementary', columns.filter(function (col) { return startsWithGrade(col, ELEMENTARY_GRADES) || col.indexOf('Elem NG') >= 0; })],
+            ['Junior High School', columns.filter(function (col) { return startsWithGrade(col, JUNIOR_HIGH_GRADES) || col.indexOf('JHS NG') >= 0; })],
+            ['Senior High School', columns.filter(function (col) { return startsWithGrade(col, ['G11', 'G12']); })]
+        ].map(function (stage) { return [stage[0], sumColumns(sums, stage[1])]; })
+         .filter(function (stage) { return stage[1] > 0; });
+        if (!stages.length) return placeholderFigure('Enrollment Distribution by Education Stage', aggregate);
+        return pieFigure(stages.map(function (stage) { return stage[0]; }), stages.map(function (stage) { return stage[1]; }),
+                         'Enrollment Distribution by Education Stage (Filtered)', 'Stage', aggregate);
+    }
+
+    function strandGenderFigure(aggregate, sums, columns) {
+        var totals = {};
+        columns.forEach(function (col) {
+            var match = col.match(SHS_COLUMN);
+            if (!match || !match[2].trim() || !(sums[col] > 0)) return;
+            var key = match[2].trim() + '|' + match[3];
+            totals[key] = (totals[key] || 0) + sums[col];
+        });
+        var rows = Object.keys(totals).sort().map(function (key) {
+            var parts = key.split('|');
+            return {strand: parts[0], gender: parts[1], value: totals[key]};
+        });
+        if (!rows.length) return placeholderFigure('SHS Enrollment by Strand and Gender', aggregate);
+        return {
+            data: groupedBarTraces(rows, 'strand', 'gender', aggregate.colors.gender),
+            layout: titled({
+                barmode: 'group',
+                legend: {title: {text: 'Gender'}, tracegroupgap: 0},
+                xaxis: {title: {text: 'Strand/Track'}, tickangle: 30, categoryorder: 'total descending'},
+                yaxis: {title: {text: 'Students'}}
+            }, 'SHS Enrollment by Specific Strand/Track and Gender (Filtered)', aggregate)
+        };
+    }
+
+    function strandTrendFigure(aggregate, sums, columns) {
+        var totals = {G11: {}, G12: {}};
+        var strands = [];
+        columns.forEach(function (col) {
+            var match = col.match(SHS_TREND_COLUMN);
+            if (!match) return;
+            var strand = match[2].trim();
+            if (strands.indexOf(strand) < 0) strands.push(strand);
+            totals[match[1]][strand] = (totals[match[1]][strand] || 0) + sums[col];
+        });
+        strands.sort();
+        var colors = {G11: '#1f77b4', G12: '#ff7f0e'};
+        var traces = {};
+        var order = [];
+        strands.forEach(function (strand) {
+            ['G11', 'G12'].forEach(function (grade) {
+                var total = totals[grade][strand] || 0;
+                if (!(total > 0)) return;
+                if (!traces[grade]) {
+                    order.push(grade);
+                    traces[grade] = {
+                        type: 'scatter', mode: 'lines+markers', name: grade, legendgroup: grade, showlegend: true,
+                        line: {color: colors[grade], dash: 'solid'}, marker: {symbol: 'circle'}, x: [], y: []
+                    };
+                }
+                traces[grade].x.push(strand);
+                traces[grade].y.push(total);
+            });
+        });
+        if (!order.length) return placeholderFigure('SHS Strand Enrollment: G11 vs G12', aggregate);
+        return {
+            data: order.map(function (grade) { return traces[grade]; }),
+            layout: titled({
+                legend: {title: {text: 'Grade Level'}, tracegroupgap: 0},
+                xaxis: {title: {text: 'Strand/Track'}, tickangle: 30, categoryorder: 'category ascending'},
+                yaxis: {title: {text: 'Total Students'}}
+            }, 'SHS Strand Enrollment: G11 vs G12', aggregate)
+        };
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        tanawReport: {
+            updateDashboard: function (region, division, grade, sector, aggregate) {
+                if (!aggregate) return window.dash_clientside.no_update;
+                var cells = selectCells(aggregate, {Region: region, Division: division, Sector: sector});
+                var sums = columnSums(aggregate, cells);
+                var baseColumns = aggregate.columns;
+                var columns = grade ? baseColumns.filter(function (col) { return col.indexOf(grade + ' ') === 0; }) : baseColumns;
+                var hasRows = cells.length > 0;
+
+                var total = hasRows ? sumColumns(sums, columns) : 0;
+                var male = hasRows ? sumColumns(sums, columns.filter(function (col) { return col.indexOf('Male') >= 0; })) : 0;
+                var female = hasRows ? sumColumns(sums, columns.filter(function (col) { return col.indexOf('Female') >= 0; })) : 0;
+                var mostPopulated = 'N/A';
+                if (hasRows) {
+                    var byGrade = {};
+                    baseColumns.forEach(function (col) {
+                        var match = col.match(GRADE_PREFIX);
+                        if (match) byGrade[match[1]] = (byGrade[match[1]] || 0) + sums[col];
+                    });
+                    var best = -1;
+                    GRADE_ORDER.forEach(function (key) {
+                        if (byGrade[key] !== undefined && byGrade[key] > best) {
+                            best = byGrade[key];
+                            mostPopulated = key;
+                        }
+                    });
+                }
+                var kpis = {
+                    type: 'Div', namespace: 'dash_html_components',
+                    props: {className: 'kpi-cards-container', children: [
+                        kpiCard('Total Enrolled (Filtered)', 'H1', formatNumber(total)),
+                        kpiCard('Male vs Female (Filtered)', 'P', formatNumber(male) + ' ♂ | ' + formatNumber(female) + ' ♀'),
+                        kpiCard('Number of Schools', 'H1', '0'),
+                        kpiCard('Most Populated Grade', 'H1', mostPopulated)
+                    ]}
+                };
+
+                // The region bar ranks every region until one is picked
+                var regionCells = isSet(region) ? cells : selectCells(aggregate, {});
+                var trendColumns = (grade === 'G11' || grade === 'G12') ? columns : baseColumns;
+                return [
+                    kpis,
+                    regionFigure(aggregate, regionCells),
+                    hasRows ? parityFigure(aggregate, sums, columns) : placeholderFigure('Enrollment by Grade Level and Gender', aggregate),
+                    sectorFigure(aggregate, cells, columns),
+                    hasRows ? stageFigure(aggregate, sums, columns) : placeholderFigure('Enrollment Distribution by Education Stage', aggregate),
+                    hasRows ? strandGenderFigure(aggregate, sums, columns) : placeholderFigure('SHS Enrollment by Strand and Gender', aggregate),
+                    hasRows ? strandTrendFigure(aggregate, sums, trendColumns) : placeholderFigure('SHS Strand Enrollment: G11 vs G12', aggregate)
+                ];
+            },
+
+            divisionOptions: function (region, aggregate) {
+                if (!aggregate) return window.dash_clientside.no_update;
+                var divisions = isSet(region) ? (aggregate.divisionsByRegion[region] || []) : aggregate.allDivisions;
+                return [divisions.map(function (division) { return {label: division, value: division}; }), false];
+            },
+
+            resetFilters: function () {
+                return [null, null, null, null];
+            }
+        }
+    });
+})();
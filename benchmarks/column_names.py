@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for the column-name standardization used by clean_data.
+
+Run from the project root:
+    python -m benchmarks.column_names
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning import (
+    historical_column_variants, standardize_column_name, standardize_header,
+    preprocess_header, closest_standard_column,
+)
+
+# Variants the historical files contain besides the known ones (fuzzy fallback path)
+EXTRA_VARIANTS = [
+    'Elementary Non-Graded Male', 'Junior High School NG Female', 'Grade 11 Academic Track ABM Male',
+    'G11 - ACAD - STEM FEMALE', 'G12 Technical Vocational TVL Male', 'Grade 12 Arts and Design Female',
+    'kindergarten female', 'NGJHS MALE', '(Elem NG) Male', 'Total', 'Grand Total',
+]
+
+def clear_caches():
+    standardize_header.cache_clear()
+    preprocess_header.cache_clear()
+    closest_standard_column.cache_clear()
+
+def run_uncached(variants):
+    for variant in variants:
+        clear_caches()
+        standardize_header(variant)
+
+def run_cached(variants):
+    for variant in variants:
+        standardize_column_name(variant)
+
+def main(repeat=5):
+    variants = historical_column_variants() + EXTRA_VARIANTS
+    results = {
+        'rule pipeline, no caches': min(timeit.repeat(lambda: run_uncached(variants), number=1, repeat=repeat)),
+        'standardize_column_name, warm': min(timeit.repeat(lambda: run_cached(variants), number=20, repeat=repeat)) / 20,
+    }
+    print(f"{len(variants)} header variants per run")
+    for name, seconds in results.items():
+        print(f"{name:32s} {seconds * 1000:8.3f} ms/run  {seconds / len(variants) * 1e6:8.2f} us/header")
+    return results
+
+
+if __name__ == "__main__":
+    main()
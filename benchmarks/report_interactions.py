@@ -0,0 +1,94 @@
+"""
+Per-interaction cost of the report's filter callbacks: milliseconds and response bytes.
+
+    python -m benchmarks.report_interactions [--rows 50000] [--repeat 3]
+
+Replays a sequence of filter changes on a synthetic cleaned file. For each change it
+runs only the callbacks Dash would fire (those with a changed input) and compares
+that with refreshing every output, which is what the single ten-output callback did.
+Bytes are the JSON Dash sends back. The result cache is cleared before every run.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.utils
+from flask import Flask
+
+from data_config import activate_dataset
+from callback_cache import report_callback_cache
+from benchmarks.suite import measure
+from benchmarks.synthetic_data import write_school_file, REGIONS
+
+FILTER_IDS = ['region-filter', 'division-filter', 'grade-filter', 'sector-filter', 'beis-id-filter']
+# (interaction, filter values after it) -- each step changes one filter of the previous one
+INTERACTIONS = [
+    ('initial load', {}),
+    ('pick region', {'region-filter': REGIONS[0]}),
+    ('pick grade', {'region-filter': REGIONS[0], 'grade-filter': 'G11'}),
+    ('switch grade', {'region-filter': REGIONS[0], 'grade-filter': 'G3'}),
+    ('pick sector', {'region-filter': REGIONS[0], 'grade-filter': 'G3', 'sector-filter': 'Private'}),
+    ('clear grade', {'region-filter': REGIONS[0], 'sector-filter': 'Private'}),
+]
+
+def filter_callbacks(dash_app):
+    """[(callback, input filter ids)] for the report callbacks that render from the filters (not the dropdown option ones)."""
+    callbacks = []
+    for key, value in dash_app.callback_map.items():
+        inputs = [item['id'] for item in value['inputs']]
+        updates_filters = any(f"{filter_id}." in key for filter_id in FILTER_IDS)
+        if inputs and all(input_id in FILTER_IDS for input_id in inputs) and not updates_filters:
+            callbacks.append((value['callback'].__wrapped__, inputs))
+    return callbacks
+
+def response_bytes(outputs):
+    return len(json.dumps(outputs, cls=plotly.utils.PlotlyJSONEncoder).encode('utf-8'))
+
+def run_callbacks(callbacks, filters):
+    size = 0
+    for callback, inputs in callbacks:
+        size += response_bytes(callback(*(filters.get(input_id) for input_id in inputs)))
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import report
+    workdir = tempfile.mkdtemp(prefix='tanaw-interactions-')
+    try:
+        activate_dataset(write_school_file(os.path.join(workdir, 'school.csv'), args.rows, seed=1), persist=False)
+        callbacks = filter_callbacks(report.create_dash_app_report(Flask(__name__)))
+        print(f"{len(callbacks)} filter callbacks: " + '; '.join(', '.join(inputs) for _, inputs in callbacks))
+        run_callbacks(callbacks, {})  # Loads the dataset, so the first interaction is not charged for it
+
+        previous = None
+        totals = {'all': [0.0, 0], 'fired': [0.0, 0]}
+        for name, filters in INTERACTIONS:
+            changed = {input_id for input_id in FILTER_IDS if previous is None or filters.get(input_id) != previous.get(input_id)}
+            fired = [(callback, inputs) for callback, inputs in callbacks if changed & set(inputs)]
+            for label, selected in (('all', callbacks), ('fired', fired)):
+                stats = measure(lambda: run_callbacks(selected, filters), args.repeat, setup=report_callback_cache.clear)
+                size = run_callbacks(selected, filters)
+                totals[label][0] += stats['median']
+                totals[label][1] += size
+                if label == 'all':
+                    all_ms, all_bytes = stats['median'] * 1000, size
+            print(f"{name:14s} {len(fired)}/{len(callbacks)} callbacks: {stats['median'] * 1000:8.1f} ms {size:>9,} bytes"
+                  f"   (all outputs: {all_ms:8.1f} ms {all_bytes:>9,} bytes)")
+            previous = filters
+        print(f"{'total':14s} {'':14s} {totals['fired'][0] * 1000:8.1f} ms {totals['fired'][1]:>9,} bytes"
+              f"   (all outputs: {totals['all'][0] * 1000:8.1f} ms {totals['all'][1]:>9,} bytes)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Payload of the report's BEIS School ID dropdown: full option lists against the typeahead.
+
+    python -m benchmarks.school_search [--rows 50000] [--repeat 3]
+
+The reference below is how update_beis_ids_dropdown built its options before: every
+school in the region/division scope, sent in the layout and again on each scope change.
+The typeahead sends report.search_school_options for what has been typed so far.
+Bytes are the JSON of the options; the search index is built before timing.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report import load_report_data, select_schools, school_option, search_school_options
+from benchmarks.suite import measure
+from benchmarks.synthetic_data import write_school_file, REGIONS
+
+def scope_options_reference(data, selected_region=None, selected_division=None):
+    """Every school in scope, as the layout and the old dropdown callback sent them."""
+    filtered = select_schools(data, selected_region, selected_division, columns=['BEIS School ID', 'School Name'])
+    unique_schools = filtered[["BEIS School ID", "School Name"]].drop_duplicates(subset=['BEIS School ID'])
+    return [school_option(id_, name) for id_, name in sorted(unique_schools.set_index("BEIS School ID")["School Name"].to_dict().items()) if id_ != 'Unknown']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tanaw-school-search-')
+    try:
+        data = load_report_data(write_school_file(os.path.join(workdir, 'school.csv'), args.rows, seed=1))
+        search_school_options(data)  # Builds the index
+        school_id = str(data['df_all']['BEIS School ID'].iloc[len(data['df_all']) // 2])
+        cases = [
+            ('all schools', None, None),
+            ('region', None, REGIONS[0]),
+            ('ID prefix', school_id[:4], None),
+            ('ID prefix, region', school_id[:4], REGIONS[0]),
+            ('name words', 'school elem', REGIONS[0]),
+        ]
+        for name, search_value, region in cases:
+            full = scope_options_reference(data, region)
+            typeahead = search_school_options(data, search_value, region)
+            stats = measure(lambda: search_school_options(data, search_value, region), args.repeat)
+            print(f"{name:18s} full list {len(full):>7} options {len(json.dumps(full)):>10,} bytes   "
+                  f"typeahead {len(typeahead):>3} options {len(json.dumps(typeahead)):>8,} bytes {stats['median'] * 1000:7.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
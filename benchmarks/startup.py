@@ -0,0 +1,103 @@
+"""
+Startup benchmark: how long `import app` takes and how long until /ready reports
+that the background warm-up has loaded the dashboards' data.
+
+    python -m benchmarks.startup [--rows 1000 10000 50000] [--repeat 3]
+
+Each run is a fresh interpreter (so module imports are included) with a synthetic
+cleaned file as the active dataset; the active-dataset state is written to a
+scratch directory, not to active_dataset/.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_data import write_school_file
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ROWS = [1000, 10000, 50000]
+READY_TIMEOUT_SECONDS = 600
+
+def run_child(dataset_path, state_path):
+    """Runs in the fresh interpreter: activates dataset_path, imports app and waits for readiness."""
+    import data_config
+    data_config.ACTIVE_DATASET_STATE_PATH = state_path
+    data_config.activate_dataset(dataset_path)
+
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter() - start
+
+    client = app.app.test_client()
+    while True:
+        response = client.get('/ready')
+        if response.status_code == 200 or time.perf_counter() - start > READY_TIMEOUT_SECONDS:
+            break
+        time.sleep(0.01)
+    ready = time.perf_counter() - start
+    status = response.get_json()
+    print(json.dumps({
+        'import': imported,
+        'ready': ready,
+        'steps': {step['name']: step['seconds'] for step in status['steps']},
+        'failed': [step['name'] for step in status['steps'] if step['state'] == 'failed'],
+    }))
+
+def run_size(rows, repeat, workdir):
+    dataset_path = os.path.join(workdir, f"school_{rows}.csv")
+    write_school_file(dataset_path, rows)
+    state_path = os.path.join(workdir, 'active_dataset.json')
+
+    runs = []
+    for _ in range(repeat):
+        # Derived files would make later runs cheaper than a first boot
+        for path in os.listdir(workdir):
+            if path.startswith(f"school_{rows}.") and not path.endswith('.csv'):
+                os.remove(os.path.join(workdir, path))
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-m', 'benchmarks.startup', '--child', dataset_path, state_path],
+            cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        'import': statistics.median(run['import'] for run in runs),
+        'ready': statistics.median(run['ready'] for run in runs),
+        'steps': {name: statistics.median(run['steps'][name] for run in runs) for name in runs[0]['steps']},
+        'failed': sorted({name for run in runs for name in run['failed']}),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', nargs=2, metavar=('DATASET', 'STATE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='tanaw-startup-')
+    try:
+        for rows in args.rows:
+            result = run_size(rows, args.repeat, workdir)
+            print(f"{rows:>8} rows: import {result['import'] * 1000:8.1f} ms, ready {result['ready'] * 1000:8.1f} ms")
+            for name, seconds in result['steps'].items():
+                print(f"{'':>15}{name:32s} {seconds * 1000:8.1f} ms")
+            if result['failed']:
+                print(f"{'':>15}failed: {', '.join(result['failed'])}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
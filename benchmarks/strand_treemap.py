@@ -0,0 +1,65 @@
+"""
+Benchmark for the report's "schools offering each SHS strand" treemap data.
+
+    python -m benchmarks.strand_treemap [--rows 50000] [--repeat 3]
+
+Times report.schools_offering_strands against the row-by-row loop it replaced
+(kept below as the reference) on a synthetic cleaned school file, unfiltered and
+for one region, and checks that both give the same strands, counts and order.
+"""
+import os
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report import load_report_data, select_positions, select_schools, schools_offering_strands
+from benchmarks.suite import measure
+from benchmarks.synthetic_data import write_school_file, REGIONS
+
+def schools_offering_iterrows(filtered_df, shs_cols):
+    """The loop update_dashboard used before: one Python iteration per school and SHS column."""
+    schools_offering = {}
+    for index, school in filtered_df.iterrows():
+        school_id = school['BEIS School ID']
+        if school_id == 'Unknown': continue
+        for col in shs_cols:
+            if col in school and school[col] > 0:
+                match = re.match(r'(G11|G12) (.*) (Male|Female)$', col)
+                if match:
+                    strand_name = " ".join(match.groups()[1:-1])
+                    if strand_name.strip():
+                        clean_strand_name = strand_name.strip()
+                        if clean_strand_name not in schools_offering:
+                            schools_offering[clean_strand_name] = set()
+                        schools_offering[clean_strand_name].add(school_id)
+    return [(strand, len(ids)) for strand, ids in schools_offering.items()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tanaw-treemap-')
+    try:
+        data = load_report_data(write_school_file(os.path.join(workdir, 'school.csv'), args.rows, seed=1))
+        shs_cols = [col for col in data['enrollment_cols'] if col.startswith(('G11 ', 'G12 '))]
+        for name, region in (('unfiltered', None), ('region', REGIONS[0])):
+            positions = select_positions(data, region)
+            filtered_df = select_schools(data, region)
+            expected = schools_offering_iterrows(filtered_df, shs_cols)
+            assert schools_offering_strands(data, positions, shs_cols) == expected, name
+            loop = measure(lambda: schools_offering_iterrows(filtered_df, shs_cols), args.repeat)
+            vectorized = measure(lambda: schools_offering_strands(data, positions, shs_cols), args.repeat)
+            print(f"{name:12s} {len(filtered_df):>8} rows: iterrows {loop['median'] * 1000:10.1f} ms, "
+                  f"vectorized {vectorized['median'] * 1000:8.1f} ms ({loop['median'] / vectorized['median']:.0f}x)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark suite for cleaning and the dashboards on synthetic data.
+
+    python -m benchmarks.suite [--rows 1000 10000 50000] [--repeat 3] [--output results.json]
+
+For each size it generates raw and cleaned files (benchmarks.synthetic_data) in a
+scratch directory and times clean_data, fetch_summary_data_from_csv,
+prepare_comparison_charts_data and the report update_dashboard callback (computed, and served from the result cache).
+Results go to benchmarks/results/<timestamp>.json unless --output is given;
+--compare OLD.json prints the change against an earlier run.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from flask import Flask
+
+import data_config
+from data_cleaning import clean_data
+from data_config import fetch_summary_data_from_csv, invalidate_dataset, activate_dataset
+from comparison import prepare_comparison_charts_data
+from callback_cache import report_callback_cache
+from benchmarks.synthetic_data import (
+    write_school_file, write_raw_school_file, write_raw_regional_file, REGIONS,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_ROWS = [1000, 10000, 50000]
+# Regional files are one row per region/division, so they are benchmarked at a fixed small size
+REGIONAL_ROWS = 500
+
+# (region, division, grade, sector, beis_id) filter combinations for update_dashboard
+REPORT_FILTERS = {
+    'unfiltered': (None, None, None, None, None),
+    'region': (REGIONS[0], None, None, None, None),
+    'region_division': (REGIONS[0], f"{REGIONS[0]} Division 1", None, None, None),
+    'grade_sector': (None, None, 'G11', 'Private', None),
+}
+
+def measure(func, repeat, setup=None):
+    """Runs func `repeat` times (setup before each, untimed); returns timing stats in seconds."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'runs': len(timings)}
+
+def find_callback(dash_app, output_id):
+    for key, value in dash_app.callback_map.items():
+        if output_id in key:
+            return value['callback'].__wrapped__
+    raise KeyError(output_id)
+
+def build_report_callback(dataset_path):
+    """
+    Activates dataset_path, creates the report Dash app on it and returns a function running
+    both of its filter callbacks (update_dashboard and update_geo_figures), i.e. a full refresh.
+    """
+    import report
+    activate_dataset(dataset_path, persist=False)
+    dash_app = report.create_dash_app_report(Flask(__name__))
+    update_dashboard = find_callback(dash_app, 'kpi-cards.children')
+    update_geo_figures = find_callback(dash_app, 'region-enrollment-bar.figure')
+
+    def refresh(region, division, grade, sector, beis_id):
+        return update_dashboard(region, division, grade, sector, beis_id), update_geo_figures(region, division, sector, beis_id)
+    return refresh
+
+def clear_dataset_caches(*paths):
+    for path in paths:
+        invalidate_dataset(path)
+
+def remove_cleaned_outputs(directory):
+    shutil.rmtree(os.path.join(directory, 'cleaned_files'), ignore_errors=True)
+
+def run_size(rows, repeat, workdir):
+    results = {}
+    school_path = write_school_file(os.path.join(workdir, f'school_{rows}.csv'), rows, seed=1)
+    previous_path = write_school_file(os.path.join(workdir, f'school_{rows}_previous.csv'), rows, seed=2)
+    raw_path = write_raw_school_file(os.path.join(workdir, f'raw_school_{rows}.csv'), rows, seed=3)
+
+    results['clean_data_raw_school'] = measure(lambda: clean_data(raw_path), repeat, setup=lambda: remove_cleaned_outputs(workdir))
+    results['clean_data_cleaned_school'] = measure(lambda: clean_data(school_path), repeat, setup=lambda: remove_cleaned_outputs(workdir))
+    remove_cleaned_outputs(workdir)
+
+    results['fetch_summary_cold'] = measure(
+        lambda: fetch_summary_data_from_csv(school_path), repeat, setup=lambda: clear_dataset_caches(school_path))
+    results['fetch_summary_warm'] = measure(lambda: fetch_summary_data_from_csv(school_path), repeat)
+
+    results['comparison_cold'] = measure(
+        lambda: prepare_comparison_charts_data(previous_path, school_path, 'previous', 'current'), repeat,
+        setup=lambda: clear_dataset_caches(previous_path, school_path))
+    results['comparison_warm'] = measure(
+        lambda: prepare_comparison_charts_data(previous_path, school_path, 'previous', 'current'), repeat)
+
+    start = time.perf_counter()
+    update_dashboard = build_report_callback(school_path)
+    build_seconds = time.perf_counter() - start
+    results['report_app_build'] = {'min': build_seconds, 'median': build_seconds, 'runs': 1}
+    for name, filters in REPORT_FILTERS.items():
+        results[f'report_update_dashboard_{name}'] = measure(lambda: update_dashboard(*filters), repeat, setup=report_callback_cache.clear)
+        results[f'report_update_dashboard_{name}_cached'] = measure(lambda: update_dashboard(*filters), repeat)
+    return results
+
+def run_regional(repeat, workdir):
+    regional_path = write_raw_regional_file(os.path.join(workdir, 'raw_regional.csv'), REGIONAL_ROWS)
+    result = measure(lambda: clean_data(regional_path), repeat, setup=lambda: remove_cleaned_outputs(workdir))
+    remove_cleaned_outputs(workdir)
+    return {'clean_data_raw_regional': result}
+
+def compare_results(old, new):
+    for size, benchmarks in new['results'].items():
+        for name, stats in benchmarks.items():
+            before = old.get('results', {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            change = (stats['median'] - before['median']) / before['median'] * 100 if before['median'] else 0.0
+            print(f"{size:>8} {name:40s} {before['median'] * 1000:10.1f} ms -> {stats['median'] * 1000:10.1f} ms ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='tanaw-bench-')
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'pyarrow': data_config.HAS_PYARROW,
+        'repeat': args.repeat,
+        'results': {},
+    }
+    try:
+        run['results']['regional'] = run_regional(args.repeat, workdir)
+        for rows in args.rows:
+            print(f"--- {rows} rows ---")
+            run['results'][str(rows)] = run_size(rows, args.repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+
+    for size, benchmarks in run['results'].items():
+        for name, stats in benchmarks.items():
+            print(f"{size:>8} {name:40s} {stats['median'] * 1000:10.1f} ms")
+    print(f"Results saved to: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Deterministic synthetic enrollment files in the layouts clean_data handles.
+
+    python -m benchmarks.synthetic_data school  OUT.csv --rows 100000 [--raw] [--seed 0]
+    python -m benchmarks.synthetic_data regional OUT.csv --rows 1000 [--seed 0]
+
+`school` writes a cleaned school-level file (the sample_template.csv columns);
+with --raw it adds the title rows and messy values of a DepEd extract.
+`regional` writes the two-row grade/gender header layout of the historical files.
+"""
+import os
+import sys
+import csv
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning import standard_columns
+
+REGIONS = [
+    'Region I', 'Region II', 'Region III', 'Region IV-A', 'MIMAROPA', 'Region V', 'Region VI',
+    'Region VII', 'Region VIII', 'Region IX', 'Region X', 'Region XI', 'Region XII',
+    'CARAGA', 'NCR', 'CAR', 'BARMM',
+]
+# Spellings seen in raw extracts; all standardize back to the REGIONS entry
+REGION_VARIANTS = {
+    'Region I': ['Region I', 'REGION 1', ' region i ', 'Region I - Ilocos Region'],
+    'Region II': ['Region II', 'region 2', 'Region II - Cagayan Valley'],
+    'Region III': ['Region III', 'REGION 3', 'Region III - Central Luzon'],
+    'Region IV-A': ['Region IV-A', 'region 4a', 'Region IVA'],
+    'NCR': ['NCR', 'National Capital Region', 'ncr'],
+    'CAR': ['CAR', 'Cordillera', 'car'],
+    'BARMM': ['BARMM', 'Bangsamoro', 'barmm'],
+}
+SECTORS = ['Public', 'Private', 'SUCsLUCs']
+SECTOR_WEIGHTS = [0.75, 0.22, 0.03]
+SCHOOL_KINDS = ['ELEMENTARY SCHOOL', 'NATIONAL HIGH SCHOOL', 'INTEGRATED SCHOOL', 'CENTRAL SCHOOL']
+RAW_SCHOOL_KINDS = ['ES', 'E/S', 'NHS', 'INTEGRATED SCHOOL', 'CES', 'Elementary School']
+ENROLLMENT_COLUMNS = standard_columns
+
+# First header row of the regional layout (messy grade labels), one entry per grade/strand pair of columns
+REGIONAL_GRADE_LABELS = [
+    'Kindergarten', 'Grade 1', 'Grade 2', 'Grade 3', 'Grade 4', 'Grade 5', 'Grade 6',
+    'NG ELEM', 'Grade 7', 'Grade 8', 'Grade 9', 'Grade 10', 'Non-Grade (JHS)',
+    'Grade 11 (ABM)', 'Grade 11 (HUMSS)', 'Grade 11 (STEM)', 'Grade 11 (GAS)', 'Grade 11 (MARITIME)',
+    'Grade 11 (TVL)', 'Grade 11 (SPORTs)', 'Grade 11 (ARTs & DESIGN)',
+    'Grade 12 (ABM)', 'Grade 12 (HUMSS)', 'Grade 12 (STEM)', 'Grade 12 (GAS)', 'Grade 12 Maritime',
+    'Grade 12 (TVL)', 'Grade 12 (SPORTs)', 'Grade 12 (ARTs & DESIGN)',
+]
+
+def _enrollment_matrix(rng, rows, high):
+    values = rng.integers(0, high, size=(rows, len(ENROLLMENT_COLUMNS)))
+    # Most schools offer only some grades
+    values[rng.random(values.shape) < 0.4] = 0
+    return values
+
+def generate_school_frame(rows, seed=0):
+    """Cleaned school-level frame: one row per school, regions/divisions/sectors with realistic skew."""
+    rng = np.random.default_rng(seed)
+    region = rng.choice(REGIONS, rows)
+    division_no = rng.integers(1, 9, rows)
+    beis_id = 100000 + rng.permutation(rows * 2)[:rows]
+    df = pd.DataFrame({
+        'Region': region,
+        'Division': pd.Series(region) + ' Division ' + pd.Series(division_no).astype(str),
+        'District': 'District ' + pd.Series(rng.integers(1, 13, rows)).astype(str),
+        'BEIS School ID': beis_id,
+        'School Name': 'SCHOOL ' + pd.Series(beis_id).astype(str) + ' ' + pd.Series(rng.choice(SCHOOL_KINDS, rows)),
+        'Street Address': np.where(rng.random(rows) < 0.3, 'UNKNOWN', 'PUROK ' + pd.Series(rng.integers(1, 9, rows)).astype(str)),
+        'Province': 'Province ' + pd.Series(rng.integers(1, 82, rows)).astype(str),
+        'Municipality': 'Municipality ' + pd.Series(rng.integers(1, 1635, rows)).astype(str),
+        'Legislative District': 'Lone District',
+        'Barangay': 'BRGY. ' + pd.Series(rng.integers(1, 400, rows)).astype(str),
+        'Sector': rng.choice(SECTORS, rows, p=SECTOR_WEIGHTS),
+        'School Subclassification': rng.choice(['DepED Managed', 'Non-Sectarian', 'Sectarian'], rows),
+        'School Type': rng.choice(['School with no Annexes', 'Mother school', 'Annex or Extension school(s)'], rows),
+        'Modified COC': rng.choice(['Purely ES', 'Purely JHS', 'All Offering (K to 12)', 'ES and JHS (K to 10)'], rows),
+    })
+    enrollment = pd.DataFrame(_enrollment_matrix(rng, rows, 150), columns=ENROLLMENT_COLUMNS)
+    return pd.concat([df, enrollment], axis=1)
+
+def write_school_file(path, rows, seed=0):
+    generate_school_frame(rows, seed).to_csv(path, index=False)
+    return path
+
+def write_raw_school_file(path, rows, seed=0):
+    """School-level extract as uploaded: title rows above the header and messy cell values."""
+    rng = np.random.default_rng(seed + 1)
+    df = generate_school_frame(rows, seed)
+    for region, variants in REGION_VARIANTS.items():
+        mask = (df['Region'] == region).to_numpy()
+        df.loc[mask, 'Region'] = rng.choice(variants, mask.sum())
+    df['School Name'] = ('SCHOOL ' + df['BEIS School ID'].astype(str) + ' ' + rng.choice(RAW_SCHOOL_KINDS, rows)).str.lower() + np.where(rng.random(rows) < 0.1, '#', '')
+    df.loc[rng.random(rows) < 0.05, 'Street Address'] = rng.choice(['N/A', 'NONE', '-----', ''], 1)[0]
+    counts = df[ENROLLMENT_COLUMNS].astype(object)
+    # Thousands separators, stray text and out-of-range counts, as in real extracts
+    big = rng.random(rows) < 0.02
+    counts.loc[big, 'G1 Male'] = [f"{value:,}" for value in rng.integers(1000, 4000, big.sum())]
+    counts.loc[rng.random(rows) < 0.01, 'K Male'] = 'n/a'
+    counts.loc[rng.random(rows) < 0.005, 'G2 Female'] = 9000
+    df[ENROLLMENT_COLUMNS] = counts
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['SCHOOL-LEVEL ENROLLMENT (BEIS)'] + [''] * (df.shape[1] - 1))
+        writer.writerow([''] * df.shape[1])
+    df.to_csv(path, mode='a', index=False)
+    return path
+
+def write_raw_regional_file(path, rows, seed=0):
+    """Regional layout: title rows, a grade header row with messy labels, a Male/Female row, then data."""
+    rng = np.random.default_rng(seed)
+    grade_row = ['Region']
+    gender_row = ['']
+    for label in REGIONAL_GRADE_LABELS:
+        grade_row += [label, '']
+        gender_row += ['Male', 'Female']
+
+    regions = rng.choice([variant for variants in REGION_VARIANTS.values() for variant in variants] + REGIONS, rows)
+    counts = _enrollment_matrix(rng, rows, 150000)[:, :len(grade_row) - 1]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['SY 2018-2019'] + [''] * (len(grade_row) - 1))
+        writer.writerow([''] * len(grade_row))
+        writer.writerow(['(SECTOR: PUBLIC,PRIVATE,SUCsLUCs, and PSO)'] + [''] * (len(grade_row) - 1))
+        writer.writerow(grade_row)
+        writer.writerow(gender_row)
+        for region, values in zip(regions, counts):
+            writer.writerow([region] + [f"{value:,}" if value else '-' for value in values])
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('layout', choices=['school', 'regional'])
+    parser.add_argument('output')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--raw', action='store_true', help='school layout only: write an uncleaned extract')
+    args = parser.parse_args()
+
+    if args.layout == 'regional':
+        write_raw_regional_file(args.output, args.rows, args.seed)
+    elif args.raw:
+        write_raw_school_file(args.output, args.rows, args.seed)
+    else:
+        write_school_file(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
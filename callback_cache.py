@@ -0,0 +1,201 @@
+import os
+import sys
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from plotly.basedatatypes import BaseFigure
+
+# Rendered callback outputs kept in memory per process (entry count and size caps)
+CALLBACK_CACHE_ENTRIES = int(os.environ.get('TANAW_CALLBACK_CACHE_ENTRIES', '64'))
+CALLBACK_CACHE_MAX_BYTES = int(os.environ.get('TANAW_CALLBACK_CACHE_MB', '64')) * 1024 * 1024
+# Optional directory shared by all workers; entries there outlive a single process
+CALLBACK_CACHE_DIR = os.environ.get('TANAW_CALLBACK_CACHE_DIR') or None
+CALLBACK_CACHE_DISK_MAX_BYTES = int(os.environ.get('TANAW_CALLBACK_CACHE_DISK_MB', '256')) * 1024 * 1024
+
+
+def estimate_size(value):
+    """
+    Approximate resident bytes of a callback result, found by walking its containers,
+    figures and components rather than serializing it.
+    """
+    total = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += item.nbytes
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, BaseFigure):
+            # Traces and layout as plain dicts; the figure's other attributes are shared validators
+            stack.extend((item._data, item._layout))
+        elif hasattr(item, '__dict__'):
+            # Dash components keep their props as instance attributes
+            stack.extend(vars(item).values())
+    return total
+
+
+class CallbackResultCache:
+    """
+    LRU cache of Dash callback results keyed by (callback name, dataset version, inputs).
+
+    Results are kept as returned (Dash only serializes them, so sharing them is safe) and
+    their estimate_size counts against max_bytes. Entries are evicted past max_entries or
+    max_bytes; results larger than max_bytes are not kept. With disk_dir, results are also
+    pickled to <disk_dir>/<version>-<key hash>.pkl files that any worker's misses fall back
+    to, and the pickled size is counted instead.
+    """
+
+    def __init__(self, max_entries=CALLBACK_CACHE_ENTRIES, max_bytes=CALLBACK_CACHE_MAX_BYTES,
+                 disk_dir=CALLBACK_CACHE_DIR, disk_max_bytes=CALLBACK_CACHE_DISK_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, version, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{str(version)[:16]}-{digest}.pkl")
+
+    def get_or_compute(self, name, version, args, compute):
+        """Cached result of compute() for (name, version, args); version must change whenever the data does."""
+        key = (name, version, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.disk_dir:
+            payload = self._read_disk(version, key)
+            if payload is not None:
+                result = pickle.loads(payload)
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, result, len(payload))
+                return result
+
+        result = compute()
+        with self._lock:
+            self.misses += 1
+        # Only the disk cache needs the pickle; the memory cache estimates the size
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL) if self.disk_dir else None
+        nbytes = len(payload) if payload is not None else estimate_size(result)
+        if nbytes <= self.max_bytes:
+            self._remember(key, result, nbytes)
+            if payload is not None:
+                self._write_disk(version, key, payload)
+        return result
+
+    def _remember(self, key, result, nbytes):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+
+    def _read_disk(self, version, key):
+        path = self._disk_path(version, key)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            os.utime(path)  # Recently used files survive pruning
+            return payload
+        except OSError:
+            return None
+
+    def _write_disk(self, version, key, payload):
+        path = self._disk_path(version, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError as e:
+            print(f"Callback cache: could not write {path}: {e}")
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _prune_disk(self):
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def discard_other_versions(self, version):
+        """Drops results computed from any other dataset version (called when the active dataset changes)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[1] != version]:
+                self._bytes -= self._entries.pop(key)[1]
+        if self.disk_dir:
+            prefix = f"{str(version)[:16]}-"
+            for _, _, path in self._disk_files():
+                if not os.path.basename(path).startswith(prefix):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'residentBytes': self._bytes,
+                'maxEntries': self.max_entries,
+                'maxBytes': self.max_bytes,
+                'diskDir': self.disk_dir,
+                'hits': self.hits,
+                'diskHits': self.disk_hits,
+                'misses': self.misses,
+                'hitRate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else None,
+            }
+
+
+report_callback_cache = CallbackResultCache()
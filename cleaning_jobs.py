@@ -0,0 +1,71 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Uploads cleaned at the same time (each job runs clean_data in its own pool thread)
+CLEANING_WORKERS = int(os.environ.get('TANAW_CLEANING_WORKERS', '2'))
+# Finished jobs stay pollable for this long
+JOB_RETENTION_SECONDS = 60 * 60
+
+_executor = ThreadPoolExecutor(max_workers=CLEANING_WORKERS, thread_name_prefix='cleaning-job')
+_jobs = {}
+_jobs_lock = threading.Lock()
+# One lock per target folder, so two jobs never rewrite the same school year at once
+_target_locks = {}
+
+def submit_job(kind, target, func, *args):
+    """
+    Queues func(progress, *args) on the cleaning pool and returns the job ID.
+    progress(stage, **details) updates what get_job reports while the job runs;
+    func's return value (a JSON-serializable dict) becomes the job result.
+    """
+    job_id = uuid.uuid4().hex
+    job = {
+        'id': job_id,
+        'kind': kind,
+        'status': 'queued',
+        'stage': None,
+        'details': {},
+        'result': None,
+        'error': None,
+        'created': time.time(),
+        'started': None,
+        'finished': None,
+    }
+    with _jobs_lock:
+        _prune_finished_jobs()
+        _jobs[job_id] = job
+        target_lock = _target_locks.setdefault(os.path.abspath(target), threading.Lock())
+    _executor.submit(_run_job, job_id, target_lock, func, args)
+    return job_id
+
+def get_job(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job, details=dict(job['details'])) if job is not None else None
+
+def _update_job(job_id, **fields):
+    with _jobs_lock:
+        _jobs[job_id].update(fields)
+
+def _run_job(job_id, target_lock, func, args):
+    def progress(stage, **details):
+        _update_job(job_id, stage=stage, details=details)
+
+    with target_lock:
+        _update_job(job_id, status='running', started=time.time())
+        try:
+            result = func(progress, *args)
+            _update_job(job_id, status='succeeded', stage='done', result=result)
+        except Exception as e:
+            print(f"Cleaning job {job_id} failed: {e}")
+            _update_job(job_id, status='failed', error=str(e))
+        finally:
+            _update_job(job_id, finished=time.time())
+
+def _prune_finished_jobs():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id in [job_id for job_id, job in _jobs.items() if job['finished'] and job['finished'] < cutoff]:
+        del _jobs[job_id]
@@ -1,31 +1,9 @@
 # comparison.py
 
-import os
-import pandas as pd
 import re
-
-# Assuming your datasets are in a 'static' folder relative to where app.py and comparison.py are
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'static')
-
-def find_available_datasets():
-    """
-    Finds available datasets (e.g., CSV files in 'static') and extracts school years.
-    Assumes filenames are like 'YYYY-YYYY_*.csv'.
-    Returns a dictionary mapping year to file path and a sorted list of years (latest first).
-    """
-    print("Finding available datasets...") # Debugging
-    available_datasets = {}
-    if os.path.exists(DATA_DIR):
-        for filename in os.listdir(DATA_DIR):
-            # Use regex to find files matching the 'YYYY-YYYY' pattern
-            match = re.match(r'(\d{4}-\d{4})_.*\.csv$', filename)
-            if match:
-                year = match.group(1)
-                available_datasets[year] = os.path.join(DATA_DIR, filename)
-
-    available_years = sorted(available_datasets.keys(), reverse=True) # Sort years, latest first
-    print(f"Found years: {available_years}") # Debugging
-    return available_datasets, available_years
+from data_config import load_enrollment_cube, enrollment_by_dimension
+# Year -> dataset lookup lives in the shared catalog (data_management/<year>/)
+from dataset_catalog import find_available_datasets  # noqa: F401
 
 def prepare_comparison_charts_data(file_path_1, file_path_2, year1_label, year2_label):
     """
@@ -94,47 +72,33 @@ def prepare_comparison_charts_data(file_path_1, file_path_2, year1_label, year2_
     def process_single_file(file_path):
         """Loads and processes data from a single CSV file."""
         try:
-            df = pd.read_csv(file_path)
-            # Normalize column names
-            df.columns = df.columns.str.strip().str.replace('–', '-', regex=False).str.replace('—', '-', regex=False)
-
-            # Calculate Total Enrollment per row
-            male_cols = [col for col in df.columns if re.search(r'\bmale\b', col, re.IGNORECASE)]
-            female_cols = [col for col in df.columns if re.search(r'\bfemale\b', col, re.IGNORECASE)]
-            all_gender_cols = male_cols + female_cols
+            # Pre-aggregated enrollment cube: year levels and regions are column/row slices of it
+            cube = load_enrollment_cube(file_path)
 
-            # Ensure all gender columns exist before trying to convert/sum
-            existing_gender_cols = [col for col in all_gender_cols if col in df.columns]
+            # Enrollment columns (grade x strand x gender live on the cube's column axis)
+            male_cols = [col for col in cube.columns if re.search(r'\bmale\b', col, re.IGNORECASE)]
+            female_cols = [col for col in cube.columns if re.search(r'\bfemale\b', col, re.IGNORECASE)]
+            existing_gender_cols = male_cols + female_cols
 
             if not existing_gender_cols:
                  print(f"Warning: No male or female enrollment columns found in {file_path}")
-                 df['TotalEnrollment'] = 0 # Set total enrollment to 0 if no data cols
-
-            else:
-                for col in existing_gender_cols:
-                     df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0) # Convert to numeric, fill NaNs with 0
-
-                df['TotalEnrollment'] = df[existing_gender_cols].sum(axis=1)
-
 
             # Calculate Total Enrollment for the year
-            total_enrollment = int(df['TotalEnrollment'].sum())
+            total_enrollment = int(cube[existing_gender_cols].sum().sum()) if existing_gender_cols else 0
 
             # Calculate Enrollment by Year Level
             enrollment_by_year_level = {}
             for grade, columns in grade_columns.items():
-                valid_cols = [col for col in columns if col in df.columns]
-                enrollment_by_year_level[grade] = int(df[valid_cols].sum().sum()) if valid_cols else 0
+                valid_cols = [col for col in columns if col in cube.columns]
+                enrollment_by_year_level[grade] = int(cube[valid_cols].sum().sum()) if valid_cols else 0
 
             # Calculate Enrollment by Region
-            region_col = next((col for col in df.columns if col.strip().lower() == 'region'), None)
             enrollment_by_region = {}
-            if region_col and region_col in df.columns:
-                 # Ensure region column is string type to avoid issues with grouping
-                 df[region_col] = df[region_col].astype(str)
-                 # Group by region and sum total enrollment
+            if 'Region' in cube.columns:
+                 # Region as string so missing regions are grouped (as 'nan') rather than dropped
+                 region_cube = cube.assign(Region=cube['Region'].astype(str))
                  enrollment_by_region = (
-                     df.groupby(region_col)['TotalEnrollment'].sum().astype(int).to_dict()
+                     enrollment_by_dimension(region_cube, 'Region', existing_gender_cols).astype(int).to_dict()
                  )
             else:
                  print(f"Warning: Region column not found in {file_path}")
@@ -4,6 +4,8 @@ from datetime import datetime
 import re
 from difflib import get_close_matches
 import numpy as np # Import numpy
+from functools import lru_cache
+from data_config import write_columnar_sidecar, numeric_column_dtypes, apply_numeric_dtypes
 
 standard_columns = [
     # ... (standard_columns) ...
@@ -34,6 +36,7 @@ region_mapping = {
      'region xii': 'Region XII', 'region 12': 'Region XII',
 }
 
+@lru_cache(maxsize=4096)
 def standardize_region_values(val):
      if isinstance(val, str):
          val_lower = val.strip().lower()
@@ -63,142 +66,202 @@ def standardize_region_values(val):
          return val.strip() # Return original stripped if no match
      return val
 
+def standardize_region_column(values):
+    """Runs standardize_region_values once per distinct value and broadcasts the result back."""
+    codes, uniques = pd.factorize(values)
+    # Missing values (code -1) pick up the trailing NaN
+    standardized = np.array([standardize_region_values(val) for val in uniques] + [np.nan], dtype=object)
+    return pd.Series(standardized[codes], index=values.index, name=values.name)
+
+def strip_string_cells(df):
+    """Strips surrounding whitespace from every string cell, leaving other values untouched."""
+    for col in df.columns:
+        if df[col].dtype == object:
+            # Strip each distinct value once; enrollment columns repeat the same few strings
+            codes, uniques = pd.factorize(df[col])
+            stripped = np.array([val.strip() if isinstance(val, str) else val for val in uniques] + [np.nan], dtype=object)
+            df[col] = stripped[codes]
+    return df
+
+# Raw files are only scanned this far down for their header rows
+HEADER_PREFIX_ROWS = 100
+# Uploads of this size and up are cleaned in chunks of CLEAN_CHUNK_ROWS rows
+STREAMING_CLEAN_MIN_BYTES = int(os.environ.get('TANAW_STREAMING_CLEAN_MB', '64')) * 1024 * 1024
+CLEAN_CHUNK_ROWS = 20000
+
+def find_header_row(df):
+    """Index of the first row with a 'region' cell and a grade indicator cell, or None."""
+    cells = df.astype(str).apply(lambda col: col.str.lower())
+    has_region = cells.apply(lambda col: col.str.contains('region', regex=False)).any(axis=1)
+    has_grade = cells.apply(lambda col: col.str.contains('kindergarten|grade 1|g1|g2|g3', regex=True)).any(axis=1)
+    matches = np.flatnonzero((has_region & has_grade).to_numpy())
+    return int(matches[0]) if len(matches) else None
+
+def read_raw_body(file_path, first_data_row, width):
+    """Parses the raw file from first_data_row (a file line number) on, as stripped strings."""
+    df = pd.read_csv(file_path, header=None, skiprows=first_data_row, names=range(width), dtype=str, low_memory=False)
+    return strip_string_cells(df)
+
+def iter_raw_body(file_path, first_data_row, width, chunksize):
+    """Streaming variant of read_raw_body: yields stripped string chunks of chunksize rows."""
+    reader = pd.read_csv(file_path, header=None, skiprows=first_data_row, names=range(width), dtype=str, chunksize=chunksize)
+    for chunk in reader:
+        yield strip_string_cells(chunk)
+
+def to_numeric_if_possible(values):
+    """pd.to_numeric(errors='ignore') without the deprecated flag: non-numeric columns come back unchanged."""
+    try:
+        return pd.to_numeric(values)
+    except (ValueError, TypeError):
+        return values
 
-def preprocess_column(col):
-    col = str(col).upper().strip()
 
-    if col == 'NAN' or col is None:
-        return None
+# --- Column-name standardization ---
+# Every rewrite preprocess_column applies, compiled once and run in order.
+# COLLAPSE_SPACES entries squeeze whitespace runs and strip the ends.
+COLLAPSE_SPACES = None
+WHITESPACE_RUN = re.compile(r'\s{2,}')
+NON_GRADED_PATTERN = re.compile(r'\bNON\s*[-–]?\s*GRADED?\b', re.IGNORECASE)
+ELEM_OR_JHS_PATTERN = re.compile(r'\b(ELEM|JHS)\b', re.IGNORECASE)
 
+def _rule(pattern, replacement, flags=re.IGNORECASE):
+    return (re.compile(pattern, flags), replacement)
+
+COLUMN_RULES_BEFORE_NON_GRADED = [
     # --- Early Cleanups ---
     # Remove parentheses around content first, also handles nested like (elem Ng)
-    col = re.sub(r'\(\s*(.*?)\s*\)', r'\1', col) # Remove (), trim inside space
-    # Remove extra spaces generated or pre-existing
-    col = re.sub(r'\s{2,}', ' ', col).strip()
-
-    # --- Specific Standardizations ---
+    _rule(r'\(\s*(.*?)\s*\)', r'\1', flags=0),
+    COLLAPSE_SPACES,
 
     # --- Fix Specific Malformed NG Inputs & Spacing ---
-    # Ensure space between known NG-related terms
-    col = re.sub(r'\b(NG)\s*(ELEM)\b', r'\1 \2', col, flags=re.IGNORECASE) # NG ELEM -> NG ELEM
-    col = re.sub(r'\b(NG)\s*(JHS)\b', r'\1 \2', col, flags=re.IGNORECASE)  # NG JHS -> NG JHS
-    col = re.sub(r'\b(NG)\s*(MALE)\b', r'\1 \2', col, flags=re.IGNORECASE) # NG MALE -> NG MALE
-    col = re.sub(r'\b(NG)\s*(FEMALE)\b', r'\1 \2', col, flags=re.IGNORECASE)# NG FEMALE -> NG FEMALE
-    col = re.sub(r'\b(ELEM)\s*(NG)\b', r'\1 \2', col, flags=re.IGNORECASE) # ELEM NG -> ELEM NG (Standard)
-    col = re.sub(r'\b(JHS)\s*(NG)\b', r'\1 \2', col, flags=re.IGNORECASE)  # JHS NG -> JHS NG (Standard)
-
-    # Fix common run-together words explicitly
-    if 'NGELEM' in col: col = col.replace('NGELEM', 'NG ELEM')
-    if 'NGJHS' in col: col = col.replace('NGJHS', 'NG JHS')
-    if 'NGMALE' in col: col = col.replace('NGMALE', 'NG MALE')
-    if 'NGFEMALE' in col: col = col.replace('NGFEMALE', 'NG FEMALE')
-
-    # Normalize spaces again after potential insertions
-    col = re.sub(r'\s{2,}', ' ', col).strip()
-
-    # --- Standardize NG Format and Order ---
-    # Ensure correct order: Level NG (run AFTER fixing spacing above)
-    col = re.sub(r'\bNG\s+ELEM\b', 'ELEM NG', col, flags=re.IGNORECASE) # NG ELEM -> ELEM NG
-    col = re.sub(r'\bNG\s+JHS\b', 'JHS NG', col, flags=re.IGNORECASE)   # NG JHS -> JHS NG
-
-    # Ensure base ELEM/JHS names are standardized BEFORE adding NG
-    col = re.sub(r'\b(ES|ELEM|ELEMENTARY)\b', 'ELEM', col, flags=re.IGNORECASE) # Standardize ELEM name
-    col = re.sub(r'\b(JHS|JUNIOR\s+HIGH\s*SCHOOL)\b', 'JHS', col, flags=re.IGNORECASE) # Standardize JHS name
-
-    col = re.sub(r'\bELEM\b(?!\s+NG)', 'ELEM NG', col, flags=re.IGNORECASE) # Add NG to ELEM if missing
-    col = re.sub(r'\bJHS\b(?!\s+NG)', 'JHS NG', col, flags=re.IGNORECASE)   # Add NG to JHS if missing
-
-    # --- Handle NON-GRADED Prefix based on context ---
-    non_graded_pattern = r'\bNON\s*[-–]?\s*GRADED?\b'
-    if re.search(r'\b(ELEM|JHS)\b', col, flags=re.IGNORECASE):
-        col = re.sub(non_graded_pattern, '', col, flags=re.IGNORECASE)
-    else:
-        
-        col = re.sub(non_graded_pattern, 'NG', col, flags=re.IGNORECASE)
-    # Clean up extra spaces potentially left by removal/replacement
-    col = re.sub(r'\s{2,}', ' ', col).strip()
-
-    # Map Maritime to PBM (assuming this is correct based on standard_columns)
-    col = re.sub(r'\bMARITIME\b', 'PBM', col, flags=re.IGNORECASE)
+    _rule(r'\b(NG)\s*(ELEM)\b', r'\1 \2'),
+    _rule(r'\b(NG)\s*(JHS)\b', r'\1 \2'),
+    _rule(r'\b(NG)\s*(MALE)\b', r'\1 \2'),
+    _rule(r'\b(NG)\s*(FEMALE)\b', r'\1 \2'),
+    _rule(r'\b(ELEM)\s*(NG)\b', r'\1 \2'),
+    _rule(r'\b(JHS)\s*(NG)\b', r'\1 \2'),
+    # Common run-together words
+    _rule('NGELEM', 'NG ELEM', flags=0),
+    _rule('NGJHS', 'NG JHS', flags=0),
+    _rule('NGMALE', 'NG MALE', flags=0),
+    _rule('NGFEMALE', 'NG FEMALE', flags=0),
+    COLLAPSE_SPACES,
+
+    # --- Standardize NG Format and Order: Level NG ---
+    _rule(r'\bNG\s+ELEM\b', 'ELEM NG'),
+    _rule(r'\bNG\s+JHS\b', 'JHS NG'),
+    # Base ELEM/JHS names are standardized BEFORE adding NG
+    _rule(r'\b(ES|ELEM|ELEMENTARY)\b', 'ELEM'),
+    _rule(r'\b(JHS|JUNIOR\s+HIGH\s*SCHOOL)\b', 'JHS'),
+    _rule(r'\bELEM\b(?!\s+NG)', 'ELEM NG'),
+    _rule(r'\bJHS\b(?!\s+NG)', 'JHS NG'),
+]
 
-    # Standardize Grade Levels and Kindergarten AFTER specific NG/Maritime handling
-    col = re.sub(r'KINDERGARTEN', 'K', col, flags=re.IGNORECASE)
-    col = re.sub(r'\bGRADE\s*(\d{1,2})\b', r'G\1', col, flags=re.IGNORECASE) # G1, G10 etc.
+COLUMN_RULES_AFTER_NON_GRADED = [
+    COLLAPSE_SPACES,
+    # Map Maritime to PBM
+    _rule(r'\bMARITIME\b', 'PBM'),
+    # Grade Levels and Kindergarten AFTER specific NG/Maritime handling
+    _rule(r'KINDERGARTEN', 'K'),
+    _rule(r'\bGRADE\s*(\d{1,2})\b', r'G\1'),
 
     # --- SHS Specific Standardization ---
-
-    # 1. Standardize Track Names
-    col = re.sub(r'\bARTS\s*([&AND]+\s*)?DESIGN\b', 'ARTS', col, flags=re.IGNORECASE)
-    col = re.sub(r'\bACADEMIC\s*(TRACK)?\b', 'ACAD', col, flags=re.IGNORECASE)
-    col = re.sub(r'\bTECHNICAL\s*[-–]?\s*VOCATIONAL\s*[-–]?\s*(LIVELIHOOD|TVL)\b', 'TVL', col, flags=re.IGNORECASE)
-
-    # 2. Combine Grade + Track/Strand using replacement functions
-
-    def replace_acad_hyphen(match):
-        grade = match.group(1)
-        strand = match.group(3)
-        return f"{grade} ACAD - {strand}"
-
-    def replace_acad_no_hyphen(match):
-        grade = match.group(1)
-        strand = match.group(3)
-        return f"{grade} ACAD {strand}"
-
-    # Apply for ABM/HUMSS
-    col = re.sub(
-        r'\b(G11|G12)\b'           # Group 1: Grade
-        r'(?:\s*[-–]?\s*)'       # Optional separator
-        r'(ACAD\s*[-–]?\s*)?'     # Group 2: Optional ACAD part
-        r'\b(ABM|HUMSS)\b',        # Group 3: Strand
-        replace_acad_hyphen, col, flags=re.IGNORECASE
-    )
-
-    # Apply for STEM/GAS/PBM (now includes PBM via Maritime mapping)
-    col = re.sub(
-        r'\b(G11|G12)\b'           # Group 1: Grade
-        r'(?:\s*[-–]?\s*)'       # Optional separator
-        r'(ACAD\s*[-–]?\s*)?'     # Group 2: Optional ACAD part
-        r'\b(STEM|GAS|PBM)\b',     # Group 3: Strand
-        replace_acad_no_hyphen, col, flags=re.IGNORECASE
-    )
-
-    # Standardize other tracks (TVL/SPORTS/ARTS)
-    col = re.sub(r'\b(G11|G12)\b\s*[-–]?\s*\b(TVL|SPORTS|ARTS)\b', r'\1 \2', col, flags=re.IGNORECASE)
+    # 1. Track Names
+    _rule(r'\bARTS\s*([&AND]+\s*)?DESIGN\b', 'ARTS'),
+    _rule(r'\bACADEMIC\s*(TRACK)?\b', 'ACAD'),
+    _rule(r'\bTECHNICAL\s*[-–]?\s*VOCATIONAL\s*[-–]?\s*(LIVELIHOOD|TVL)\b', 'TVL'),
+    # 2. Grade + Track/Strand: grade, optional separator, optional ACAD part, strand
+    _rule(r'\b(G11|G12)\b(?:\s*[-–]?\s*)(ACAD\s*[-–]?\s*)?\b(ABM|HUMSS)\b', r'\1 ACAD - \3'),
+    _rule(r'\b(G11|G12)\b(?:\s*[-–]?\s*)(ACAD\s*[-–]?\s*)?\b(STEM|GAS|PBM)\b', r'\1 ACAD \3'),
+    _rule(r'\b(G11|G12)\b\s*[-–]?\s*\b(TVL|SPORTS|ARTS)\b', r'\1 \2'),
 
     # --- Final Cleanup ---
-    col = re.sub(r'\s{2,}', ' ', col).strip()
-
-    # Add specific check for NG ordering just in case
-    col = re.sub(r'\bNG\s+ELEM\b', 'ELEM NG', col, flags=re.IGNORECASE)
-    col = re.sub(r'\bNG\s+JHS\b', 'JHS NG', col, flags=re.IGNORECASE)
+    COLLAPSE_SPACES,
+    _rule(r'\bNG\s+ELEM\b', 'ELEM NG'),
+    _rule(r'\bNG\s+JHS\b', 'JHS NG'),
+]
 
+UPPERCASE_COLUMN_TOKENS = {'TVL', 'STEM', 'ABM', 'HUMSS', 'GAS', 'PBM', 'NG', 'JHS', 'ACAD', 'K'}
+STANDARD_COLUMN_SET = frozenset(standard_columns)
 
+def apply_column_rules(col, rules):
+    for rule in rules:
+        if rule is COLLAPSE_SPACES:
+            col = WHITESPACE_RUN.sub(' ', col).strip()
+        else:
+            pattern, replacement = rule
+            col = pattern.sub(replacement, col)
     return col
 
-def standardize_column_name(col):
-    processed_col = preprocess_column(col)
-    if processed_col is None: 
-        return None 
+@lru_cache(maxsize=4096)
+def preprocess_header(text):
+    col = text.upper().strip()
+    if col == 'NAN':
+        return None
+
+    col = apply_column_rules(col, COLUMN_RULES_BEFORE_NON_GRADED)
+    # NON-GRADED is dropped next to ELEM/JHS (already NG) and shortened to NG elsewhere
+    col = NON_GRADED_PATTERN.sub('' if ELEM_OR_JHS_PATTERN.search(col) else 'NG', col)
+    return apply_column_rules(col, COLUMN_RULES_AFTER_NON_GRADED)
+
+def preprocess_column(col):
+    return preprocess_header(str(col))
+
+@lru_cache(maxsize=1024)
+def closest_standard_column(name):
+    """Fuzzy fallback for names that are not a standard column verbatim."""
+    match = get_close_matches(name, standard_columns, n=1, cutoff=0.85)
+    return match[0] if match else name
+
+@lru_cache(maxsize=4096)
+def standardize_header(text):
+    processed_col = preprocess_header(text)
+    if processed_col is None:
+        return None
 
-    # Capitalization logic (similar to before)
-    parts = processed_col.split()
+    # Capitalization: known tokens and grade codes upper, everything else capitalized
     capitalized_parts = []
-    for part in parts:
+    for part in processed_col.split():
         part_upper = part.upper()
-        if part_upper in ['TVL', 'STEM', 'ABM', 'HUMSS', 'GAS', 'PBM', 'NG', 'JHS', 'ACAD']:
+        if part_upper in UPPERCASE_COLUMN_TOKENS or (part_upper.startswith('G') and part_upper[1:].isdigit()):
             capitalized_parts.append(part_upper)
-        elif part_upper == 'K':
-             capitalized_parts.append('K') # Keep K uppercase
-        elif part_upper.startswith('G') and part_upper[1:].isdigit():
-             capitalized_parts.append(part_upper) # Keep G1, G2 etc uppercase
         else:
             capitalized_parts.append(part.capitalize())
     final_col = ' '.join(capitalized_parts)
 
-    # Final check against standard columns using closeness
-    # Ensure standard_columns are defined in the scope or passed as an argument
-    match = get_close_matches(final_col, standard_columns, n=1, cutoff=0.85) 
-    return match[0] if match else final_col # Return best match or the processed name if no close match
+    # An exact standard name is its own closest match
+    if final_col in STANDARD_COLUMN_SET:
+        return final_col
+    return closest_standard_column(final_col)
+
+# Grade labels of the historical regional files (first header row, before the Male/Female row)
+HISTORICAL_GRADE_LABELS = [
+    'Kindergarten', 'Grade 1', 'Grade 2', 'Grade 3', 'Grade 4', 'Grade 5', 'Grade 6',
+    'Non-Grade (ES)', 'Grade 7', 'Grade 8', 'Grade 9', 'Grade 10', 'Non-Grade (JHS)',
+    'Grade 11 (ABM)', 'Grade 11 (HUMSS)', 'Grade 11 (STEM)', 'Grade 11 (GAS)', 'Grade 11 (MARITIME)',
+    'Grade 11 (TVL)', 'Grade 11 (SPORTs)', 'Grade 11 (ARTs & DESIGN)',
+    'Grade 12 (ABM)', 'Grade 12 (HUMSS)', 'Grade 12 (STEM)', 'Grade 12 (GAS)', 'Grade 12 (MARITIME)',
+    'Grade 12 (TVL)', 'Grade 12 (SPORTs)', 'Grade 12 (ARTs & DESIGN)',
+]
+
+def historical_column_variants():
+    """Header strings standardize_column_name receives for the historical file layouts."""
+    variants = list(standard_columns) + ['Region', 'Male', 'Female']
+    for label in HISTORICAL_GRADE_LABELS:
+        grade = preprocess_header(label)
+        variants.append(grade)
+        variants.extend(f"{grade} {gender}" for gender in ('Male', 'Female'))
+    return variants
+
+# Exact lookups for the known variants, resolved once at import
+KNOWN_COLUMN_NAMES = {variant: standardize_header(variant) for variant in historical_column_variants()}
+
+def standardize_column_name(col):
+    text = str(col)
+    known = KNOWN_COLUMN_NAMES.get(text)
+    if known is not None:
+        return known
+    return standardize_header(text)
 
 
 def check_if_already_cleaned(df, standard_enrollment_cols):
@@ -255,148 +318,202 @@ def check_if_already_cleaned(df, standard_enrollment_cols):
         return False
 
 
-def clean_data(file_path):
+def report_progress(progress, stage, **details):
+    if progress is not None:
+        progress(stage, **details)
+
+def clean_school_level_frame(df_cleaned, progress=None, dtypes=None):
+    """
+    School-level cleaning of a body frame (whole file or one chunk); rows are handled independently.
+    For a chunk, dtypes (numeric_column_dtypes of the whole body) makes the numeric conversion
+    agree with the other chunks.
+    """
+    report_progress(progress, 'numeric coercion', rows=len(df_cleaned))
+    # Attempt numeric conversion early where possible
+    if dtypes is None:
+        df_cleaned = df_cleaned.apply(to_numeric_if_possible)
+    else:
+        df_cleaned = apply_numeric_dtypes(df_cleaned, dtypes)
+    if 'Region' in df_cleaned.columns:
+        df_cleaned['Region'] = standardize_region_column(df_cleaned['Region'])
+
+    # Ensure essential columns exist before applying school logic
+    required_school_cols = ['School Name', 'BEIS School ID', 'Region'] # Add others if needed
+    if not all(col in df_cleaned.columns for col in required_school_cols):
+         raise ValueError("School level file missing essential columns like 'School Name' or 'BEIS School ID'.")
+
+    # Apply school-specific cleaning (your existing logic)
+    special_cases = {
+        # ... your special_cases dictionary ...
+        r'\bES\b': 'ELEMENTARY SCHOOL', 'E/S': 'ELEMENTARY SCHOOL', r'\bELEM\b': 'ELEMENTARY SCHOOL', # Use \b for word boundaries
+        r'\bNHS\b': 'NATIONAL HIGH SCHOOL', r'\bHS\b': 'HIGH SCHOOL', r'\bCES\b': 'CENTRAL ELEMENTARY SCHOOL',
+        r'\bSCH\b': 'SCHOOL', r'Incorporated': 'INC.', r'\bMEM\b': 'MEMORIAL', # Corrected MEM regex
+        r'\bCS\b': 'CENTRAL SCHOOL', r'\bPS\b': 'PRIMARY SCHOOL', 'P/S': 'PRIMARY SCHOOL',
+        r'\bLC\b': 'LEARNING CENTER', r'BARANGAY': 'BRGY.', r'POBLACION': 'POB.', # Simpler replacement
+        r'STREET': 'ST.', r'BUILDING': 'BLDG.', r'BLOCK': 'BLK.', r'PUROK': 'PRK.',
+        r'AVENUE': 'AVE.', r'ROAD': 'RD.', r'PACKAGE': 'PKG.', r'PHASE': 'PH.',
+         # Careful with these general ones, apply last
+         r'\s*,\s*': ', ', r'\s{2,}': ' '
+    }
+    # Ensure columns exist before formatting
+    columns_to_format_text = [col for col in ['School Name', 'Street Address', 'Province', 'Municipality', 'Barangay'] if col in df_cleaned.columns]
+    if columns_to_format_text:
+         df_cleaned[columns_to_format_text] = df_cleaned[columns_to_format_text].astype(str).apply(
+             lambda x: x.str.replace('#', '', regex=False)
+                        .str.replace(r'^[-:]+', '', regex=True) # Match one or more at the start
+                        .str.strip()
+                        .str.upper()
+                        # Apply regex replacements carefully
+                        .replace(special_cases, regex=True)
+         )
+
+    columns_to_format_na = [col for col in ['Street Address', 'Barangay'] if col in df_cleaned.columns]
+    if columns_to_format_na:
+        na_values_list = ['N/A', 'N.A.', 'N / A', 'NA', 'NONE', 'NULL', 'NOT APPLICABLE', '', '0', '_', '=', '.', '-----']
+        df_cleaned[columns_to_format_na] = df_cleaned[columns_to_format_na].replace(na_values_list, np.nan) # Use numpy nan
+        df_cleaned[columns_to_format_na] = df_cleaned[columns_to_format_na].replace(r'^[\s\W_]+$', np.nan, regex=True) # Match whitespace/non-word chars only
+        df_cleaned[columns_to_format_na] = df_cleaned[columns_to_format_na].fillna("UNKNOWN") # Fill actual NaNs
+
+    # Standardize numeric columns (enrollment)
+    non_enrollment_cols_school = [
+        'Region', 'Division', 'District', 'BEIS School ID', 'School Name',
+        'Street Address', 'Province', 'Municipality', 'Legislative District',
+        'Barangay', 'Sector', 'School Subclassification', 'School Type', 'Modified COC' # Add any others
+    ]
+    enrollment_cols = [col for col in df_cleaned.columns if col not in non_enrollment_cols_school and col in standard_columns]
+
+    # Convert enrollment columns to numeric, coercing errors, filling NaN with 0
+    for col in enrollment_cols:
+        if col in df_cleaned.columns:
+            df_cleaned[col] = df_cleaned[col].astype(str).str.replace(',', '', regex=False) # Remove commas
+            df_cleaned[col] = pd.to_numeric(df_cleaned[col], errors='coerce')
+
+    # Filter unrealistic data AFTER conversion
+    df_cleaned = df_cleaned.fillna({col: 0 for col in enrollment_cols}) # Fill NaN with 0 only for enrollment cols
+     # Now convert to integer type
+    for col in enrollment_cols:
+        if col in df_cleaned.columns:
+            try:
+                df_cleaned[col] = df_cleaned[col].astype(int)
+            except (ValueError, TypeError) as e:
+                 print(f"Warning: Could not convert column '{col}' to int after cleaning. Error: {e}")
+                 # Decide how to handle - leave as float, try object, or raise error?
+                 # df_cleaned[col] = df_cleaned[col].astype(object) # Option: keep as object
+
+
+    report_progress(progress, 'filtering', rows=len(df_cleaned))
+    max_threshold = 5000 # Define threshold
+
+    # Identify rows to drop based on conditions on numeric enrollment columns
+    unrealistic_indices = set()
+    for col in enrollment_cols:
+         if col in df_cleaned.columns:
+             # Check for negative values
+             unrealistic_indices.update(df_cleaned[df_cleaned[col] < 0].index)
+             # Check for values above threshold
+             unrealistic_indices.update(df_cleaned[df_cleaned[col] > max_threshold].index)
+             # Note: Check for non-integers isn't needed if successfully converted to int
+
+    # Drop unrealistic rows
+    df_cleaned = df_cleaned.drop(list(unrealistic_indices))
+    return df_cleaned
+
+def write_cleaned_chunks(cleaned_chunks, cleaned_path, progress=None):
+    """
+    Appends cleaned frames to cleaned_path (header once); returns the number of rows written.
+    Chunks go to a temporary file that replaces cleaned_path only once every chunk is written,
+    so a chunk that fails to clean never leaves a truncated CSV in cleaned_files/.
+    """
+    tmp_path = f"{cleaned_path}.{os.getpid()}.tmp"
+    rows_written = 0
+    try:
+        for chunk in cleaned_chunks:
+            if chunk.empty:
+                continue
+            report_progress(progress, 'save', rows_written=rows_written)
+            chunk.to_csv(tmp_path, mode='a' if rows_written else 'w', header=not rows_written, index=False)
+            rows_written += len(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if rows_written:
+        os.replace(tmp_path, cleaned_path)
+    return rows_written
+
+def clean_data(file_path, chunksize=None, progress=None):
+    """
+    Cleans an uploaded enrollment CSV into cleaned_files/ and returns the cleaned path (None if empty).
+    With chunksize (automatic for uploads of STREAMING_CLEAN_MIN_BYTES and up), already-clean and
+    school-level files are processed and written chunksize rows at a time, so memory stays bounded;
+    a first pass over the chunks fixes each column's numeric type, so the output matches an
+    in-memory clean. progress(stage, **details) is called as cleaning moves through header
+    detection, type detection (chunked only), numeric coercion, filtering and save.
+    """
+    if chunksize is None and os.path.getsize(file_path) >= STREAMING_CLEAN_MIN_BYTES:
+        chunksize = CLEAN_CHUNK_ROWS
+
     cleaned_files_directory = os.path.join(os.path.dirname(file_path), 'cleaned_files') # More robust path finding
     os.makedirs(cleaned_files_directory, exist_ok=True)
 
-    # --- Try reading with header=0 first to check if it's already clean ---
+    report_progress(progress, 'header detection')
+    # --- Check a bounded prefix (header=0) to see if it's already clean ---
     try:
-        df_check = pd.read_csv(file_path, header=0, low_memory=False)
+        df_prefix = pd.read_csv(file_path, header=0, nrows=HEADER_PREFIX_ROWS, low_memory=False)
          # Define the expected enrollment columns for the check
-        is_cleaned = check_if_already_cleaned(df_check, standard_columns)
+        is_cleaned = check_if_already_cleaned(df_prefix, standard_columns)
     except Exception as e:
         # print(f"DEBUG: Initial read with header=0 failed or check failed: {e}")
         is_cleaned = False
-        df_check = None # Ensure df_check is None if read fails
 
-    if is_cleaned and df_check is not None:
+    if is_cleaned:
         print("--- File appears already cleaned. Skipping intensive cleaning. ---")
+        if chunksize:
+            report_progress(progress, 'type detection')
+            dtypes = numeric_column_dtypes(pd.read_csv(file_path, header=0, dtype=str, chunksize=chunksize))
+            df_checks = (apply_numeric_dtypes(chunk, dtypes) for chunk in pd.read_csv(file_path, header=0, dtype=str, chunksize=chunksize))
+        else:
+            df_checks = [pd.read_csv(file_path, header=0, low_memory=False)]
         # Optional: Perform minimal validation if needed (e.g., ensure region values are standard)
-        if 'Region' in df_check.columns:
-             df_check['Region'] = df_check['Region'].apply(standardize_region_values)
-        df_cleaned = df_check # Use the successfully read and checked DataFrame
+        cleaned_chunks = (
+            df_check.assign(Region=standardize_region_column(df_check['Region'])) if 'Region' in df_check.columns else df_check
+            for df_check in df_checks
+        )
         # Proceed directly to saving
     else:
         print("--- File needs cleaning or is not standard format. Performing full cleaning. ---")
         # --- Proceed with the original logic for raw files ---
-        df = pd.read_csv(file_path, header=None, low_memory=False) # Read without header
-        df = df.applymap(lambda x: standardize_region_values(x) if isinstance(x, str) else x) # Apply region standardization cell-wise
-
-        # Detect header row (keep your existing logic)
-        potential_headers = ['Region', 'Kindergarten', 'Grade 1', 'Grade 2', 'G1', 'G2']
-        header_row_index = None
-        for idx, row in df.iterrows():
-             # Handle potential non-string data gracefully before .str methods
-            row_values = []
-            for item in row:
-                try:
-                    row_values.append(str(item).lower())
-                except:
-                    row_values.append("") # Append empty string if conversion fails
-
-            # Check for 'region' and at least one grade indicator
-            has_region = any('region' in cell for cell in row_values)
-            has_grade = any(any(grade.lower() in cell for cell in row_values) for grade in ['kindergarten', 'grade 1', 'g1', 'g2', 'g3']) # Broader check
-
-            if has_region and has_grade:
-                 header_row_index = idx
-                 break
+        # Only a bounded prefix is read to find the header rows; blank lines are kept
+        # so that row numbers are file line numbers, usable as skiprows for the body
+        df = pd.read_csv(file_path, header=None, nrows=HEADER_PREFIX_ROWS, skip_blank_lines=False, dtype=str)
+        df = strip_string_cells(df)
+
+        # Detect header row: first row with 'region' and a grade indicator
+        header_row_index = find_header_row(df)
 
         if header_row_index is None:
-             raise ValueError("Could not find a valid header row containing 'Region' and grade indicators.")
+             raise ValueError(f"Could not find a valid header row containing 'Region' and grade indicators in the first {HEADER_PREFIX_ROWS} rows.")
 
         # --- Split based on detected level (School vs Regional/Divisional etc.) ---
         header_content = df.iloc[header_row_index].astype(str).str.upper()
         is_school_level = 'SCHOOL NAME' in header_content.values and 'BEIS SCHOOL ID' in header_content.values
 
-        # Assign header AFTER determining level, as logic differs
-        df.columns = df.iloc[header_row_index]
-        df_data_part = df.iloc[header_row_index + 1:].reset_index(drop=True)
-        # Attempt numeric conversion early where possible
-        df_data_part = df_data_part.apply(pd.to_numeric, errors='ignore')
-
-
         if is_school_level:
             print("--- Cleaning School Level File ---")
-            df_cleaned = df_data_part # Start with the data part
-            # Ensure essential columns exist before applying school logic
-            required_school_cols = ['School Name', 'BEIS School ID', 'Region'] # Add others if needed
-            if not all(col in df_cleaned.columns for col in required_school_cols):
-                 raise ValueError("School level file missing essential columns like 'School Name' or 'BEIS School ID'.")
-
-            # Apply school-specific cleaning (your existing logic)
-            special_cases = {
-                # ... your special_cases dictionary ...
-                r'\bES\b': 'ELEMENTARY SCHOOL', 'E/S': 'ELEMENTARY SCHOOL', r'\bELEM\b': 'ELEMENTARY SCHOOL', # Use \b for word boundaries
-                r'\bNHS\b': 'NATIONAL HIGH SCHOOL', r'\bHS\b': 'HIGH SCHOOL', r'\bCES\b': 'CENTRAL ELEMENTARY SCHOOL',
-                r'\bSCH\b': 'SCHOOL', r'Incorporated': 'INC.', r'\bMEM\b': 'MEMORIAL', # Corrected MEM regex
-                r'\bCS\b': 'CENTRAL SCHOOL', r'\bPS\b': 'PRIMARY SCHOOL', 'P/S': 'PRIMARY SCHOOL',
-                r'\bLC\b': 'LEARNING CENTER', r'BARANGAY': 'BRGY.', r'POBLACION': 'POB.', # Simpler replacement
-                r'STREET': 'ST.', r'BUILDING': 'BLDG.', r'BLOCK': 'BLK.', r'PUROK': 'PRK.',
-                r'AVENUE': 'AVE.', r'ROAD': 'RD.', r'PACKAGE': 'PKG.', r'PHASE': 'PH.',
-                 # Careful with these general ones, apply last
-                 r'\s*,\s*': ', ', r'\s{2,}': ' '
-            }
-            # Ensure columns exist before formatting
-            columns_to_format_text = [col for col in ['School Name', 'Street Address', 'Province', 'Municipality', 'Barangay'] if col in df_cleaned.columns]
-            if columns_to_format_text:
-                 df_cleaned[columns_to_format_text] = df_cleaned[columns_to_format_text].astype(str).apply(
-                     lambda x: x.str.replace('#', '', regex=False)
-                                .str.replace(r'^[-:]+', '', regex=True) # Match one or more at the start
-                                .str.strip()
-                                .str.upper()
-                                # Apply regex replacements carefully
-                                .replace(special_cases, regex=True)
-                 )
-
-            columns_to_format_na = [col for col in ['Street Address', 'Barangay'] if col in df_cleaned.columns]
-            if columns_to_format_na:
-                na_values_list = ['N/A', 'N.A.', 'N / A', 'NA', 'NONE', 'NULL', 'NOT APPLICABLE', '', '0', '_', '=', '.', '-----']
-                df_cleaned[columns_to_format_na] = df_cleaned[columns_to_format_na].replace(na_values_list, np.nan) # Use numpy nan
-                df_cleaned[columns_to_format_na] = df_cleaned[columns_to_format_na].replace(r'^[\s\W_]+$', np.nan, regex=True) # Match whitespace/non-word chars only
-                df_cleaned[columns_to_format_na] = df_cleaned[columns_to_format_na].fillna("UNKNOWN") # Fill actual NaNs
-
-            # Standardize numeric columns (enrollment)
-            non_enrollment_cols_school = [
-                'Region', 'Division', 'District', 'BEIS School ID', 'School Name',
-                'Street Address', 'Province', 'Municipality', 'Legislative District',
-                'Barangay', 'Sector', 'School Subclassification', 'School Type', 'Modified COC' # Add any others
-            ]
-            enrollment_cols = [col for col in df_cleaned.columns if col not in non_enrollment_cols_school and col in standard_columns]
-
-            # Convert enrollment columns to numeric, coercing errors, filling NaN with 0
-            for col in enrollment_cols:
-                if col in df_cleaned.columns:
-                    df_cleaned[col] = df_cleaned[col].astype(str).str.replace(',', '', regex=False) # Remove commas
-                    df_cleaned[col] = pd.to_numeric(df_cleaned[col], errors='coerce')
-
-            # Filter unrealistic data AFTER conversion
-            df_cleaned = df_cleaned.fillna({col: 0 for col in enrollment_cols}) # Fill NaN with 0 only for enrollment cols
-             # Now convert to integer type
-            for col in enrollment_cols:
-                if col in df_cleaned.columns:
-                    try:
-                        df_cleaned[col] = df_cleaned[col].astype(int)
-                    except (ValueError, TypeError) as e:
-                         print(f"Warning: Could not convert column '{col}' to int after cleaning. Error: {e}")
-                         # Decide how to handle - leave as float, try object, or raise error?
-                         # df_cleaned[col] = df_cleaned[col].astype(object) # Option: keep as object
-
-
-            max_threshold = 5000 # Define threshold
-
-            # Identify rows to drop based on conditions on numeric enrollment columns
-            unrealistic_indices = set()
-            for col in enrollment_cols:
-                 if col in df_cleaned.columns:
-                     # Check for negative values
-                     unrealistic_indices.update(df_cleaned[df_cleaned[col] < 0].index)
-                     # Check for values above threshold
-                     unrealistic_indices.update(df_cleaned[df_cleaned[col] > max_threshold].index)
-                     # Note: Check for non-integers isn't needed if successfully converted to int
-
-            # Drop unrealistic rows
-            df_cleaned = df_cleaned.drop(list(unrealistic_indices))
+            # Body is parsed once, below the single header row
+            columns = df.iloc[header_row_index]
+            if chunksize:
+                # Streaming: each chunk goes through the same cleaning and is appended to the output
+                report_progress(progress, 'type detection')
+                dtypes = numeric_column_dtypes(iter_raw_body(file_path, header_row_index + 1, df.shape[1], chunksize))
+                cleaned_chunks = (
+                    clean_school_level_frame(chunk.set_axis(columns, axis=1), progress, dtypes)
+                    for chunk in iter_raw_body(file_path, header_row_index + 1, df.shape[1], chunksize)
+                )
+            else:
+                df_data_part = read_raw_body(file_path, header_row_index + 1, df.shape[1])
+                df_data_part.columns = columns
+                cleaned_chunks = [clean_school_level_frame(df_data_part, progress)]
 
 
         else:
@@ -466,7 +583,7 @@ def clean_data(file_path):
 
 
             # Data starts 2 rows below the grade header row
-            df_data = df.iloc[header_row_index + 2:].reset_index(drop=True)
+            df_data = read_raw_body(file_path, header_row_index + 2, df.shape[1])
 
             # Check column length mismatch
             if len(new_columns) != df_data.shape[1]:
@@ -484,6 +601,7 @@ def clean_data(file_path):
             df_cleaned = df_data
 
             # Standardize numeric columns (enrollment)
+            report_progress(progress, 'numeric coercion', rows=len(df_cleaned))
             non_enrollment_cols_regional = ['Region'] # Potentially others like 'Division' if present
             enrollment_cols = [col for col in df_cleaned.columns if col not in non_enrollment_cols_regional and col in standard_columns]
 
@@ -494,20 +612,23 @@ def clean_data(file_path):
 
             # Ensure 'Region' column is standardized if it exists after header processing
             if 'Region' in df_cleaned.columns:
-                df_cleaned['Region'] = df_cleaned['Region'].apply(standardize_region_values)
+                df_cleaned['Region'] = standardize_region_column(df_cleaned['Region'])
+            # Regional/division files are a few hundred rows at most; always cleaned in memory
+            cleaned_chunks = [df_cleaned]
 
 
     # --- Final Save ---
-    if not df_cleaned.empty:
-        # Construct filename and path
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        input_basename = os.path.splitext(os.path.basename(file_path))[0]
-        cleaned_filename = f"{input_basename}_cleaned_{timestamp}.csv"
-        cleaned_path = os.path.join(cleaned_files_directory, cleaned_filename)
-        
-        # Save the cleaned DataFrame
-        df_cleaned.to_csv(cleaned_path, index=False)
+    # Construct filename and path
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    input_basename = os.path.splitext(os.path.basename(file_path))[0]
+    cleaned_filename = f"{input_basename}_cleaned_{timestamp}.csv"
+    cleaned_path = os.path.join(cleaned_files_directory, cleaned_filename)
+
+    # Save the cleaned data (appended chunk by chunk when streaming)
+    if write_cleaned_chunks(cleaned_chunks, cleaned_path, progress):
         print(f"Cleaned file saved to: {cleaned_path}")
+        # Typed columnar copy so the dashboards never have to re-parse the CSV text
+        write_columnar_sidecar(cleaned_path)
         return cleaned_path
     else:
         print("Warning: Cleaned DataFrame is empty. No file saved.")
@@ -1,237 +1,909 @@
 import os
+import json
+import numpy as np
 import pandas as pd
 import re
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict
 
-def get_dataset_path(filename="Cleaned_School_DataSet.csv"):
+try:
+    import pyarrow as pa  # optional, enables the columnar (Parquet) sidecars
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Upper bound for parsed datasets kept resident per process (all school years combined)
+DATASET_CACHE_MAX_BYTES = int(os.environ.get('TANAW_DATASET_CACHE_MB', '512')) * 1024 * 1024
+
+GENDER_COLUMN_PATTERN = re.compile(r'\b(male|female)\b', re.IGNORECASE)
+WHOLE_NUMBER_TEXT = re.compile(r'^\d+(\.0*)?$')
+
+DATA_MANAGEMENT_FOLDER = os.path.join(os.path.dirname(__file__), 'data_management')
+# Which cleaned dataset the dashboards show; survives restarts
+ACTIVE_DATASET_STATE_PATH = os.path.join(os.path.dirname(__file__), 'active_dataset', 'active_dataset.json')
+SIDECAR_EXTENSION = '.parquet'
+CUBE_EXTENSION = '.cube.parquet'
+ROW_INDEX_EXTENSION = '.rowindex.npz'
+STORE_EXTENSION = '.sqlite'
+# Rows per chunk when a cleaned CSV is converted (sidecar, cube) without loading it whole
+DATASET_CHUNK_ROWS = 20000
+# Byte offset of every Nth data row is kept, so a page read seeks to within N rows of its start
+ROW_INDEX_STRIDE = 1000
+# Low-cardinality geo/sector columns kept dictionary-encoded (in memory and in the sidecar)
+DICTIONARY_COLUMNS = [
+    'Region', 'Division', 'Province', 'Municipality', 'Legislative District',
+    'Sector', 'School Type', 'School Subclassification'
+]
+# High-cardinality text columns stored as Arrow strings (interned Python strings without pyarrow)
+STRING_COLUMNS = ['School Name', 'BEIS School ID', 'Street Address', 'Barangay']
+# clean_data caps school-level enrollment counts at 5000, so they fit in uint16
+# (region-level files hold totals and keep int64, see as_enrollment_counts)
+ENROLLMENT_COUNT_DTYPE = 'uint16'
+
+def get_dataset_path(filename=None):
+    """The dataset the dashboards show: the activated one, else static/<filename>."""
+    if filename is None:
+        active_path, _ = get_active_dataset()
+        if active_path is not None:
+            return active_path
+        filename = "Cleaned_School_DataSet.csv"
     return os.path.join(os.path.dirname(__file__), 'static', filename)
 
-def fetch_enrollment_records_from_csv(file_path):
+def get_sidecar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + SIDECAR_EXTENSION
+
+def get_cube_path(csv_path):
+    return os.path.splitext(csv_path)[0] + CUBE_EXTENSION
+
+def get_row_index_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ROW_INDEX_EXTENSION
+
+def get_store_path(csv_path):
+    return os.path.splitext(csv_path)[0] + STORE_EXTENSION
+
+def get_derived_paths(csv_path):
+    """Files generated from a cleaned CSV that live and die with it."""
+    return [get_sidecar_path(csv_path), get_cube_path(csv_path), get_row_index_path(csv_path), get_store_path(csv_path)]
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_csv_dataset(file_path):
+    """Parses a cleaned CSV and coerces the enrollment columns to numbers."""
+    df = pd.read_csv(file_path)
+    for col in df.columns:
+        if GENDER_COLUMN_PATTERN.search(str(col)):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+def numeric_column_dtypes(chunks):
+    """
+    The dtype pd.to_numeric gives each column of the chunks (string frames) taken as one
+    file: 'int64', 'float64', or None where some value is not numeric. Applied with
+    apply_numeric_dtypes, every chunk comes out typed the way the whole file would.
+    """
+    dtypes = None
+    for chunk in chunks:
+        kinds = []
+        for position in range(chunk.shape[1]):
+            try:
+                kinds.append('float64' if pd.to_numeric(chunk.iloc[:, position]).dtype.kind == 'f' else 'int64')
+            except (ValueError, TypeError):
+                kinds.append(None)
+        if dtypes is None:
+            dtypes = kinds
+        else:
+            dtypes = [None if None in pair else ('float64' if 'float64' in pair else 'int64') for pair in zip(dtypes, kinds)]
+    return dtypes or []
+
+def apply_numeric_dtypes(df, dtypes):
+    """Converts the columns numeric_column_dtypes typed; the others stay strings even where this chunk looks numeric."""
+    for position, dtype in enumerate(dtypes):
+        if dtype is not None:
+            df.isetitem(position, pd.to_numeric(df.iloc[:, position], errors='coerce').astype(dtype))
+    return df
+
+def csv_dataset_dtypes(csv_path, chunksize=DATASET_CHUNK_ROWS):
+    """numeric_column_dtypes of a cleaned CSV, with enrollment columns always numeric (as read_csv_dataset coerces them)."""
+    dtypes = numeric_column_dtypes(pd.read_csv(csv_path, dtype=str, chunksize=chunksize))
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return [dtype or ('float64' if GENDER_COLUMN_PATTERN.search(str(col)) else None) for col, dtype in zip(header, dtypes)]
+
+def iter_csv_dataset(csv_path, chunksize=DATASET_CHUNK_ROWS, dtypes=None):
+    """read_csv_dataset in frames of chunksize rows, each typed like the whole file."""
+    if dtypes is None:
+        dtypes = csv_dataset_dtypes(csv_path, chunksize)
+    for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunksize):
+        yield apply_numeric_dtypes(chunk, dtypes)
+
+def iter_dataset_chunks(csv_path, columns=None, chunksize=DATASET_CHUNK_ROWS):
+    """
+    A cleaned dataset (only `columns`, if given) in frames of at most chunksize rows:
+    sidecar batches when it is current, else CSV chunks.
+    """
+    if sidecar_is_current(csv_path):
+        for batch in pq.ParquetFile(get_sidecar_path(csv_path)).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in iter_csv_dataset(csv_path, chunksize):
+            yield chunk if columns is None else chunk[columns]
+
+def frame_memory_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def intern_strings(values):
+    """Object column whose equal values share one str object (missing values stay NaN)."""
+    codes, uniques = pd.factorize(values)
+    interned = pd.Series(uniques, dtype=object).take(codes).to_numpy()
+    interned[codes < 0] = float('nan')
+    return pd.Series(interned, index=values.index, name=values.name, dtype=object)
+
+def as_label_strings(values):
+    """
+    Column rendered as strings the way astype(str) renders an object column
+    (missing values become 'nan'), with one shared str object per distinct value.
+    """
+    codes, uniques = pd.factorize(values)
+    labels = pd.Series([str(value) for value in uniques] + ['nan'], dtype=object)
+    return pd.Series(labels.take(codes).to_numpy(), index=values.index, name=values.name, dtype=object)
+
+def school_id_label(value):
+    """One BEIS School ID as text, whole numbers (123, 123.0, "123.0", "0123") as their digits only."""
+    if isinstance(value, (float, np.floating)) and np.isfinite(value) and float(value).is_integer():
+        return str(int(value))
+    text = str(value)
+    if WHOLE_NUMBER_TEXT.match(text):
+        return str(int(text.split('.')[0]))
+    return text
+
+def as_school_ids(values):
+    """
+    as_label_strings for BEIS School IDs, in school_id_label's canonical form: the same
+    school reads the same whether the column was parsed as int, float (a blank cell)
+    or text, so ID filters match in every backend.
+    """
+    codes, uniques = pd.factorize(values)
+    labels = pd.Series([school_id_label(value) for value in uniques] + ['nan'], dtype=object)
+    return pd.Series(labels.take(codes).to_numpy(), index=values.index, name=values.name, dtype=object)
+
+def as_enrollment_counts(frame):
+    """Numeric enrollment columns with gaps as 0, in ENROLLMENT_COUNT_DTYPE when every count fits, else int64."""
+    counts = frame.fillna(0)
+    if ((counts >= 0) & (counts <= np.iinfo(ENROLLMENT_COUNT_DTYPE).max)).all().all():
+        return counts.astype(ENROLLMENT_COUNT_DTYPE)
+    return counts.astype('int64')
+
+def compact_dataset_frame(df):
+    """
+    Load-time schema for cleaned datasets: dictionary-encoded geo/sector columns,
+    Arrow (or interned) strings for names and IDs, uint16 enrollment counts.
+    """
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in STRING_COLUMNS:
+        if col not in df.columns:
+            continue
+        if HAS_PYARROW and pd.api.types.is_string_dtype(df[col]) and df[col].dtype != 'string[pyarrow]':
+            df[col] = df[col].astype('string[pyarrow]')
+        elif df[col].dtype == object:
+            df[col] = intern_strings(df[col])
+        elif pd.api.types.is_integer_dtype(df[col]) and (df[col] >= 0).all():
+            df[col] = pd.to_numeric(df[col], downcast='unsigned')
+    for col in df.columns:
+        if GENDER_COLUMN_PATTERN.search(str(col)) and pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col]
+            if values.dtype == ENROLLMENT_COUNT_DTYPE:
+                continue
+            # Only whole, non-negative, complete columns can be stored as unsigned integers
+            if values.notna().all() and (values >= 0).all() and (values % 1 == 0).all():
+                if values.max() <= 65535:
+                    df[col] = values.astype(ENROLLMENT_COUNT_DTYPE)
+                else:
+                    df[col] = pd.to_numeric(values.astype('int64'), downcast='unsigned')
+    return df
+
+def derived_file_is_current(csv_path, derived_path):
+    return (
+        HAS_PYARROW
+        and os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(csv_path)
+    )
+
+def sidecar_is_current(csv_path):
+    return derived_file_is_current(csv_path, get_sidecar_path(csv_path))
+
+def write_columnar_sidecar(csv_path, chunksize=DATASET_CHUNK_ROWS):
+    """
+    Writes the typed Parquet copy of a cleaned CSV next to it, one row group per chunk of
+    chunksize rows, so memory is bounded by the chunk rather than the file. The schema is
+    fixed up front by csv_dataset_dtypes; compact_dataset_frame is applied when it is read.
+    Returns the sidecar path, or None when pyarrow is unavailable or writing fails.
+    """
+    if not HAS_PYARROW:
+        return None
+    sidecar_path = get_sidecar_path(csv_path)
+    tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
     try:
-        df = pd.read_csv(file_path)
-        return df.to_dict(orient='records')
-    except FileNotFoundError as e:
-        print(f"Error: File not found at {file_path}: {e}")
-        return []
+        dtypes = csv_dataset_dtypes(csv_path, chunksize)
+        header = pd.read_csv(csv_path, nrows=0).columns
+        arrow_types = {'int64': pa.int64(), 'float64': pa.float64(), None: pa.string()}
+        schema = pa.schema([(str(col), arrow_types[dtype]) for col, dtype in zip(header, dtypes)])
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for chunk in iter_csv_dataset(csv_path, chunksize, dtypes):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        os.replace(tmp_path, sidecar_path)
+        return sidecar_path
     except Exception as e:
-        print(f"An error occurred: {e}")
-        return []
+        print(f"Warning: Could not write columnar sidecar for {csv_path}: {e}")
+        for path in (tmp_path, sidecar_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return None
 
-def fetch_summary_data_from_csv(file_path):
+def read_dataset_file(file_path):
+    """Loads a cleaned dataset, preferring its columnar sidecar over the CSV text."""
+    df = None
+    if sidecar_is_current(file_path):
+        try:
+            df = pd.read_parquet(get_sidecar_path(file_path))
+        except Exception as e:
+            print(f"Warning: Could not read columnar sidecar for {file_path}, falling back to CSV: {e}")
+    if df is None:
+        df = read_csv_dataset(file_path)
+
+    loaded_bytes = frame_memory_bytes(df)
+    df = compact_dataset_frame(df)
+    print(f"Loaded {os.path.basename(file_path)}: {len(df)} rows, "
+          f"{loaded_bytes / 2**20:.1f} MB as parsed -> {frame_memory_bytes(df) / 2**20:.1f} MB resident")
+    return df
+
+def move_dataset_file(src_path, dst_path):
+    """Moves a cleaned CSV (and its derived files) into place and drops stale cache entries."""
+    shutil.move(src_path, dst_path)
+    for src_derived, dst_derived in zip(get_derived_paths(src_path), get_derived_paths(dst_path)):
+        if os.path.exists(src_derived):
+            shutil.move(src_derived, dst_derived)
+        elif os.path.exists(dst_derived):
+            os.remove(dst_derived)
+    invalidate_dataset(src_path)
+    invalidate_dataset(dst_path)
+
+def remove_dataset_file(file_path):
+    """Deletes a cleaned CSV together with its derived files and drops it from the cache."""
+    os.remove(file_path)
+    for derived_path in get_derived_paths(file_path):
+        if os.path.exists(derived_path):
+            os.remove(derived_path)
+    invalidate_dataset(file_path)
+
+def backfill_columnar_sidecars(data_dir=DATA_MANAGEMENT_FOLDER):
+    """One-shot conversion of the existing data_management/<year>/ CSVs."""
+    written = []
+    if not os.path.exists(data_dir):
+        return written
+    for year_dir in sorted(os.listdir(data_dir)):
+        year_path = os.path.join(data_dir, year_dir)
+        if not os.path.isdir(year_path):
+            continue
+        for filename in sorted(os.listdir(year_path)):
+            csv_path = os.path.join(year_path, filename)
+            if filename.lower().endswith('.csv') and not sidecar_is_current(csv_path):
+                sidecar_path = write_columnar_sidecar(csv_path)
+                if sidecar_path:
+                    print(f"Wrote columnar sidecar: {sidecar_path}")
+                    written.append(sidecar_path)
+    return written
+
+
+class DatasetRegistry:
+    """
+    Process-wide cache of parsed datasets.
+
+    Entries are keyed by absolute path and validated against the file's
+    mtime/size on every lookup; when those change the content hash decides
+    whether the file really has to be parsed again. The least recently used
+    school years are evicted once the resident frames exceed max_bytes.
+
+    Frames handed out are shared between callers and must be treated as
+    read-only (take a .copy() before adding or converting columns).
+    """
+
+    def __init__(self, max_bytes=DATASET_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, file_path):
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)  # Raises FileNotFoundError like pd.read_csv would
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['signature'] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['df']
+
+        sha256 = file_sha256(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['sha256'] == sha256:
+                # Touched but unchanged (e.g. copied over with the same content)
+                entry['signature'] = signature
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['df']
+
+        df = read_dataset_file(key)
+        nbytes = frame_memory_bytes(df)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = {'signature': signature, 'sha256': sha256, 'df': df, 'nbytes': nbytes}
+            self._entries.move_to_end(key)
+            self._evict()
+        return df
+
+    def version(self, file_path):
+        """Content hash of the dataset, loading it if needed."""
+        key = os.path.abspath(file_path)
+        self.get(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry['sha256'] if entry is not None else file_sha256(key)
+
+    def is_loaded(self, file_path):
+        with self._lock:
+            return os.path.abspath(file_path) in self._entries
+
+    def invalidate(self, file_path=None):
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(file_path), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'datasets': list(self._entries.keys()),
+                'residentBytes': sum(entry['nbytes'] for entry in self._entries.values()),
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the cap
+        total = sum(entry['nbytes'] for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            evicted_path, evicted = self._entries.popitem(last=False)
+            total -= evicted['nbytes']
+            print(f"Dataset cache: evicted {evicted_path} ({evicted['nbytes']} bytes)")
+
+
+dataset_registry = DatasetRegistry()
+
+def load_dataset(file_path):
+    return dataset_registry.get(file_path)
+
+def get_dataset_version(file_path):
+    return dataset_registry.version(file_path)
+
+def invalidate_dataset(file_path=None):
+    dataset_registry.invalidate(file_path)
+    for cache, lock in ((_cube_cache, _cube_lock), (_summary_cache, _summary_lock)):
+        with lock:
+            if file_path is None:
+                cache.clear()
+            else:
+                cache.pop(os.path.abspath(file_path), None)
+
+
+# --- Active dataset ---
+# The dashboards read get_dataset_path(); activating a dataset swaps that path and bumps
+# the version, and anything built from the previous dataset (e.g. the report app's frame
+# and filter options) rebuilds when it sees the new version. The state file records the
+# path and version; every worker re-reads it when it changes on disk, so an activation
+# in one worker reaches the others on their next request.
+
+_active_dataset = {'path': None, 'version': 0, 'state': None}
+_active_lock = threading.Lock()
+
+def active_state_signature():
+    """Identifies the state file as last written (each os.replace gives it a new inode), None if missing."""
     try:
-        df = pd.read_csv(file_path)
+        stat = os.stat(ACTIVE_DATASET_STATE_PATH)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
 
-        # Normalize column names
-        df.columns = df.columns.str.strip().str.replace('–', '-', regex=False).str.replace('—', '-', regex=False)
+def read_active_state():
+    """(csv_path, version) recorded in the state file, or None if it is missing or unreadable."""
+    try:
+        with open(ACTIVE_DATASET_STATE_PATH) as f:
+            state = json.load(f)
+        csv_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), state['path']))
+        return csv_path, int(state.get('version', 0))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
 
-        summary = {}
+def sync_active_dataset():
+    """Adopts the state file if it was rewritten since this process last looked. Returns the adopted path."""
+    signature = active_state_signature()
+    with _active_lock:
+        if signature == _active_dataset['state']:
+            return None
+        _active_dataset['state'] = signature
+        state = read_active_state() if signature is not None else None
+        if state is None or not os.path.exists(state[0]) or state == (_active_dataset['path'], _active_dataset['version']):
+            return None
+        previous_path = _active_dataset['path']
+        _active_dataset['path'], _active_dataset['version'] = state
+    if previous_path is not None:
+        invalidate_dataset(previous_path)
+    invalidate_dataset(state[0])
+    print(f"Switched to dataset {state[0]} (version {state[1]}) from {ACTIVE_DATASET_STATE_PATH}")
+    return state[0]
 
-        # Male/female/total enrollments
-        try:
-            male_cols = [col for col in df.columns if re.search(r'\bmale\b', col, re.IGNORECASE)]
-            female_cols = [col for col in df.columns if re.search(r'\bfemale\b', col, re.IGNORECASE)]
+def get_active_dataset():
+    """(path, version) of the activated dataset; path is None until one is activated."""
+    sync_active_dataset()
+    with _active_lock:
+        return _active_dataset['path'], _active_dataset['version']
 
-            for col in male_cols + female_cols:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+def get_active_dataset_version():
+    return get_active_dataset()[1]
 
-            df['TotalMale'] = df[male_cols].sum(axis=1)
-            df['TotalFemale'] = df[female_cols].sum(axis=1)
-            df['TotalEnrollment'] = df['TotalMale'] + df['TotalFemale']
+def activate_dataset(csv_path, persist=True):
+    """Makes csv_path the dataset the dashboards show, without a restart. Returns the new version."""
+    csv_path = os.path.abspath(csv_path)
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Dataset not found: {csv_path}")
+    with _active_lock:
+        previous_path = _active_dataset['path']
+        # Past the version any worker has recorded, so the others see a change
+        recorded = read_active_state() if persist else None
+        version = max(_active_dataset['version'], recorded[1] if recorded else 0) + 1
+        _active_dataset['path'] = csv_path
+        _active_dataset['version'] = version
+        if persist:
+            os.makedirs(os.path.dirname(ACTIVE_DATASET_STATE_PATH), exist_ok=True)
+            tmp_path = f"{ACTIVE_DATASET_STATE_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'path': os.path.relpath(csv_path, os.path.dirname(os.path.abspath(__file__))), 'version': version}, f)
+            os.replace(tmp_path, ACTIVE_DATASET_STATE_PATH)
+        # Only later writes (by any worker) replace this activation
+        _active_dataset['state'] = active_state_signature()
+    # Anything cached for the previous or the newly activated file is rebuilt from disk
+    if previous_path is not None:
+        invalidate_dataset(previous_path)
+    invalidate_dataset(csv_path)
+    print(f"Activated dataset {csv_path} (version {version})")
+    return version
 
-            summary['maleEnrollments'] = int(df['TotalMale'].sum())
-            summary['femaleEnrollments'] = int(df['TotalFemale'].sum())
-            summary['totalEnrollments'] = summary['maleEnrollments'] + summary['femaleEnrollments']
-        except Exception as e:
-            print(f"Enrollment totals error: {e}")
+def restore_active_dataset():
+    """Re-activates the dataset recorded by the last activate_dataset call, if it still exists."""
+    return sync_active_dataset()
 
-        # Region & schools
-        try:
-            region_col = next((col for col in df.columns if col.strip().lower() == 'region'), None)
-            summary['regionsWithSchools'] = df[region_col].nunique() if region_col else 0
-        except Exception as e:
-            print(f"Region processing error: {e}")
 
-        try:
-            is_school_level = 'BEIS School ID' in df.columns and 'School Name' in df.columns
-            summary['numberOfSchools'] = df['BEIS School ID'].nunique() if is_school_level else None
-            summary['numberOfYearLevels'] = 13
-        except Exception as e:
-            print(f"School info error: {e}")
+# --- Enrollment aggregate cube ---
+# Enrollment summed over Region x Division x Sector x School Type. Grade, strand and
+# gender stay on the column axis (one column per "G11 ACAD STEM Male"-style header),
+# so any view that sums enrollment columns can slice the cube instead of the schools.
+CUBE_DIMENSIONS = ['Region', 'Division', 'Sector', 'School Type']
 
-        try:
-            if is_school_level:
-                df['UniqueSchool'] = df['School Name'] + " (" + df['BEIS School ID'].astype(str) + ")"
-                top_schools = (
-                    df.groupby('UniqueSchool')['TotalEnrollment']
-                    .sum().sort_values(ascending=False).head(5)
-                    .astype(int).to_dict()
-                )
-                summary['topSchools'] = top_schools
-        except Exception as e:
-            print(f"Top schools error: {e}")
+_cube_cache = {}
+_cube_lock = threading.Lock()
 
-        try:
-            summary['numberOfDivisions'] = df['Division'].nunique()
-        except Exception as e:
-            print(f"Division error: {e}")
+def normalize_column_name(col):
+    return str(col).strip().replace('–', '-').replace('—', '-')
 
-        try:
-            summary['numberOfMunicipalities'] = df['Municipality'].nunique()
-        except Exception as e:
-            print(f"Municipality error: {e}")
+def build_enrollment_cube(df, value_columns=None):
+    dimension_names = {dim.lower(): dim for dim in CUBE_DIMENSIONS}
+    df = df.rename(columns=lambda col: dimension_names.get(normalize_column_name(col).lower(), normalize_column_name(col)))
+    if value_columns is None:
+        value_columns = [col for col in df.columns if GENDER_COLUMN_PATTERN.search(col)]
+    dimensions = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+    if not dimensions:
+        return as_whole_counts(df[value_columns].sum().to_frame().T)
+    # dropna=False keeps rows with a missing Region/Sector so grand totals stay exact
+    return as_whole_counts(
+        df[dimensions + value_columns]
+        .groupby(dimensions, dropna=False, observed=True, sort=True)[value_columns]
+        .sum()
+        .reset_index()
+    )
 
-        # Enrollment by region
-        try:
-            if region_col:
-                summary['enrollmentByRegion'] = (
-                    df.groupby(region_col)['TotalEnrollment'].sum().astype(int).to_dict()
-                )
-        except Exception as e:
-            print(f"Enrollment by region error: {e}")
+def build_enrollment_cube_from_chunks(chunks):
+    """build_enrollment_cube of the concatenated chunks, summing one chunk's cube at a time."""
+    partials = [build_enrollment_cube(chunk) for chunk in chunks]
+    if not partials:
+        return pd.DataFrame()
+    cube = pd.concat(partials, ignore_index=True)
+    dimensions = [dim for dim in CUBE_DIMENSIONS if dim in cube.columns]
+    value_columns = [col for col in cube.columns if col not in dimensions]
+    if not dimensions:
+        return as_whole_counts(cube[value_columns].sum().to_frame().T)
+    cube = as_whole_counts(
+        cube.groupby(dimensions, dropna=False, sort=True)[value_columns]
+        .sum()
+        .reset_index()
+    )
+    # Dictionary-encoded like the cube of a loaded (compacted) dataset
+    return cube.astype({dim: 'category' for dim in dimensions})
+
+def as_whole_counts(cube):
+    """
+    Cube enrollment sums as int64, like the per-row fillna(0).astype(int) gave them. Columns
+    with a blank cell sum to float, and float or uint64 sums mixed with others total to a
+    float that the KPI cards would show as "1,234.0".
+    """
+    value_columns = [col for col in cube.columns if GENDER_COLUMN_PATTERN.search(str(col)) and cube[col].dtype != 'int64']
+    if value_columns:
+        cube = cube.astype({col: 'int64' for col in value_columns})
+    return cube
+
+def slice_enrollment_cube(cube, filters):
+    """Keeps the cube cells matching every non-empty {dimension: value} filter."""
+    mask = pd.Series(True, index=cube.index)
+    for dim, value in filters.items():
+        if value is None:
+            continue
+        if dim not in cube.columns:
+            return cube.iloc[0:0]
+        mask &= cube[dim] == value
+    return cube[mask]
 
-        # Enrollment by year level
+def enrollment_by_dimension(cube, dimension, columns):
+    """Total of the given enrollment columns per value of one cube dimension."""
+    return cube.groupby(dimension, observed=True)[columns].sum().sum(axis=1)
+
+def build_dataset_cube(csv_path):
+    """
+    Builds (and persists, when pyarrow is available) the cube for an activated dataset.
+    Already-loaded datasets are summed in memory; others are read a chunk at a time.
+    """
+    if dataset_registry.is_loaded(csv_path):
+        cube = build_enrollment_cube(load_dataset(csv_path))
+    else:
+        dimension_names = {dim.lower() for dim in CUBE_DIMENSIONS}
+        columns = [
+            col for col in pd.read_csv(csv_path, nrows=0).columns
+            if normalize_column_name(col).lower() in dimension_names or GENDER_COLUMN_PATTERN.search(normalize_column_name(col))
+        ]
+        cube = build_enrollment_cube_from_chunks(iter_dataset_chunks(csv_path, columns))
+    cube_path = get_cube_path(csv_path)
+    if HAS_PYARROW:
         try:
-            grade_columns = {
-                'Kindergarten': ['K Male', 'K Female'],
-                'Grade 1': ['G1 Male', 'G1 Female'],
-                'Grade 2': ['G2 Male', 'G2 Female'],
-                'Grade 3': ['G3 Male', 'G3 Female'],
-                'Grade 4': ['G4 Male', 'G4 Female'],
-                'Grade 5': ['G5 Male', 'G5 Female'],
-                'Grade 6': ['G6 Male', 'G6 Female'],
-                'Grade 7': ['G7 Male', 'G7 Female'],
-                'Grade 8': ['G8 Male', 'G8 Female'],
-                'Grade 9': ['G9 Male', 'G9 Female'],
-                'Grade 10': ['G10 Male', 'G10 Female'],
-                'Grade 11': [
-                    'G11 ACAD - ABM Male', 'G11 ACAD - ABM Female',
-                    'G11 ACAD - HUMSS Male', 'G11 ACAD - HUMSS Female',
-                    'G11 ACAD STEM Male', 'G11 ACAD STEM Female',
-                    'G11 ACAD GAS Male', 'G11 ACAD GAS Female',
-                    'G11 ACAD PBM Male', 'G11 ACAD PBM Female',
-                    'G11 TVL Male', 'G11 TVL Female',
-                    'G11 SPORTS Male', 'G11 SPORTS Female',
-                    'G11 ARTS Male', 'G11 ARTS Female'
-                ],
-                'Grade 12': [
-                    'G12 ACAD - ABM Male', 'G12 ACAD - ABM Female',
-                    'G12 ACAD - HUMSS Male', 'G12 ACAD - HUMSS Female',
-                    'G12 ACAD STEM Male', 'G12 ACAD STEM Female',
-                    'G12 ACAD GAS Male', 'G12 ACAD GAS Female',
-                    'G12 ACAD PBM Male', 'G12 ACAD PBM Female',
-                    'G12 TVL Male', 'G12 TVL Female',
-                    'G12 SPORTS Male', 'G12 SPORTS Female',
-                    'G12 ARTS Male', 'G12 ARTS Female'
-                ]
-            }
-            enrollment_by_year_level = {}
-            for grade, columns in grade_columns.items():
-                valid_cols = [col for col in columns if col in df.columns]
-                enrollment_by_year_level[grade] = int(df[valid_cols].sum().sum()) if valid_cols else 0
-            summary['enrollmentByYearLevel'] = enrollment_by_year_level
+            cube.to_parquet(cube_path, index=False)
         except Exception as e:
-            print(f"Enrollment by year level error: {e}")
+            print(f"Warning: Could not persist enrollment cube for {csv_path}: {e}")
+    stat = os.stat(csv_path)
+    with _cube_lock:
+        _cube_cache[os.path.abspath(csv_path)] = ((stat.st_mtime_ns, stat.st_size), cube)
+    return cube
+
+def build_dataset_aggregates(csv_path):
+    """Called when a dataset is uploaded or replaced; failures only cost a lazy rebuild later."""
+    try:
+        build_dataset_cube(csv_path)
+    except Exception as e:
+        print(f"Warning: Could not build enrollment cube for {csv_path}: {e}")
+    try:
+        build_row_index(csv_path)
+    except Exception as e:
+        print(f"Warning: Could not build row index for {csv_path}: {e}")
+
+# --- Row-offset index ---
+# Byte offsets of every ROW_INDEX_STRIDE-th record of a cleaned CSV, so a page of rows
+# can be read by seeking instead of parsing everything before it.
 
-        # Average enrollment per region
+def build_row_index(csv_path, stride=ROW_INDEX_STRIDE):
+    """Scans the CSV once (quote-aware, so quoted line breaks don't split records) and saves the index."""
+    offsets = []
+    rows = 0
+    with open(csv_path, 'rb') as f:
+        f.readline()  # Header
+        position = f.tell()
+        quotes = 0
+        record_start = position
+        for line in f:
+            quotes += line.count(b'"')
+            position += len(line)
+            if quotes % 2:
+                continue  # Record continues on the next line
+            if line.strip():
+                if rows % stride == 0:
+                    offsets.append(record_start)
+                rows += 1
+            record_start = position
+            quotes = 0
+    index = {'rows': rows, 'stride': stride, 'offsets': np.asarray(offsets, dtype=np.int64)}
+    np.savez(get_row_index_path(csv_path), rows=rows, stride=stride, offsets=index['offsets'])
+    return index
+
+def load_row_index(csv_path):
+    index_path = get_row_index_path(csv_path)
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(csv_path):
         try:
-            if region_col and 'BEIS School ID' in df.columns:
-                # Clean up and ensure numeric
-                df['TotalEnrollment'] = pd.to_numeric(df['TotalEnrollment'], errors='coerce')
-                
-                # Group by region and school to get total enrollment per school
-                school_enrollment = df.groupby(['BEIS School ID', region_col])['TotalEnrollment'].sum().reset_index()
-
-                # Group by region and compute average enrollment across schools
-                avg_enrollment = (
-                    school_enrollment.groupby(region_col)['TotalEnrollment']
-                    .mean()
-                    .round(2)
-                    .astype(int)
-                    .to_dict()
-                )
-
-                summary['averageEnrollmentPerRegion'] = avg_enrollment
+            with np.load(index_path) as data:
+                return {'rows': int(data['rows']), 'stride': int(data['stride']), 'offsets': data['offsets']}
         except Exception as e:
-            print(f"Average enrollment error: {e}")
+            print(f"Warning: Could not read row index for {csv_path}, rebuilding: {e}")
+    return build_row_index(csv_path)
+
+def load_enrollment_cube(csv_path):
+    key = os.path.abspath(csv_path)
+    stat = os.stat(key)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cube_lock:
+        cached = _cube_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
 
-        # Gender ratio
+    cube_path = get_cube_path(key)
+    if derived_file_is_current(key, cube_path):
         try:
-            if region_col:
-                grouped = df.groupby(region_col)[['TotalMale', 'TotalFemale']].sum()
-                grouped['TotalEnrollment'] = grouped['TotalMale'] + grouped['TotalFemale']
-                grouped['MalePercentage'] = (grouped['TotalMale'] / grouped['TotalEnrollment']) * 100
-                summary['genderRatioByRegion'] = grouped['MalePercentage'].round(2).to_dict()
+            cube = as_whole_counts(pd.read_parquet(cube_path))  # Cubes written before the int64 cast hold floats
+            with _cube_lock:
+                _cube_cache[key] = (signature, cube)
+            return cube
         except Exception as e:
-            print(f"Gender ratio error: {e}")
+            print(f"Warning: Could not read enrollment cube for {csv_path}, rebuilding: {e}")
+    return build_dataset_cube(key)
 
-        # SHS by strand
-        try:
-            shs_strands = {
-                'ABM': ['G11 ACAD - ABM Male', 'G11 ACAD - ABM Female', 'G12 ACAD - ABM Male', 'G12 ACAD - ABM Female'],
-                'HUMSS': ['G11 ACAD - HUMSS Male', 'G11 ACAD - HUMSS Female', 'G12 ACAD - HUMSS Male', 'G12 ACAD - HUMSS Female'],
-                'STEM': ['G11 ACAD STEM Male', 'G11 ACAD STEM Female', 'G12 ACAD STEM Male', 'G12 ACAD STEM Female'],
-                'GAS': ['G11 ACAD GAS Male', 'G11 ACAD GAS Female', 'G12 ACAD GAS Male', 'G12 ACAD GAS Female'],
-                'PBM': ['G11 ACAD PBM Male', 'G11 ACAD PBM Female', 'G12 ACAD PBM Male', 'G12 ACAD PBM Female'],
-                'TVL': ['G11 TVL Male', 'G11 TVL Female', 'G12 TVL Male', 'G12 TVL Female'],
-                'SPORTS': ['G11 SPORTS Male', 'G11 SPORTS Female', 'G12 SPORTS Male', 'G12 SPORTS Female'],
-                'ARTS': ['G11 ARTS Male', 'G11 ARTS Female', 'G12 ARTS Male', 'G12 ARTS Female']
+def fetch_enrollment_frame_from_csv(file_path):
+    """Like fetch_enrollment_records_from_csv, but returns a private DataFrame copy."""
+    try:
+        return load_dataset(file_path).copy()
+    except FileNotFoundError as e:
+        print(f"Error: File not found at {file_path}: {e}")
+        return pd.DataFrame()
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return pd.DataFrame()
+
+def fetch_enrollment_records_from_csv(file_path):
+    try:
+        df = load_dataset(file_path)
+        return df.to_dict(orient='records')
+    except FileNotFoundError as e:
+        print(f"Error: File not found at {file_path}: {e}")
+        return []
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return []
+
+# --- Enrollment summary engine (/api/enrollment_data) ---
+YEAR_LEVEL_COLUMNS = {
+    'Kindergarten': ['K Male', 'K Female'],
+    'Grade 1': ['G1 Male', 'G1 Female'],
+    'Grade 2': ['G2 Male', 'G2 Female'],
+    'Grade 3': ['G3 Male', 'G3 Female'],
+    'Grade 4': ['G4 Male', 'G4 Female'],
+    'Grade 5': ['G5 Male', 'G5 Female'],
+    'Grade 6': ['G6 Male', 'G6 Female'],
+    'Grade 7': ['G7 Male', 'G7 Female'],
+    'Grade 8': ['G8 Male', 'G8 Female'],
+    'Grade 9': ['G9 Male', 'G9 Female'],
+    'Grade 10': ['G10 Male', 'G10 Female'],
+    'Grade 11': [
+        'G11 ACAD - ABM Male', 'G11 ACAD - ABM Female',
+        'G11 ACAD - HUMSS Male', 'G11 ACAD - HUMSS Female',
+        'G11 ACAD STEM Male', 'G11 ACAD STEM Female',
+        'G11 ACAD GAS Male', 'G11 ACAD GAS Female',
+        'G11 ACAD PBM Male', 'G11 ACAD PBM Female',
+        'G11 TVL Male', 'G11 TVL Female',
+        'G11 SPORTS Male', 'G11 SPORTS Female',
+        'G11 ARTS Male', 'G11 ARTS Female'
+    ],
+    'Grade 12': [
+        'G12 ACAD - ABM Male', 'G12 ACAD - ABM Female',
+        'G12 ACAD - HUMSS Male', 'G12 ACAD - HUMSS Female',
+        'G12 ACAD STEM Male', 'G12 ACAD STEM Female',
+        'G12 ACAD GAS Male', 'G12 ACAD GAS Female',
+        'G12 ACAD PBM Male', 'G12 ACAD PBM Female',
+        'G12 TVL Male', 'G12 TVL Female',
+        'G12 SPORTS Male', 'G12 SPORTS Female',
+        'G12 ARTS Male', 'G12 ARTS Female'
+    ]
+}
+SHS_STRAND_COLUMNS = {
+    'ABM': ['G11 ACAD - ABM Male', 'G11 ACAD - ABM Female', 'G12 ACAD - ABM Male', 'G12 ACAD - ABM Female'],
+    'HUMSS': ['G11 ACAD - HUMSS Male', 'G11 ACAD - HUMSS Female', 'G12 ACAD - HUMSS Male', 'G12 ACAD - HUMSS Female'],
+    'STEM': ['G11 ACAD STEM Male', 'G11 ACAD STEM Female', 'G12 ACAD STEM Male', 'G12 ACAD STEM Female'],
+    'GAS': ['G11 ACAD GAS Male', 'G11 ACAD GAS Female', 'G12 ACAD GAS Male', 'G12 ACAD GAS Female'],
+    'PBM': ['G11 ACAD PBM Male', 'G11 ACAD PBM Female', 'G12 ACAD PBM Male', 'G12 ACAD PBM Female'],
+    'TVL': ['G11 TVL Male', 'G11 TVL Female', 'G12 TVL Male', 'G12 TVL Female'],
+    'SPORTS': ['G11 SPORTS Male', 'G11 SPORTS Female', 'G12 SPORTS Male', 'G12 SPORTS Female'],
+    'ARTS': ['G11 ARTS Male', 'G11 ARTS Female', 'G12 ARTS Male', 'G12 ARTS Female']
+}
+# Identity/geo columns the summary reduction groups by (Region is located separately)
+SUMMARY_GROUP_COLUMNS = ['Division', 'Municipality', 'Sector', 'BEIS School ID', 'School Name']
+
+_summary_cache = {}
+_summary_lock = threading.Lock()
+
+def classify_enrollment_columns(columns):
+    male_cols = [col for col in columns if re.search(r'\bmale\b', col, re.IGNORECASE)]
+    female_cols = [col for col in columns if re.search(r'\bfemale\b', col, re.IGNORECASE)]
+    return male_cols, female_cols
+
+def build_enrollment_summary(df):
+    """
+    Computes every block of the enrollment summary payload from one grouped
+    reduction of the enrollment matrix (one row per school for school-level
+    files, one per region/division/sector otherwise).
+    """
+    if any(normalize_column_name(col) != col for col in df.columns):
+        df = df.rename(columns=normalize_column_name)
+
+    male_cols, female_cols = classify_enrollment_columns(df.columns)
+    region_col = next((col for col in df.columns if col.strip().lower() == 'region'), None)
+    is_school_level = 'BEIS School ID' in df.columns and 'School Name' in df.columns
+
+    group_cols = ([region_col] if region_col else []) + [col for col in SUMMARY_GROUP_COLUMNS if col in df.columns]
+    value_cols = male_cols + female_cols
+    if group_cols:
+        # dropna=False keeps rows with missing keys so the grand totals stay exact
+        reduced = df.groupby(group_cols, dropna=False, observed=True, sort=False)[value_cols].sum().reset_index()
+    else:
+        reduced = df[value_cols].sum().to_frame().T
+    reduced['TotalMale'] = reduced[male_cols].sum(axis=1)
+    reduced['TotalFemale'] = reduced[female_cols].sum(axis=1)
+    reduced['TotalEnrollment'] = reduced['TotalMale'] + reduced['TotalFemale']
+
+    summary = {}
+
+    # Male/female/total enrollments
+    try:
+        summary['maleEnrollments'] = int(reduced['TotalMale'].sum())
+        summary['femaleEnrollments'] = int(reduced['TotalFemale'].sum())
+        summary['totalEnrollments'] = summary['maleEnrollments'] + summary['femaleEnrollments']
+    except Exception as e:
+        print(f"Enrollment totals error: {e}")
+
+    # Region & schools
+    summary['regionsWithSchools'] = reduced[region_col].nunique() if region_col else 0
+    summary['numberOfSchools'] = reduced['BEIS School ID'].nunique() if is_school_level else None
+    summary['numberOfYearLevels'] = 13
+
+    try:
+        if is_school_level:
+            unique_school = reduced['School Name'] + " (" + reduced['BEIS School ID'].astype(str) + ")"
+            summary['topSchools'] = (
+                reduced['TotalEnrollment'].groupby(unique_school)
+                .sum().sort_values(ascending=False).head(5)
+                .astype(int).to_dict()
+            )
+    except Exception as e:
+        print(f"Top schools error: {e}")
+
+    if 'Division' in reduced.columns:
+        summary['numberOfDivisions'] = reduced['Division'].nunique()
+    if 'Municipality' in reduced.columns:
+        summary['numberOfMunicipalities'] = reduced['Municipality'].nunique()
+
+    region_totals = None
+    if region_col:
+        region_totals = reduced.groupby(region_col, observed=True)[['TotalMale', 'TotalFemale', 'TotalEnrollment'] + value_cols].sum()
+
+    # Enrollment by region
+    try:
+        if region_col:
+            summary['enrollmentByRegion'] = region_totals['TotalEnrollment'].astype(int).to_dict()
+    except Exception as e:
+        print(f"Enrollment by region error: {e}")
+
+    # Enrollment by year level
+    column_totals = reduced[value_cols].sum()
+    summary['enrollmentByYearLevel'] = {
+        grade: int(column_totals[[col for col in columns if col in column_totals.index]].sum())
+        for grade, columns in YEAR_LEVEL_COLUMNS.items()
+    }
+
+    # Average enrollment per region
+    try:
+        if region_col and is_school_level:
+            # Total enrollment per school, then averaged across the schools of each region
+            school_enrollment = reduced.groupby(['BEIS School ID', region_col], observed=True)['TotalEnrollment'].sum()
+            summary['averageEnrollmentPerRegion'] = (
+                school_enrollment.groupby(level=region_col, observed=True)
+                .mean()
+                .round(2)
+                .astype(int)
+                .to_dict()
+            )
+    except Exception as e:
+        print(f"Average enrollment error: {e}")
+
+    # Gender ratio
+    try:
+        if region_col:
+            male_percentage = (region_totals['TotalMale'] / region_totals['TotalEnrollment']) * 100
+            summary['genderRatioByRegion'] = male_percentage.round(2).to_dict()
+    except Exception as e:
+        print(f"Gender ratio error: {e}")
+
+    # SHS by strand
+    summary['shsEnrollmentByStrand'] = {
+        strand: int(column_totals[[col for col in columns if col in column_totals.index]].sum())
+        for strand, columns in SHS_STRAND_COLUMNS.items()
+    }
+
+    # Enrollment by sector
+    try:
+        if 'Sector' in reduced.columns:
+            sector_data = reduced.groupby('Sector', observed=True)['TotalEnrollment'].sum()
+            summary['enrollmentBySector'] = {
+                sector: int(value) for sector, value in sector_data.items()
             }
-            strand_totals = {}
-            for strand, cols in shs_strands.items():
-                valid_cols = [col for col in cols if col in df.columns]
-                strand_totals[strand] = int(df[valid_cols].sum().sum()) if valid_cols else 0
-            summary['shsEnrollmentByStrand'] = strand_totals
-        except Exception as e:
-            print(f"SHS strand error: {e}")
+    except Exception as e:
+        print(f"Enrollment by sector error: {e}")
 
-        # Enrollment by sector
-        try:
-            if 'Sector' in df.columns:
-                sector_data = df.groupby('Sector')['TotalEnrollment'].sum()
-                summary['enrollmentBySector'] = {
-                    sector: int(value) for sector, value in sector_data.items()
-                }
-        except Exception as e:
-            print(f"Enrollment by sector error: {e}")
+    # SHS strand x region matrix (heatmap)
+    strand_region = {}
+    try:
+        if region_col:
+            result = {}
+            for strand, columns in SHS_STRAND_COLUMNS.items():
+                valid_cols = [col for col in columns if col in region_totals.columns]
+                if valid_cols:
+                    result[strand] = region_totals[valid_cols].sum(axis=1)
+            heatmap_df = pd.DataFrame(result).fillna(0).astype(int)
+            heatmap_df = heatmap_df.reset_index().rename(columns={region_col: 'Region'})
+            strand_region = heatmap_df.to_dict(orient='list')
+    except Exception as e:
+        print(f"Error generating strand-region heatmap: {e}")
+    summary['strandRegionMatrix'] = strand_region
 
-        return summary
+    return summary
 
+def summarize_enrollment(file_path):
+    """Full /api/enrollment_data payload for a dataset, memoized per file version."""
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _summary_lock:
+        cached = _summary_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return dict(cached[1])
+
+    summary = build_enrollment_summary(load_dataset(key))
+    with _summary_lock:
+        _summary_cache[key] = (signature, summary)
+    return dict(summary)
+
+def fetch_summary_data_from_csv(file_path):
+    try:
+        summary = summarize_enrollment(file_path)
+        summary.pop('strandRegionMatrix', None)
+        return summary
     except Exception as e:
         print(f"Error processing summary data: {e}")
         return {}
-    
+
 def get_strand_distribution_by_region(file_path):
     try:
-        df = pd.read_csv(file_path)
-        df.columns = df.columns.str.strip()
-
-        shs_strands = {
-            'ABM': ['G11 ACAD - ABM Male', 'G11 ACAD - ABM Female', 'G12 ACAD - ABM Male', 'G12 ACAD - ABM Female'],
-            'HUMSS': ['G11 ACAD - HUMSS Male', 'G11 ACAD - HUMSS Female', 'G12 ACAD - HUMSS Male', 'G12 ACAD - HUMSS Female'],
-            'STEM': ['G11 ACAD STEM Male', 'G11 ACAD STEM Female', 'G12 ACAD STEM Male', 'G12 ACAD STEM Female'],
-            'GAS': ['G11 ACAD GAS Male', 'G11 ACAD GAS Female', 'G12 ACAD GAS Male', 'G12 ACAD GAS Female'],
-            'PBM': ['G11 ACAD PBM Male', 'G11 ACAD PBM Female', 'G12 ACAD PBM Male', 'G12 ACAD PBM Female'],
-            'TVL': ['G11 TVL Male', 'G11 TVL Female', 'G12 TVL Male', 'G12 TVL Female'],
-            'SPORTS': ['G11 SPORTS Male', 'G11 SPORTS Female', 'G12 SPORTS Male', 'G12 SPORTS Female'],
-            'ARTS': ['G11 ARTS Male', 'G11 ARTS Female', 'G12 ARTS Male', 'G12 ARTS Female']
-        }
-
-        region_col = next((col for col in df.columns if col.lower() == 'region'), None)
-        if not region_col:
-            return {}
-
-        result = {}
-        for strand, cols in shs_strands.items():
-            valid_cols = [col for col in cols if col in df.columns]
-            if not valid_cols:
-                continue
-            grouped = df.groupby(region_col)[valid_cols].sum().sum(axis=1)
-            result[strand] = grouped
-
-        heatmap_df = pd.DataFrame(result).fillna(0).astype(int)
-        heatmap_df = heatmap_df.reset_index().rename(columns={region_col: 'Region'})
-        return heatmap_df.to_dict(orient='list')
-
+        return summarize_enrollment(file_path)['strandRegionMatrix']
     except Exception as e:
         print(f"Error generating strand-region heatmap: {e}")
         return {}
 
+if __name__ == "__main__":
+    if not HAS_PYARROW:
+        print("pyarrow is not installed; columnar sidecars cannot be written.")
+    else:
+        backfill_columnar_sidecars()
@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+
+from data_config import DATA_MANAGEMENT_FOLDER, dataset_registry
+from dataset_manifest import load_dataset_manifest
+
+# How often (at most) the data_management directory mtimes are checked for changes
+CATALOG_POLL_SECONDS = float(os.environ.get('TANAW_CATALOG_POLL_SECONDS', '2'))
+
+
+class DatasetCatalog:
+    """
+    Cached school year -> dataset mapping for data_management/<year>/*.csv.
+
+    The mapping is rebuilt (through the dataset manifest, so unchanged files are
+    not re-read) only after notify_changed() or when the mtime of data_management/
+    or one of its year folders changes. Those mtimes are checked at most every
+    poll_seconds, so listing years normally costs no filesystem calls at all.
+    """
+
+    def __init__(self, data_dir=DATA_MANAGEMENT_FOLDER, poll_seconds=CATALOG_POLL_SECONDS):
+        self.data_dir = data_dir
+        self.poll_seconds = poll_seconds
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._years = {}
+        self._signature = None
+        self._checked_at = 0.0
+        self._stale = True
+
+    def notify_changed(self):
+        """Called after uploads, replacements and deletions so the next lookup rebuilds the catalog."""
+        with self._lock:
+            self._stale = True
+
+    def _directory_signature(self):
+        if not os.path.isdir(self.data_dir):
+            return ()
+        signature = [('', os.stat(self.data_dir).st_mtime_ns)]
+        for entry in os.scandir(self.data_dir):
+            # Basic check that the directory name looks like a school year
+            if entry.is_dir() and '-' in entry.name:
+                signature.append((entry.name, entry.stat().st_mtime_ns))
+        return tuple(sorted(signature))
+
+    def _refresh(self):
+        signature = self._directory_signature()
+        years = [name for name, _ in signature if name]
+        manifest = load_dataset_manifest(years)
+
+        catalog = {}
+        for key, entry in manifest['datasets'].items():
+            year = entry['year']
+            # First CSV (by name) of each year folder is that year's dataset
+            if year in years and year not in catalog:
+                catalog[year] = dict(entry, filename=key, path=os.path.join(self.data_dir, year, key.split('/', 1)[1]))
+
+        self._years = {year: catalog[year] for year in sorted(catalog, reverse=True)}
+        self._signature = signature
+        self._stale = False
+        self.refreshes += 1
+
+    def _current(self):
+        with self._lock:
+            now = time.monotonic()
+            if not self._stale and now - self._checked_at < self.poll_seconds:
+                return self._years
+            self._checked_at = now
+            if self._stale or self._directory_signature() != self._signature:
+                self._refresh()
+            return self._years
+
+    def datasets(self):
+        """Year -> cleaned CSV path, latest school year first."""
+        return {year: entry['path'] for year, entry in self._current().items()}
+
+    def years(self):
+        return list(self._current().keys())
+
+    def describe(self):
+        """Per-year metadata: file, size, rows, schools, regions and whether it is loaded in memory."""
+        return [
+            {
+                'year': year,
+                'filename': entry['filename'],
+                'size': entry['size'],
+                'rows': entry['rows'],
+                'schools': entry['schools'],
+                'regions': entry['regions'],
+                'loaded': dataset_registry.is_loaded(entry['path']),
+            }
+            for year, entry in self._current().items()
+        ]
+
+
+dataset_catalog = DatasetCatalog()
+
+def find_available_datasets():
+    """
+    Returns the year -> dataset path mapping (latest year first) and the sorted list
+    of school years, from the cached catalog.
+    """
+    datasets = dataset_catalog.datasets()
+    return datasets, list(datasets.keys())
+
+def notify_datasets_changed():
+    dataset_catalog.notify_changed()
@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import threading
+
+import pandas as pd
+
+from data_config import DATA_MANAGEMENT_FOLDER, file_sha256, get_sidecar_path, sidecar_is_current
+
+# Per-file facts about data_management/<year>/*.csv, refreshed only when a file's size/mtime changes
+MANIFEST_PATH = os.path.join(DATA_MANAGEMENT_FOLDER, 'manifest.json')
+MANIFEST_VERSION = 2
+# Columns read (not the whole file) to count schools and regions
+COUNT_COLUMNS = ['Region', 'BEIS School ID']
+
+_manifest_lock = threading.Lock()
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+def dataset_counts(csv_path, columns):
+    """
+    Rows, distinct schools and distinct regions of a cleaned CSV, reading only the
+    columns needed -- from the Parquet sidecar when it is current, else from the CSV.
+    schools/regions are None when the file has no such column (e.g. regional files).
+    """
+    usecols = [col for col in COUNT_COLUMNS if col in columns] or [columns[0]]
+    df = None
+    if sidecar_is_current(csv_path):
+        try:
+            df = pd.read_parquet(get_sidecar_path(csv_path), columns=usecols)
+        except Exception:
+            df = None
+    if df is None:
+        df = pd.read_csv(csv_path, usecols=usecols, dtype=str)
+    return {
+        'rows': len(df),
+        'schools': int(df['BEIS School ID'].nunique()) if 'BEIS School ID' in df.columns else None,
+        'regions': int(df['Region'].nunique()) if 'Region' in df.columns else None,
+    }
+
+def column_signature(columns):
+    return hashlib.sha256('\x1f'.join(map(str, columns)).encode('utf-8')).hexdigest()[:16]
+
+def describe_dataset_file(csv_path):
+    size, mtime_ns = _file_signature(csv_path)
+    entry = {'size': size, 'mtime_ns': mtime_ns, 'sha256': file_sha256(csv_path)}
+    try:
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        entry.update(columns=len(columns), column_signature=column_signature(columns), **dataset_counts(csv_path, columns))
+    except Exception as e:
+        # Still listed (and hashed) so it can be replaced or deleted from the data management page
+        print(f"Warning: Could not read {csv_path} for the dataset manifest: {e}")
+        entry.update(columns=0, column_signature=None, rows=None, schools=None, regions=None)
+    return entry
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'datasets': {}, 'active': None}
+
+def _write_manifest(manifest):
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def _refresh_entry(entry, file_path):
+    """Returns entry if it still describes file_path, else a freshly computed one (None if the file is gone)."""
+    try:
+        signature = _file_signature(file_path)
+    except FileNotFoundError:
+        return None
+    if entry is not None and (entry.get('size'), entry.get('mtime_ns')) == signature:
+        return entry
+    return describe_dataset_file(file_path)
+
+def dataset_key(csv_path):
+    return os.path.relpath(os.path.abspath(csv_path), DATA_MANAGEMENT_FOLDER).replace(os.sep, '/')
+
+def record_dataset(csv_path):
+    """Adds or refreshes one data_management CSV; called after uploads and replacements land."""
+    with _manifest_lock:
+        manifest = _read_manifest()
+        key = dataset_key(csv_path)
+        entry = describe_dataset_file(csv_path)
+        entry['year'] = key.split('/')[0]
+        manifest['datasets'][key] = entry
+        _write_manifest(manifest)
+    return entry
+
+def forget_dataset(csv_path):
+    with _manifest_lock:
+        manifest = _read_manifest()
+        if manifest['datasets'].pop(dataset_key(csv_path), None) is not None:
+            _write_manifest(manifest)
+
+def load_dataset_manifest(school_years, active_dataset_path=None):
+    """
+    Returns the manifest for data_management/<year>/*.csv over school_years, reconciled
+    with the folders: only files that are new or whose size/mtime changed get hashed,
+    removed files are dropped. The entry for active_dataset_path (if given) is kept
+    under 'active' so callers can compare hashes instead of file contents.
+    """
+    with _manifest_lock:
+        manifest = _read_manifest()
+        changed = False
+        datasets = {}
+        for year in school_years:
+            year_folder = os.path.join(DATA_MANAGEMENT_FOLDER, year)
+            if not os.path.isdir(year_folder):
+                continue
+            for file in sorted(os.listdir(year_folder)):
+                if not file.endswith('.csv'):
+                    continue
+                key = f"{year}/{file}"
+                previous = manifest['datasets'].get(key)
+                entry = _refresh_entry(previous, os.path.join(year_folder, file))
+                if entry is None:
+                    continue
+                entry['year'] = year
+                changed = changed or entry is not previous
+                datasets[key] = entry
+
+        # Entries for years outside school_years are left alone
+        for key, entry in manifest['datasets'].items():
+            if key not in datasets and entry.get('year') not in school_years:
+                datasets[key] = entry
+        changed = changed or datasets.keys() != manifest['datasets'].keys()
+        manifest['datasets'] = datasets
+
+        if active_dataset_path is not None:
+            previous = manifest.get('active')
+            if previous is not None and previous.get('path') != os.path.abspath(active_dataset_path):
+                previous = None
+            active = _refresh_entry(previous, active_dataset_path)
+            if active is not None:
+                active['path'] = os.path.abspath(active_dataset_path)
+            changed = changed or active is not previous
+            manifest['active'] = active
+
+        if changed:
+            _write_manifest(manifest)
+        return manifest
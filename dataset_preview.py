@@ -0,0 +1,89 @@
+import os
+import csv
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from data_config import file_sha256, load_row_index
+
+PREVIEW_PAGE_ROWS = 20
+PREVIEW_MAX_PAGE_ROWS = 200
+# Rendered preview pages kept (all files combined), keyed by file content hash
+PREVIEW_CACHE_SIZE = 128
+
+_preview_cache = OrderedDict()
+_file_hashes = {}
+_preview_lock = threading.Lock()
+
+def _content_hash(file_path):
+    """SHA-256 of the file, recomputed only when its mtime/size change."""
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _preview_lock:
+        cached = _file_hashes.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    sha256 = file_sha256(key)
+    with _preview_lock:
+        _file_hashes[key] = (signature, sha256)
+    return sha256
+
+def read_dataset_rows(file_path, start=0, nrows=PREVIEW_PAGE_ROWS, columns=None):
+    """
+    Reads rows [start, start + nrows) of a cleaned CSV, optionally only `columns`,
+    by seeking to the nearest row-index offset. Returns (frame, total_rows); the
+    frame's index holds the row numbers.
+    """
+    index = load_row_index(file_path)
+    total_rows = index['rows']
+    start = max(0, min(start, total_rows))
+    nrows = max(0, min(nrows, total_rows - start))
+    with open(file_path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), [])
+    usecols = [col for col in columns if col in header] if columns else None
+
+    if nrows == 0:
+        return pd.DataFrame(columns=usecols or header), total_rows
+
+    block, skip = divmod(start, index['stride'])
+    with open(file_path, 'rb') as f:
+        f.seek(int(index['offsets'][block]))
+        df = pd.read_csv(
+            f, header=None, names=header, usecols=usecols,
+            skiprows=skip, nrows=nrows,
+        )
+    if usecols:
+        df = df[usecols]
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df, total_rows
+
+def render_preview(file_path, page=0, page_size=PREVIEW_PAGE_ROWS, columns=None):
+    """
+    One page of the data management preview as {'html', 'page', 'page_size', 'total_rows', 'columns'}.
+    Pages are cached per (file hash, page, page size, columns), so paging back and forth is free.
+    """
+    page = max(0, int(page))
+    page_size = max(1, min(int(page_size), PREVIEW_MAX_PAGE_ROWS))
+    columns = tuple(columns) if columns else None
+    key = (_content_hash(file_path), page, page_size, columns)
+    with _preview_lock:
+        cached = _preview_cache.get(key)
+        if cached is not None:
+            _preview_cache.move_to_end(key)
+            return cached
+
+    df, total_rows = read_dataset_rows(file_path, page * page_size, page_size, columns)
+    fragment = {
+        'html': df.to_html(classes="table preview-table"),
+        'page': page,
+        'page_size': page_size,
+        'total_rows': total_rows,
+        'columns': list(df.columns),
+    }
+    with _preview_lock:
+        _preview_cache[key] = fragment
+        while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+            _preview_cache.popitem(last=False)
+    return fragment
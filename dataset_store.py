@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from data_config import GENDER_COLUMN_PATTERN, get_store_path, school_id_label
+
+# 'sqlite' answers filtered dashboard queries from an indexed SQLite copy of each cleaned
+# dataset instead of scanning the in-memory frame; 'pandas' (the default) keeps the frames.
+STORAGE_BACKEND = os.environ.get('TANAW_STORAGE_BACKEND', 'pandas').lower()
+STORE_TABLE = 'schools'
+# School Name is what the enrollment dashboard (works.py) looks schools up by
+INDEXED_COLUMNS = ['Region', 'Division', 'Sector', 'Municipality', 'BEIS School ID', 'School Name']
+# Text columns stored as TEXT even when every value looks numeric (matches the label strings the dashboards use;
+# BEIS School IDs in school_id_label's canonical form)
+TEXT_COLUMNS = ['BEIS School ID', 'School Name']
+STORE_CHUNK_ROWS = 20000
+
+_build_lock = threading.Lock()
+
+def sqlite_store_enabled():
+    return STORAGE_BACKEND == 'sqlite'
+
+def quote_identifier(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def store_is_current(csv_path):
+    store_path = get_store_path(csv_path)
+    return os.path.exists(store_path) and os.path.getmtime(store_path) >= os.path.getmtime(csv_path)
+
+def build_sqlite_store(csv_path):
+    """
+    Loads a cleaned CSV into <stem>.sqlite (one table, indexed on INDEXED_COLUMNS),
+    streaming it in chunks so the whole file is never resident. Returns the store path.
+    """
+    store_path = get_store_path(csv_path)
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    text_dtypes = {col: str for col in TEXT_COLUMNS if col in header}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for chunk in pd.read_csv(csv_path, dtype=text_dtypes, chunksize=STORE_CHUNK_ROWS):
+            for col in chunk.columns:
+                if GENDER_COLUMN_PATTERN.search(str(col)):
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+            if 'BEIS School ID' in chunk.columns:
+                chunk['BEIS School ID'] = chunk['BEIS School ID'].map(school_id_label, na_action='ignore')
+            chunk.to_sql(STORE_TABLE, conn, if_exists='append', index=False)
+        for col in INDEXED_COLUMNS:
+            if col in header:
+                index_name = quote_identifier(f"ix_{col.lower().replace(' ', '_')}")
+                conn.execute(f"CREATE INDEX {index_name} ON {STORE_TABLE} ({quote_identifier(col)})")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, store_path)
+    print(f"Built SQLite store: {store_path}")
+    return store_path
+
+def open_store(csv_path):
+    """Read-only connection to the dataset's store, (re)building it first when missing or stale."""
+    if not store_is_current(csv_path):
+        with _build_lock:
+            if not store_is_current(csv_path):
+                build_sqlite_store(csv_path)
+    return sqlite3.connect(f"file:{get_store_path(csv_path)}?mode=ro", uri=True)
+
+def _where_clause(filters):
+    """filters: {column: value}; None values are ignored. Returns (sql, params)."""
+    items = [(col, value) for col, value in (filters or {}).items() if value is not None]
+    if not items:
+        return '', []
+    return ' WHERE ' + ' AND '.join(f"{quote_identifier(col)} = ?" for col, _ in items), [value for _, value in items]
+
+def select_rows(csv_path, filters=None, columns=None):
+    """Rows matching the equality filters (index lookups), in file order, as a DataFrame."""
+    select = ', '.join(quote_identifier(col) for col in columns) if columns else '*'
+    where, params = _where_clause(filters)
+    conn = open_store(csv_path)
+    try:
+        cursor = conn.execute(f"SELECT {select} FROM {STORE_TABLE}{where} ORDER BY rowid", params)
+        names = [description[0] for description in cursor.description]
+        # from_records is much cheaper than read_sql_query for the few rows a filter returns
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=names, coerce_float=True)
+    finally:
+        conn.close()
+
+def distinct_values(csv_path, column, filters=None):
+    """Sorted distinct non-null values of column among the matching rows."""
+    where, params = _where_clause(filters)
+    col = quote_identifier(column)
+    where = where + (' AND ' if where else ' WHERE ') + f"{col} IS NOT NULL"
+    conn = open_store(csv_path)
+    try:
+        return [row[0] for row in conn.execute(f"SELECT DISTINCT {col} FROM {STORE_TABLE}{where} ORDER BY {col}", params)]
+    finally:
+        conn.close()
+
+def column_names(csv_path):
+    conn = open_store(csv_path)
+    try:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({STORE_TABLE})")]
+    finally:
+        conn.close()
+
+def count_distinct_and_average_total(csv_path, distinct_column, sum_columns, filters=None):
+    """
+    COUNT(DISTINCT distinct_column) and the average per-row total of sum_columns
+    (missing counts as 0) over the matching rows, as one aggregate query.
+    """
+    where, params = _where_clause(filters)
+    row_total = ' + '.join(f"IFNULL({quote_identifier(col)}, 0)" for col in sum_columns) or '0'
+    conn = open_store(csv_path)
+    try:
+        return conn.execute(
+            f"SELECT COUNT(DISTINCT {quote_identifier(distinct_column)}), AVG({row_total}) FROM {STORE_TABLE}{where}",
+            params,
+        ).fetchone()
+    finally:
+        conn.close()
@@ -1,59 +1,91 @@
 # ~~~ Import statements remain the same ~~~
-from dash import Dash, html, dcc, Input, Output, State, dash_table
+from dash import Dash, html, dcc, Input, Output, State, dash_table, ClientsideFunction
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.utils
 import pandas as pd
-from data_config import get_dataset_path, fetch_enrollment_records_from_csv, fetch_summary_data_from_csv
+from callback_cache import report_callback_cache
+from data_config import get_dataset_path, get_active_dataset_version, get_dataset_version, fetch_enrollment_frame_from_csv, fetch_summary_data_from_csv, load_enrollment_cube, slice_enrollment_cube, as_label_strings, as_school_ids, as_enrollment_counts, CUBE_DIMENSIONS
 import io
+import os
+import json
 import base64
 import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 import numpy as np
 
 GENDER_COLORS = {'Male': '#1f77b4', 'Female': '#e377c2', 'Unknown': '#888'}
 QUALITATIVE_COLOR_SEQUENCE = px.colors.qualitative.Pastel
 PLOT_TEMPLATE = "plotly_white"
 
-def create_dash_app_report(flask_app):
-    dash_app_report = Dash(__name__, server=flask_app, routes_pathname_prefix="/dashreport/", external_stylesheets=['assets/style.css'], suppress_callback_exceptions=True, serve_locally=True)
-
-    df_all = pd.DataFrame() # Initialize empty DataFrame
-    enrollment_cols = [] # Initialize empty list
-
-    try:
-        file_path = get_dataset_path()
-        all_data = fetch_enrollment_records_from_csv(file_path)
-        df_all = pd.DataFrame(all_data)
-
-        enrollment_patterns = ['K ', 'G1 ', 'G2 ', 'G3 ', 'G4 ', 'G5 ', 'G6 ', 'G7 ', 'G8 ', 'G9 ', 'G10 ', 'G11 ', 'G12 ', 'Elem NG ', 'JHS NG ']
-        enrollment_cols = [
-            col for col in df_all.columns
-            if any(col.startswith(pattern) for pattern in enrollment_patterns)
-            and (' Male' in col or ' Female' in col)
-        ]
-
-        for col in enrollment_cols:
-            if col in df_all.columns:
-                # Use errors='coerce' to turn non-numeric into NaN
-                df_all[col] = pd.to_numeric(df_all[col], errors='coerce')
-        # Fill NaN with 0 and convert to integer after coercion
-        df_all[enrollment_cols] = df_all[enrollment_cols].fillna(0).astype(int)
-
-
-        id_cat_cols = ['BEIS School ID', 'Region', 'Division', 'Sector', 'School Type', 'School Subclassification', 'Municipality', 'Legislative District', 'School Name']
-        for col in id_cat_cols:
-             if col in df_all.columns:
-                 df_all[col] = df_all[col].astype(str).fillna('Unknown')
-
-    except FileNotFoundError:
-        print(f"Error: Data file not found at {file_path}")
-        dash_app_report.layout = html.Div([html.H1("Error"), html.P(f"Enrollment data file not found at {file_path}.")])
-        return dash_app_report
-    except Exception as e:
-        print(f"Error loading or processing data: {e}")
-        dash_app_report.layout = html.Div([html.H1("Error"), html.P(f"An error occurred: {e}")])
-        return dash_app_report
-
-    # --- Data Processing for Filters (moved after data loading checks) ---
+ID_CATEGORY_COLUMNS = ['BEIS School ID', 'Region', 'Division', 'Sector', 'School Type', 'School Subclassification', 'Municipality', 'Legislative District', 'School Name']
+ENROLLMENT_PATTERNS = ['K ', 'G1 ', 'G2 ', 'G3 ', 'G4 ', 'G5 ', 'G6 ', 'G7 ', 'G8 ', 'G9 ', 'G10 ', 'G11 ', 'G12 ', 'Elem NG ', 'JHS NG ']
+GRADES = ['K'] + [f'G{i}' for i in range(1, 11)] + ['G11', 'G12']
+# Columns the report filters on; each gets a value -> row positions index
+FILTER_COLUMNS = ['Region', 'Division', 'Sector', 'BEIS School ID']
+SHS_COLUMN_PATTERN = re.compile(r'(G11|G12) (.*) (Male|Female)$')
+NO_ROWS = np.empty(0, dtype=np.intp)
+# Filter states whose row selection is kept for the report callbacks
+SELECTION_STORE_SIZE = 16
+# TANAW_REPORT_CLIENTSIDE=1 filters region-level datasets in the browser (assets/report_clientside.js)
+# when their aggregate serializes to at most TANAW_CLIENTSIDE_BUDGET_KB
+CLIENTSIDE_FILTERING = os.environ.get('TANAW_REPORT_CLIENTSIDE', '0') == '1'
+CLIENTSIDE_BUDGET_BYTES = int(os.environ.get('TANAW_CLIENTSIDE_BUDGET_KB', '256')) * 1024
+CLIENTSIDE_ID_PREFIX = 'client-'
+# BEIS School ID options sent per dropdown search (TANAW_SCHOOL_SEARCH_LIMIT)
+SCHOOL_SEARCH_LIMIT = int(os.environ.get('TANAW_SCHOOL_SEARCH_LIMIT', '50'))
+SEARCH_TOKEN_PATTERN = re.compile(r'\w+')
+
+def build_filter_index(df_all):
+    """{column: {value: ascending row positions}} for FILTER_COLUMNS, so filtering is a lookup plus an intersection."""
+    return {
+        col: {value: positions.astype(np.intp) for value, positions in df_all.groupby(col, sort=False).indices.items()}
+        for col in FILTER_COLUMNS if col in df_all.columns
+    }
+
+def create_placeholder_figure(title):
+    fig = go.Figure()
+    fig.add_annotation(text="No data available for this visualization based on current filters.", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False, font=dict(size=12, color="#888"))
+    fig.update_layout(title=f"{title}", title_x=0.5, xaxis={'visible': False}, yaxis={'visible': False}, template=PLOT_TEMPLATE, title_font_size=14, height=400, width=600)
+    return fig
+
+def load_report_data(file_path):
+    """
+    Everything the report callbacks read for one dataset: the school frame, the
+    enrollment cube and the filter option lists. Rebuilt when another dataset is activated.
+    """
+    df_all = fetch_enrollment_frame_from_csv(file_path)
+    report_cube = pd.DataFrame() # Region x Division x Sector x School Type enrollment sums
+
+    enrollment_cols = [
+        col for col in df_all.columns
+        if any(col.startswith(pattern) for pattern in ENROLLMENT_PATTERNS)
+        and (' Male' in col or ' Female' in col)
+    ]
+
+    for col in enrollment_cols:
+        if col in df_all.columns:
+            # Use errors='coerce' to turn non-numeric into NaN
+            df_all[col] = pd.to_numeric(df_all[col], errors='coerce')
+    # Fill NaN with 0 and keep the compact count dtype of the shared frame when the counts fit
+    df_all[enrollment_cols] = as_enrollment_counts(df_all[enrollment_cols])
+
+    for col in ID_CATEGORY_COLUMNS:
+         if col in df_all.columns:
+             # One shared str per distinct value instead of one per row (BEIS IDs in their canonical form)
+             df_all[col] = as_school_ids(df_all[col]) if col == 'BEIS School ID' else as_label_strings(df_all[col])
+
+    if not df_all.empty:
+        # Dimensions as strings to match df_all (missing values become 'nan' there too)
+        report_cube = load_enrollment_cube(file_path).copy()
+        for dim in CUBE_DIMENSIONS:
+            if dim in report_cube.columns:
+                report_cube[dim] = as_label_strings(report_cube[dim])
+
+    # --- Data Processing for Filters ---
     regions = sorted([r for r in df_all["Region"].unique() if r != 'Unknown']) if "Region" in df_all.columns and not df_all.empty else []
     divisions_by_region = {}
     all_divisions = []
@@ -63,21 +95,317 @@ def create_dash_app_report(flask_app):
              divisions_by_region = df_filtered_for_divisions.groupby("Region")["Division"].unique().apply(lambda x: sorted(list(x))).to_dict()
              all_divisions = sorted(df_filtered_for_divisions["Division"].unique())
 
-    all_beis_ids = []
-    if "BEIS School ID" in df_all.columns and "School Name" in df_all.columns and not df_all.empty:
-        unique_schools = df_all[["BEIS School ID", "School Name"]].drop_duplicates(subset=['BEIS School ID'])
-        if not unique_schools.empty:
-            all_beis_ids_with_names = sorted(unique_schools.set_index("BEIS School ID")["School Name"].to_dict().items())
-            # Truncate long names and filter out 'Unknown' ID
-            all_beis_ids = [{'label': f"{id_} - {name[:50]}{'...' if len(name)>50 else ''}", 'value': id_} for id_, name in all_beis_ids_with_names if id_ != 'Unknown']
-
-
-    grades = ['K'] + [f'G{i}' for i in range(1, 11)] + ['G11', 'G12']
     sector_types = sorted([s for s in df_all["Sector"].unique() if s != 'Unknown']) if "Sector" in df_all.columns and not df_all.empty else []
 
-
-    # --- DASH LAYOUT (Width adjusted) ---
-    dash_app_report.layout = html.Div([
+    data = {
+        'file_path': file_path,
+        # Content hash; cached callback results are keyed by it (None when the file could not be read)
+        'version': get_dataset_version(file_path) if not df_all.empty else None,
+        'df_all': df_all,
+        'enrollment_cols': enrollment_cols,
+        # Rows x enrollment_cols counts (the frame's count dtype); filtered sums are taken over row selections of it
+        'enrollment_matrix': df_all[enrollment_cols].to_numpy(),
+        'filter_index': build_filter_index(df_all),
+        'column_strands': shs_column_strands(enrollment_cols),
+        # Dense per-row school number (same BEIS ID, same number) for per-school reductions
+        'school_codes': pd.factorize(df_all['BEIS School ID'])[0] if 'BEIS School ID' in df_all.columns else None,
+        'unknown_school': (df_all['BEIS School ID'] == 'Unknown').to_numpy() if 'BEIS School ID' in df_all.columns else None,
+        **build_school_table(df_all),
+        'report_cube': report_cube,
+        'regions': regions,
+        'divisions_by_region': divisions_by_region,
+        'all_divisions': all_divisions,
+        # BEIS School ID dropdown options and search tokens, built by the first search (see search_school_options)
+        'school_search': None,
+        'sector_types': sector_types,
+    }
+    data['clientside_aggregate'] = build_clientside_aggregate(data)
+    return data
+
+def build_school_table(df_all):
+    """
+    School dimension for per-school totals: 'school_table' holds one (BEIS School ID,
+    School Name) pair per row, sorted like groupby sorts them, 'school_rows' maps
+    each df_all row to its pair's position there and 'school_first_rows' gives each
+    pair's first df_all row.
+    """
+    if 'BEIS School ID' not in df_all.columns or 'School Name' not in df_all.columns:
+        return {'school_table': None, 'school_rows': None, 'school_first_rows': None}
+    grouped = df_all.groupby(['BEIS School ID', 'School Name'], sort=True)
+    school_rows = grouped.ngroup().to_numpy()
+    return {
+        'school_table': grouped.size().index.to_frame(index=False),
+        'school_rows': school_rows,
+        'school_first_rows': np.unique(school_rows, return_index=True)[1],
+    }
+
+def school_option(school_id, name):
+    return {'label': f"{school_id} - {name[:50]}{'...' if len(name)>50 else ''}", 'value': school_id}
+
+def build_school_search_index(df_all, school_codes):
+    """
+    Typeahead index for the BEIS School ID dropdown: one option per BEIS ID (with the
+    first School Name seen, 'Unknown' left out) in ID order, the option of each
+    school_codes value, and the sorted search tokens (lowercased ID and name words)
+    with the option each one belongs to, so a prefix lookup is two bisections.
+    """
+    if school_codes is None or 'School Name' not in df_all.columns or df_all.empty:
+        return {}
+    codes, first_rows = np.unique(school_codes, return_index=True)
+    first_rows = first_rows[codes >= 0]
+    ids = df_all['BEIS School ID'].to_numpy()[first_rows]
+    names = df_all['School Name'].to_numpy()[first_rows]
+    order = sorted((code for code in range(len(ids)) if ids[code] != 'Unknown'), key=ids.__getitem__)
+    # One extra slot so the -1 code of a missing ID maps to no option
+    option_of_code = np.full(len(ids) + 1, -1, dtype=np.intp)
+    option_of_code[order] = np.arange(len(order))
+
+    option_ids, option_names = ids[order], names[order]
+    # (word, option) pairs, indexed by option
+    tokens = pd.concat([
+        pd.Series(option_ids, dtype=object).astype(str).str.lower(),
+        pd.Series(option_names, dtype=object).astype(str).str.lower().str.findall(SEARCH_TOKEN_PATTERN).explode().dropna(),
+    ])
+    tokens = tokens.rename_axis('option').reset_index(name='word').drop_duplicates().sort_values(['word', 'option'])
+    return {
+        'options': [school_option(school_id, name) for school_id, name in zip(option_ids, option_names)],
+        'option_by_id': dict(zip(option_ids, range(len(order)))),
+        'option_of_code': option_of_code,
+        'token_keys': tokens['word'].tolist(),
+        'token_options': tokens['option'].to_numpy(dtype=np.intp),
+    }
+
+def search_school_options(data, search_value=None, selected_region=None, selected_division=None, selected_beis_id=None, limit=SCHOOL_SEARCH_LIMIT):
+    """
+    Up to `limit` BEIS School ID options, in ID order, for the schools in the region/division
+    scope (every school when it has none) whose ID or name has a word starting with each
+    word of search_value. The selected school is kept so the dropdown can still show it.
+    """
+    index = data['school_search']
+    if index is None:
+        # Concurrent first searches may both build it; either result is the same
+        index = data['school_search'] = build_school_search_index(data['df_all'], data['school_codes'])
+    if not index:
+        return []
+    matches = None # Ascending option positions; None is every option
+    positions = select_positions(data, selected_region, selected_division)
+    if positions is not None:
+        matches = np.unique(index['option_of_code'][data['school_codes'][positions]])
+        matches = matches[matches >= 0]
+        if not len(matches):
+            matches = None
+    token_keys = index['token_keys']
+    for word in SEARCH_TOKEN_PATTERN.findall((search_value or '').lower()):
+        start, end = bisect_left(token_keys, word), bisect_left(token_keys, word + '\U0010ffff')
+        found = np.unique(index['token_options'][start:end])
+        matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+
+    options = index['options']
+    chosen = range(min(limit, len(options))) if matches is None else matches[:limit]
+    results = [options[option] for option in chosen]
+    selected_option = index['option_by_id'].get(selected_beis_id) if selected_beis_id else None
+    if selected_option is not None and options[selected_option] not in results:
+        results.insert(0, options[selected_option])
+    return results
+
+def first_positions(values, k, largest=True):
+    """
+    Positions of the k largest (or smallest) values, best first, ties in position order --
+    the rows nlargest/nsmallest(keep='first') would return, found with a partial sort.
+    """
+    keys = -values if largest else values
+    if len(keys) > k:
+        kth = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= kth)
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.lexsort((candidates, keys[candidates]))][:k]
+
+def shs_column_strands(columns):
+    """{column: strand} for the G11/G12 '<grade> <strand> <gender>' enrollment columns."""
+    strands = {}
+    for col in columns:
+        match = SHS_COLUMN_PATTERN.match(col)
+        if match and match.group(2).strip():
+            strands[col] = match.group(2).strip()
+    return strands
+
+def active_filters(selected_region=None, selected_division=None, selected_sector=None, selected_beis_id=None):
+    """{column: value} for the filters that are set ('Unknown' and empty mean no filter)."""
+    return {
+        col: str(value) for col, value in (
+            ('Region', selected_region), ('Division', selected_division),
+            ('Sector', selected_sector), ('BEIS School ID', selected_beis_id),
+        ) if value and value != 'Unknown'
+    }
+
+def select_positions(data, selected_region=None, selected_division=None, selected_sector=None, selected_beis_id=None):
+    """
+    Ascending positions of the df_all rows matching the filters, intersected from the
+    filter index (smallest list first), or None when no filter is set (every row).
+    """
+    filters = active_filters(selected_region, selected_division, selected_sector, selected_beis_id)
+    if not filters:
+        return None
+    filter_index = data['filter_index']
+    candidates = sorted(
+        (filter_index.get(col, {}).get(value, NO_ROWS) for col, value in filters.items()),
+        key=len,
+    )
+    positions = candidates[0]
+    for other in candidates[1:]:
+        if not len(positions):
+            break
+        positions = np.intersect1d(positions, other, assume_unique=True)
+    return positions
+
+def enrollment_column_sums(data, positions=None):
+    """Per-column enrollment totals (Series over data['enrollment_cols']) of the selected rows."""
+    matrix = data['enrollment_matrix']
+    block = matrix if positions is None else matrix[positions]
+    return pd.Series(block.sum(axis=0, dtype=np.uint64 if block.dtype.kind == 'u' else np.int64), index=data['enrollment_cols'])
+
+def schools_offering_strands(data, positions, columns):
+    """
+    [(strand, distinct BEIS IDs with enrollment > 0 in any of its columns)] over the
+    selected rows and SHS `columns`, skipping 'Unknown' IDs. Strands come in the order a
+    row-by-row, column-by-column scan would first meet them.
+    """
+    column_strands = data['column_strands']
+    columns = [col for col in columns if col in column_strands]
+    if not columns or data['school_codes'] is None:
+        return []
+    col_positions = {col: i for i, col in enumerate(data['enrollment_cols'])}
+    offered = data['enrollment_matrix'][:, [col_positions[col] for col in columns]] > 0
+    known = ~data['unknown_school']
+    codes = data['school_codes']
+    if positions is not None:
+        offered, known, codes = offered[positions], known[positions], codes[positions]
+    offered &= known[:, None]
+    school_count = int(data['school_codes'].max()) + 1 if len(data['school_codes']) else 0
+
+    found = []
+    for strand in dict.fromkeys(column_strands[col] for col in columns):
+        strand_cols = [i for i, col in enumerate(columns) if column_strands[col] == strand]
+        strand_offered = offered[:, strand_cols]
+        row_offers = strand_offered.any(axis=1)
+        if not row_offers.any():
+            continue
+        first_row = int(row_offers.argmax())
+        first_col = strand_cols[int(strand_offered[first_row].argmax())]
+        schools = np.count_nonzero(np.bincount(codes[row_offers], minlength=school_count))
+        found.append(((first_row, first_col), strand, schools))
+    return [(strand, count) for _, strand, count in sorted(found)]
+
+def school_enrollment_totals(data, positions, columns):
+    """Total enrollment over `columns` per school_table entry, from the selected rows (0 for schools not selected)."""
+    col_positions = {col: i for i, col in enumerate(data['enrollment_cols'])}
+    block = data['enrollment_matrix'][:, [col_positions[col] for col in columns]]
+    school_rows = data['school_rows']
+    if positions is not None:
+        block, school_rows = block[positions], school_rows[positions]
+    row_totals = block.sum(axis=1, dtype=np.int64)
+    return np.bincount(school_rows, weights=row_totals, minlength=len(data['school_table'])).astype(np.int64)
+
+def first_selected_rows(data, positions, schools):
+    """For each school_table entry in `schools`, the first selected df_all row with its BEIS School ID."""
+    school_codes = data['school_codes']
+    selected = np.arange(len(school_codes)) if positions is None else positions
+    selected_codes = school_codes[selected]
+    wanted = school_codes[data['school_first_rows'][schools]]
+    return np.array([selected[np.argmax(selected_codes == code)] for code in wanted], dtype=np.intp)
+
+def select_report_rows(data, selected_region=None, selected_division=None, selected_sector=None, selected_beis_id=None):
+    """
+    What the report callbacks share for one geo/sector/school filter state: the selected
+    row positions and frame, their per-column enrollment totals, and the frame enrollment
+    sums are taken from (the cube slice, or the rows when a single school is selected).
+    """
+    positions = select_positions(data, selected_region, selected_division, selected_sector, selected_beis_id)
+    filtered_df = select_schools(data, selected_region, selected_division, selected_sector, selected_beis_id)
+    agg_source = filtered_df
+    if not (selected_beis_id and selected_beis_id != 'Unknown'):
+        agg_source = slice_enrollment_cube(data['report_cube'], {
+            'Region': selected_region if selected_region and selected_region != 'Unknown' else None,
+            'Division': selected_division if selected_division and selected_division != 'Unknown' else None,
+            'Sector': selected_sector if selected_sector and selected_sector != 'Unknown' else None,
+        })
+    return {
+        'positions': positions,
+        'filtered_df': filtered_df,
+        # Column totals of the selected rows, summed over the enrollment matrix rather than the frame
+        'column_sums': enrollment_column_sums(data, positions),
+        'agg_source': agg_source,
+    }
+
+def select_schools(data, selected_region=None, selected_division=None, selected_sector=None, selected_beis_id=None, columns=None):
+    """
+    Rows of data['df_all'] matching the geo/sector/school filters ('Unknown' and empty mean no filter).
+    The report always holds df_all, so this reads the frame even with the SQLite backend.
+    """
+    df_all = data['df_all']
+    filters = active_filters(selected_region, selected_division, selected_sector, selected_beis_id)
+    if not filters:
+        return df_all if columns is None else df_all[columns]
+
+    positions = select_positions(data, selected_region, selected_division, selected_sector, selected_beis_id)
+    if columns is None:
+        return df_all.take(positions)
+    return df_all.iloc[positions, df_all.columns.get_indexer(columns)]
+
+def build_clientside_aggregate(data):
+    """
+    Region x Division x Sector aggregate for client-side filtering (columnar: one list per
+    dimension and per enrollment column, one entry per cube cell), or None when client-side
+    mode is off, the dataset has school rows (the school panels need the server) or the
+    JSON payload is over CLIENTSIDE_BUDGET_BYTES.
+    """
+    if not CLIENTSIDE_FILTERING or 'BEIS School ID' in data['df_all'].columns or data['df_all'].empty:
+        return None
+    cube = data['report_cube']
+    dimensions = [dim for dim in ['Region', 'Division', 'Sector'] if dim in cube.columns]
+    if dimensions:
+        cube = cube.groupby(dimensions, observed=True, sort=True)[[col for col in data['enrollment_cols'] if col in cube.columns]].sum().reset_index()
+    columns = [col for col in data['enrollment_cols'] if col in cube.columns]
+    values = cube[columns]
+    if ((values % 1) == 0).all().all():
+        values = values.astype('int64')
+    aggregate = {
+        'cells': len(cube),
+        'dimensions': {dim: cube[dim].tolist() for dim in dimensions},
+        'columns': columns,
+        'values': [values[col].tolist() for col in columns],
+        'divisionsByRegion': data['divisions_by_region'],
+        'allDivisions': data['all_divisions'],
+        'template': pio.templates[PLOT_TEMPLATE].to_plotly_json(),
+        'colors': {'gender': GENDER_COLORS, 'qualitative': QUALITATIVE_COLOR_SEQUENCE},
+    }
+    size = len(json.dumps(aggregate, cls=plotly.utils.PlotlyJSONEncoder))
+    if size > CLIENTSIDE_BUDGET_BYTES:
+        print(f"Report: client-side aggregate is {size} bytes (budget {CLIENTSIDE_BUDGET_BYTES}); filtering on the server")
+        return None
+    return aggregate
+
+def build_report_layout(data, prefix='', aggregate=None):
+    """
+    The report page. With aggregate (client-side mode), every id gets `prefix` so only the
+    browser callbacks drive it, the aggregate ships in a Store, the BEIS ID filter is left out
+    and the school-level panels, which the aggregate cannot fill, are rendered as their empty states.
+    """
+    regions = data['regions']
+    all_divisions = data['all_divisions']
+    sector_types = data['sector_types']
+    grades = GRADES
+    # Panels the aggregate cannot fill start (and stay) empty in client-side mode
+    static_panels = {}
+    if aggregate is not None:
+        static_panels = {
+            'top-populated-schools-bar': {'figure': create_placeholder_figure('Top 10 Most Populated Schools')},
+            'schools-offering-strand-treemap': {'figure': create_placeholder_figure('Number of Schools Offering Each SHS Strand')},
+            'flagged-schools-table': {'children': html.P("No schools data available for watchlist based on current filters.", style={"fontSize": "0.9rem", "fontStyle": "italic", "textAlign": "center"})},
+        }
+
+    return html.Div([
         html.H1("📊 School Enrollment Dashboard", style={
             "textAlign": "center",
             "marginBottom": "20px",
@@ -88,72 +416,74 @@ def create_dash_app_report(flask_app):
         html.Div([
             html.Div([
                 html.Label("🔍 Region"),
-                dcc.Dropdown(id='region-filter', options=[{'label': r, 'value': r} for r in regions], value=None, placeholder="Select Region") # Added options and default value
+                dcc.Dropdown(id=prefix + 'region-filter', options=[{'label': r, 'value': r} for r in regions], value=None, placeholder="Select Region") # Added options and default value
             ], className="filter-item"),
 
             html.Div([
                 html.Label("📍 Division"),
-                dcc.Dropdown(id='division-filter', options=[{'label': d, 'value': d} for d in all_divisions], value=None, placeholder="Select Division", disabled=False) # Added options and default value, enabled by default
+                dcc.Dropdown(id=prefix + 'division-filter', options=[{'label': d, 'value': d} for d in all_divisions], value=None, placeholder="Select Division", disabled=False) # Added options and default value, enabled by default
             ], className="filter-item"),
 
             html.Div([
                 html.Label("🎓 Grade Level"),
-                dcc.Dropdown(id='grade-filter', options=[{'label': g, 'value': g} for g in grades], value=None, placeholder="Select Grade Level") # Added options and default value
+                dcc.Dropdown(id=prefix + 'grade-filter', options=[{'label': g, 'value': g} for g in grades], value=None, placeholder="Select Grade Level") # Added options and default value
             ], className="filter-item"),
 
             html.Div([
                 html.Label("🏫 Sector"),
-                dcc.RadioItems(id='sector-filter', options=[{'label': s, 'value': s} for s in sector_types], value=None, inline=True) # Added options and default value
+                dcc.RadioItems(id=prefix + 'sector-filter', options=[{'label': s, 'value': s} for s in sector_types], value=None, inline=True) # Added options and default value
             ], className="filter-item"),
 
-            html.Div([
+            # The aggregate has no schools to search, so client-side mode has no BEIS ID filter
+            *([html.Div([
                 html.Label("🔑 School (BEIS ID)"),
-                dcc.Dropdown(id='beis-id-filter', options=all_beis_ids, value=None, placeholder="Select School (Optional)") # Added options and default value
-            ], className="filter-item filter-item-wide"),
+                dcc.Dropdown(id=prefix + 'beis-id-filter', options=[], value=None, placeholder="Search School (BEIS ID or name)") # Options come from search_school_options as the user types
+            ], className="filter-item filter-item-wide")] if aggregate is None else []),
         ], className="filters-container"),
 
         html.Div([
-            html.Button("Reset Filters", id="reset-button", n_clicks=0, className="reset-button"),
-            html.Button("⬇ Download Data", id="btn-download", n_clicks=0, className="download-button"),
+            html.Button("Reset Filters", id=prefix + 'reset-button', n_clicks=0, className="reset-button"),
+            html.Button("⬇ Download Data", id=prefix + 'btn-download', n_clicks=0, className="download-button"),
         ], style={"display": "flex", "justifyContent": "center", "margin": "15px 0"}),
 
         html.Hr(),
 
-        dcc.Loading(id="loading-kpi", type="circle", children=html.Div(id='kpi-cards', className="kpi-cards-container")),
+        dcc.Loading(id=prefix + 'loading-kpi', type="circle", children=html.Div(id=prefix + 'kpi-cards', className="kpi-cards-container")),
 
         html.Hr(),
 
         html.H2("Overview Analysis", style={"textAlign": "center", "marginBottom": "15px", "color": "#555"}),
 
         html.Div(className="row", children=[
-            dcc.Loading(type="circle", children=dcc.Graph(id='region-enrollment-bar', className="graph-item-half")),
-            dcc.Loading(type="circle", children=dcc.Graph(id='grade-gender-parity-bar', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'region-enrollment-bar', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'grade-gender-parity-bar', className="graph-item-half")),
         ]),
 
         html.Div(className="row", children=[
-            dcc.Loading(type="circle", children=dcc.Graph(id='sector-distribution', className="graph-item-half")),
-            dcc.Loading(type="circle", children=dcc.Graph(id='education-stage-distribution', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'sector-distribution', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'education-stage-distribution', className="graph-item-half")),
         ]),
 
         html.Div(className="row", children=[
-            dcc.Loading(type="circle", children=dcc.Graph(id='shs-strand-gender-combined-bar', className="graph-item-half")),
-            dcc.Loading(type="circle", children=dcc.Graph(id='strand-enrollment-trend-line', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'shs-strand-gender-combined-bar', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'strand-enrollment-trend-line', className="graph-item-half")),
         ]),
 
         html.Div(className="row", children=[
-            dcc.Loading(type="circle", children=dcc.Graph(id='top-populated-schools-bar', className="graph-item-half")),
-            dcc.Loading(type="circle", children=dcc.Graph(id='schools-offering-strand-treemap', className="graph-item-half")),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'top-populated-schools-bar', className="graph-item-half", **static_panels.get('top-populated-schools-bar', {}))),
+            dcc.Loading(type="circle", children=dcc.Graph(id=prefix + 'schools-offering-strand-treemap', className="graph-item-half", **static_panels.get('schools-offering-strand-treemap', {}))),
         ]),
 
         html.Hr(style={"marginTop": "25px", "marginBottom": "15px"}),
 
         html.H2("⚠️ Watchlist: Least Populated Schools", style={"textAlign": "center", "marginBottom": "12px", "color": "#E69F00"}),
 
-        dcc.Loading(id="loading-table", type="circle", children=html.Div(id='flagged-schools-table', className="table-container")),
+        dcc.Loading(id=prefix + 'loading-table', type="circle", children=html.Div(id=prefix + 'flagged-schools-table', className="table-container", **static_panels.get('flagged-schools-table', {}))),
 
         html.Br(),
 
-        dcc.Download(id="download-data")
+        dcc.Download(id=prefix + 'download-data'),
+        *([dcc.Store(id=prefix + 'report-aggregate', data=aggregate)] if aggregate is not None else []),
 
     ], className="main-container", style={
         "backgroundColor": "#f0f2f5",
@@ -162,38 +492,74 @@ def create_dash_app_report(flask_app):
         "margin": "20px auto"
     })
 
+
+def create_dash_app_report(flask_app):
+    dash_app_report = Dash(__name__, server=flask_app, routes_pathname_prefix="/dashreport/", external_stylesheets=['assets/style.css'], suppress_callback_exceptions=True, serve_locally=True)
+
+    # Report data for the active dataset, swapped in place when another dataset is activated
+    report_state = {'key': None, 'data': None}
+    report_state_lock = threading.Lock()
+
+    def current_report_data():
+        file_path = get_dataset_path()
+        stat = os.stat(file_path)  # Raises FileNotFoundError while no dataset is available
+        key = (get_active_dataset_version(), file_path, stat.st_mtime_ns, stat.st_size)
+        if report_state['key'] != key:
+            with report_state_lock:
+                if report_state['key'] != key:
+                    report_state['data'] = load_report_data(file_path)
+                    report_state['key'] = key
+                    report_callback_cache.discard_other_versions(report_state['data']['version'])
+                    print(f"Report: loaded {file_path}")
+        return report_state['data']
+
+    def cached_callback_result(name, build, *filters):
+        """build(data, *filters), memoized per dataset version and filter values."""
+        data = current_report_data()
+        if data['version'] is None:
+            return build(data, *filters)
+        return report_callback_cache.get_or_compute(name, data['version'], filters, lambda: build(data, *filters))
+
+    # --- DASH LAYOUT (Width adjusted) ---
+    # Built per page load, so filter options always come from the active dataset
+    def serve_layout():
+        try:
+            data = current_report_data()
+        except FileNotFoundError:
+            return html.Div([html.H1("Error"), html.P(f"Enrollment data file not found at {get_dataset_path()}.")])
+        except Exception as e:
+            print(f"Error loading or processing data: {e}")
+            return html.Div([html.H1("Error"), html.P(f"An error occurred: {e}")])
+        if data['clientside_aggregate'] is not None:
+            return build_report_layout(data, prefix=CLIENTSIDE_ID_PREFIX, aggregate=data['clientside_aggregate'])
+        return build_report_layout(data)
+
+    dash_app_report.layout = serve_layout
+
     @dash_app_report.callback(
         Output('division-filter', 'options'),
         Output('division-filter', 'disabled'),
         Input('region-filter', 'value')
     )
     def update_divisions_dropdown(selected_region):
+        data = current_report_data()
+        divisions_by_region = data['divisions_by_region']
+        all_divisions = data['all_divisions']
         if selected_region and selected_region != 'Unknown':
             options = [{'label': d, 'value': d} for d in divisions_by_region.get(selected_region, [])]
             return options, False
         return [{'label': d, 'value': d} for d in all_divisions], False
 
-    # Callback to update BEIS School ID options based on selected Region (and implicitly Division if Region is selected)
+    # BEIS School ID typeahead: only the top matches within the Region/Division scope are sent
     @dash_app_report.callback(
         Output('beis-id-filter', 'options'),
+        Input('beis-id-filter', 'search_value'),
         Input('region-filter', 'value'),
         Input('division-filter', 'value'),
+        State('beis-id-filter', 'value'),
     )
-    def update_beis_ids_dropdown(selected_region, selected_division):
-        filtered_schools_df = df_all.copy()
-
-        if selected_region and selected_region != 'Unknown':
-            filtered_schools_df = filtered_schools_df[filtered_schools_df['Region'] == selected_region]
-        if selected_division and selected_division != 'Unknown':
-            filtered_schools_df = filtered_schools_df[filtered_schools_df['Division'] == selected_division]
-
-        beis_ids_with_names_filtered = []
-        if 'BEIS School ID' in filtered_schools_df.columns and 'School Name' in filtered_schools_df.columns and not filtered_schools_df.empty:
-             unique_filtered_schools = filtered_schools_df[["BEIS School ID", "School Name"]].drop_duplicates(subset=['BEIS School ID'])
-             beis_ids_with_names_filtered = sorted(unique_filtered_schools.set_index("BEIS School ID")["School Name"].to_dict().items())
-             beis_ids_with_names_filtered = [{'label': f"{id_} - {name[:50]}{'...' if len(name)>50 else ''}", 'value': id_} for id_, name in beis_ids_with_names_filtered if id_ != 'Unknown']
-
-        return beis_ids_with_names_filtered if beis_ids_with_names_filtered else all_beis_ids
+    def update_beis_ids_dropdown(search_value, selected_region, selected_division, selected_beis_id):
+        return search_school_options(current_report_data(), search_value, selected_region, selected_division, selected_beis_id)
 
 
     # Reset Filters Callback
@@ -210,17 +576,34 @@ def create_dash_app_report(flask_app):
         return None, None, None, None, None
 
 
-    # --- Main Update Callback ---
+    # Selections shared by the report callbacks: a geo/sector/school change fires both of
+    # them for the same filter state, and the second reuses the rows the first selected
+    selection_store = OrderedDict()
+    selection_lock = threading.Lock()
+
+    def current_selection(data, selected_region, selected_division, selected_sector, selected_beis_id):
+        key = (data['file_path'], data['version'], selected_region, selected_division, selected_sector, selected_beis_id)
+        with selection_lock:
+            selection = selection_store.get(key)
+            if selection is not None:
+                selection_store.move_to_end(key)
+                return selection
+        selection = select_report_rows(data, selected_region, selected_division, selected_sector, selected_beis_id)
+        with selection_lock:
+            selection_store[key] = selection
+            while len(selection_store) > SELECTION_STORE_SIZE:
+                selection_store.popitem(last=False)
+        return selection
+
+    # --- Main Update Callback (everything that depends on the grade filter) ---
     @dash_app_report.callback(
         Output('kpi-cards', 'children'),
-        Output('region-enrollment-bar', 'figure'),
         Output('grade-gender-parity-bar', 'figure'),
         Output('sector-distribution', 'figure'),
         Output('education-stage-distribution', 'figure'),
         Output('shs-strand-gender-combined-bar', 'figure'),
         Output('top-populated-schools-bar', 'figure'),
         Output('strand-enrollment-trend-line', 'figure'),
-        Output('schools-offering-strand-treemap', 'figure'),
         Output('flagged-schools-table', 'children'),
         Input('region-filter', 'value'),
         Input('division-filter', 'value'),
@@ -229,19 +612,21 @@ def create_dash_app_report(flask_app):
         Input('beis-id-filter', 'value'),
     )
     def update_dashboard(selected_region, selected_division, selected_grade, selected_sector, selected_beis_id):
+        return cached_callback_result('update_dashboard', build_dashboard_outputs,
+                                      selected_region, selected_division, selected_grade, selected_sector, selected_beis_id)
 
-        # --- Filtering Logic ---
-        filtered_df = df_all.copy()
-        query_parts = []
-        if selected_region and selected_region != 'Unknown': query_parts.append(f"Region == '{selected_region}'")
-        if selected_division and selected_division != 'Unknown': query_parts.append(f"Division == '{selected_division}'")
-        if selected_sector and selected_sector != 'Unknown': query_parts.append(f"Sector == '{selected_sector}'")
-        if selected_beis_id and selected_beis_id != 'Unknown': query_parts.append(f"`BEIS School ID` == '{str(selected_beis_id)}'")
+    def build_dashboard_outputs(data, selected_region, selected_division, selected_grade, selected_sector, selected_beis_id):
 
-        if query_parts:
-             filtered_df = filtered_df.query(" and ".join(query_parts))
+        # --- Filtering Logic ---
+        enrollment_cols = data['enrollment_cols']
+        selection = current_selection(data, selected_region, selected_division, selected_sector, selected_beis_id)
+        filtered_df = selection['filtered_df']
+        selected_positions = selection['positions']
+        column_sums = selection['column_sums']
+        # Enrollment sums come from the cube unless a single school (BEIS ID) is selected
+        agg_source = selection['agg_source']
 
-        filtered_df_base_after_geo_sector_id = filtered_df.copy()
+        filtered_df_base_after_geo_sector_id = filtered_df
 
         current_enrollment_cols = list(enrollment_cols)
         if selected_grade:
@@ -263,9 +648,9 @@ def create_dash_app_report(flask_app):
 
 
         # KPIs Calculation
-        total_enrollments = filtered_df[numeric_enrollment_cols_filtered].sum().sum() if numeric_enrollment_cols_filtered and not filtered_df.empty else 0
-        male_enrollments = filtered_df[[col for col in numeric_enrollment_cols_filtered if 'Male' in col]].sum().sum() if numeric_enrollment_cols_filtered and not filtered_df.empty else 0
-        female_enrollments = filtered_df[[col for col in numeric_enrollment_cols_filtered if 'Female' in col]].sum().sum() if numeric_enrollment_cols_filtered and not filtered_df.empty else 0
+        total_enrollments = agg_source[numeric_enrollment_cols_filtered].sum().sum() if numeric_enrollment_cols_filtered and not agg_source.empty else 0
+        male_enrollments = agg_source[[col for col in numeric_enrollment_cols_filtered if 'Male' in col]].sum().sum() if numeric_enrollment_cols_filtered and not agg_source.empty else 0
+        female_enrollments = agg_source[[col for col in numeric_enrollment_cols_filtered if 'Female' in col]].sum().sum() if numeric_enrollment_cols_filtered and not agg_source.empty else 0
 
         # School Count and Most Populated Grade (using base-filtered data)
         number_of_schools = filtered_df_base_after_geo_sector_id['BEIS School ID'].nunique() if 'BEIS School ID' in filtered_df_base_after_geo_sector_id.columns and not filtered_df_base_after_geo_sector_id.empty else 0
@@ -276,7 +661,7 @@ def create_dash_app_report(flask_app):
                 match = re.match(r'(K|G\d{1,2}|Elem NG|JHS NG)\b', col)
                 if match:
                     grade = match.group(1)
-                    grade_enrollment_base[grade] = grade_enrollment_base.get(grade, 0) + filtered_df_base_after_geo_sector_id[col].sum()
+                    grade_enrollment_base[grade] = grade_enrollment_base.get(grade, 0) + column_sums[col]
             ordered_grades_keys = ['K'] + [f'G{i}' for i in range(1, 13)] + ['Elem NG', 'JHS NG']
             present_ordered_grades = [g for g in ordered_grades_keys if g in grade_enrollment_base]
 
@@ -288,13 +673,6 @@ def create_dash_app_report(flask_app):
                          max_enrollment = grade_enrollment_base[grade]
                          most_populated_grade = grade
 
-        # Placeholder Figure Function - ADDED height=400
-        def create_placeholder_figure(title):
-             fig = go.Figure()
-             fig.add_annotation(text="No data available for this visualization based on current filters.", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False, font=dict(size=12, color="#888"))
-             fig.update_layout(title=f"{title}", title_x=0.5, xaxis={'visible': False}, yaxis={'visible': False}, template=PLOT_TEMPLATE, title_font_size=14, height=400, width=600) # Added height
-             return fig
-
         kpis = html.Div([
             html.Div([html.H3("Total Enrolled (Filtered)", className="kpi-title"), html.H1(f"{total_enrollments:,}", className="kpi-value")], className="kpi-card"),
             html.Div([html.H3("Male vs Female (Filtered)", className="kpi-title"), html.P(f"{male_enrollments:,} ♂ | {female_enrollments:,} ♀", className="kpi-value")], className="kpi-card"),
@@ -304,36 +682,13 @@ def create_dash_app_report(flask_app):
 
         # --- Generate Overview Figures ---
 
-        # 1. Region Enrollment Bar - ADDED height=400
-        fig_region_bar = create_placeholder_figure("Total Enrollment by Region")
-        region_df_for_chart = df_all if not selected_region else filtered_df_base_after_geo_sector_id
-        all_numeric_cols_region = [col for col in enrollment_cols if col in region_df_for_chart.columns and pd.api.types.is_numeric_dtype(region_df_for_chart[col])]
-
-        if 'Region' in region_df_for_chart.columns and not region_df_for_chart.empty and all_numeric_cols_region:
-             region_enrollment = region_df_for_chart.groupby("Region")[all_numeric_cols_region].sum().sum(axis=1).reset_index(name='Total Enrollment')
-             region_enrollment = region_enrollment[(region_enrollment['Total Enrollment'] > 0) & (region_enrollment['Region'] != 'Unknown')].sort_values('Total Enrollment', ascending=False)
-             if not region_enrollment.empty:
-                 fig_region_bar = px.bar(region_enrollment, x="Region", y="Total Enrollment", title="Total Enrollment by Region", labels={'Total Enrollment': 'Enrollment Count', 'Region': 'Region'}, template=PLOT_TEMPLATE, color_discrete_sequence=QUALITATIVE_COLOR_SEQUENCE)
-                 fig_region_bar.update_layout(title_font_size=14, title_x=0.5, xaxis={'categoryorder':'total descending'}, height=400, width=600) # Added height
-
-
         # 2. Grade Gender Parity Bar Chart - ADDED height=400
         fig_grade_gender_parity = create_placeholder_figure("Enrollment by Grade Level and Gender")
         grade_parity_cols = [col for col in numeric_enrollment_cols_filtered if re.match(r'(K|G\d{1,2})\b', col)]
 
         if grade_parity_cols and not filtered_df.empty:
-             melt_df_parity = filtered_df[['BEIS School ID'] + grade_parity_cols] if 'BEIS School ID' in filtered_df.columns else filtered_df[grade_parity_cols]
-             melt_id_vars_parity = ['BEIS School ID'] if 'BEIS School ID' in filtered_df.columns else []
-
-             if not melt_id_vars_parity:
-                  melt_df_parity['_temp_id'] = range(len(melt_df_parity))
-                  melt_id_vars_parity = ['_temp_id']
-
-             melted_parity = pd.melt(melt_df_parity, id_vars=melt_id_vars_parity, value_vars=grade_parity_cols, var_name="GradeGender", value_name="Count")
-
-             if '_temp_id' in melted_parity.columns:
-                 melted_parity = melted_parity.drop(columns=['_temp_id'])
-
+             # One row per grade/gender column instead of one per school and column
+             melted_parity = column_sums[grade_parity_cols].rename_axis("GradeGender").reset_index(name="Count")
              melted_parity = melted_parity[melted_parity['Count'] > 0]
 
              if not melted_parity.empty:
@@ -358,8 +713,8 @@ def create_dash_app_report(flask_app):
 
         # 3. Sector Distribution Pie Chart - ADDED height=400
         fig_sector = create_placeholder_figure('Enrollment Distribution by Sector')
-        if 'Sector' in filtered_df.columns and not filtered_df.empty and numeric_enrollment_cols_filtered:
-             sector_enrollment = filtered_df.groupby("Sector")[numeric_enrollment_cols_filtered].sum().sum(axis=1).reset_index(name='Total Enrollment')
+        if 'Sector' in agg_source.columns and not agg_source.empty and numeric_enrollment_cols_filtered:
+             sector_enrollment = agg_source.groupby("Sector")[numeric_enrollment_cols_filtered].sum().sum(axis=1).reset_index(name='Total Enrollment')
              sector_enrollment = sector_enrollment[(sector_enrollment['Total Enrollment'] > 0) & (sector_enrollment['Sector'] != 'Unknown')]
              if not sector_enrollment.empty:
                   fig_sector = px.pie(
@@ -377,9 +732,9 @@ def create_dash_app_report(flask_app):
              jhs_cols = [col for col in numeric_enrollment_cols_filtered if any(col.startswith(g + ' ') for g in [f'G{i}' for i in range(7, 11)]) or 'JHS NG' in col]
              shs_cols = [col for col in numeric_enrollment_cols_filtered if any(col.startswith(g + ' ') for g in ['G11', 'G12'])]
 
-             elementary = filtered_df[elem_cols].sum().sum() if elem_cols else 0
-             junior_high = filtered_df[jhs_cols].sum().sum() if jhs_cols else 0
-             senior_high = filtered_df[shs_cols].sum().sum() if shs_cols else 0
+             elementary = column_sums[elem_cols].sum() if elem_cols else 0
+             junior_high = column_sums[jhs_cols].sum() if jhs_cols else 0
+             senior_high = column_sums[shs_cols].sum() if shs_cols else 0
 
              stage_data = pd.DataFrame({
                  'Stage': ['Elementary', 'Junior High School', 'Senior High School'],
@@ -408,7 +763,7 @@ def create_dash_app_report(flask_app):
                  if match:
                       grade, strand_name, gender = match.groups()
                       if strand_name.strip():
-                          enrollment_sum = filtered_df[col].sum()
+                          enrollment_sum = column_sums[col]
                           if enrollment_sum > 0:
                                strand_gender_data.append({'Grade': grade, 'Strand': strand_name.strip(), 'Gender': gender, 'Enrollment': enrollment_sum})
 
@@ -426,14 +781,25 @@ def create_dash_app_report(flask_app):
                      fig_shs_strand_gender_combined.update_xaxes(tickangle=30, categoryorder='total descending')
 
 
+        # Per-school totals for the top 10 chart and the watchlist, computed once
+        school_totals = None
+        positive_schools = None
+        if 'BEIS School ID' in filtered_df.columns and 'School Name' in filtered_df.columns and not filtered_df.empty and numeric_enrollment_cols_filtered and data['school_table'] is not None:
+             school_totals = school_enrollment_totals(data, selected_positions, numeric_enrollment_cols_filtered)
+             positive_schools = np.flatnonzero(school_totals > 0)
+
         # 6. Top 10 Most Populated Schools (Horizontal Bar) - ADDED height=400
         fig_top_schools = create_placeholder_figure('Top 10 Most Populated Schools')
-        if 'BEIS School ID' in filtered_df.columns and 'School Name' in filtered_df.columns and not filtered_df.empty and numeric_enrollment_cols_filtered:
-             enrollment_per_school = filtered_df.groupby(['BEIS School ID', 'School Name'])[numeric_enrollment_cols_filtered].sum().sum(axis=1).reset_index(name='Total Enrollment')
-             top_schools = enrollment_per_school[enrollment_per_school['Total Enrollment'] > 0].nlargest(10, 'Total Enrollment')
+        if school_totals is not None:
+             top = positive_schools[first_positions(school_totals[positive_schools], 10)]
+             top_schools = data['school_table'].iloc[top].reset_index(drop=True)
+             top_schools['Total Enrollment'] = school_totals[top]
 
              if not top_schools.empty:
-                  top_schools['Display Name'] = top_schools.apply(lambda row: f"{row['School Name'][:40]}{'...' if len(row['School Name']) > 40 else ''} ({row['BEIS School ID']})", axis=1)
+                  top_schools['Display Name'] = [
+                      f"{name[:40]}{'...' if len(name) > 40 else ''} ({school_id})"
+                      for school_id, name in zip(top_schools['BEIS School ID'], top_schools['School Name'])
+                  ]
 
                   fig_top_schools = px.bar(
                       top_schools, y='Display Name', x='Total Enrollment', orientation='h',
@@ -475,8 +841,8 @@ def create_dash_app_report(flask_app):
                 # Find all Male/Female columns for this strand in G12
                 g12_strand_cols = [col for col in g12_cols if shs_pattern.match(col) and shs_pattern.match(col).group(2).strip() == strand]
 
-                g11_total = strand_trend_df_src[g11_strand_cols].sum().sum() if g11_strand_cols else 0
-                g12_total = strand_trend_df_src[g12_strand_cols].sum().sum() if g12_strand_cols else 0
+                g11_total = column_sums[g11_strand_cols].sum() if g11_strand_cols else 0
+                g12_total = column_sums[g12_strand_cols].sum() if g12_strand_cols else 0
 
                 # Append data points only if enrollment exists
                 if g11_total > 0 : strand_trend_data.append({'Strand': strand, 'Grade': 'G11', 'Enrollment': g11_total})
@@ -497,54 +863,20 @@ def create_dash_app_report(flask_app):
                     fig_strand_trend.update_xaxes(tickangle=30, categoryorder='category ascending')
 
 
-        # 9. Number of Schools Offering Each Strand (Treemap) - ADDED height=400
-        fig_schools_offering_strand = create_placeholder_figure('Number of Schools Offering Each SHS Strand')
-        shs_cols_base = [col for col in all_numeric_enrollment_cols_in_base if col.startswith('G11 ') or col.startswith('G12 ')]
-
-        if shs_cols_base and 'BEIS School ID' in filtered_df_base_after_geo_sector_id.columns and not filtered_df_base_after_geo_sector_id.empty:
-             schools_offering = {}
-             for index, school in filtered_df_base_after_geo_sector_id.iterrows():
-                 school_id = school['BEIS School ID']
-                 if school_id == 'Unknown': continue
-                 for col in shs_cols_base:
-                      if col in school and school[col] > 0:
-                          match = re.match(r'(G11|G12) (.*) (Male|Female)$', col)
-                          if match:
-                               strand_name = " ".join(match.groups()[1:-1])
-                               if strand_name.strip():
-                                    clean_strand_name = strand_name.strip()
-                                    if clean_strand_name not in schools_offering:
-                                        schools_offering[clean_strand_name] = set()
-                                    schools_offering[clean_strand_name].add(school_id)
-
-             if schools_offering:
-                  strand_counts = [{'Strand': strand, 'Schools Offering': len(ids)} for strand, ids in schools_offering.items()]
-                  strand_counts_df = pd.DataFrame(strand_counts).sort_values('Schools Offering', ascending=False)
-
-                  if not strand_counts_df.empty:
-                       fig_schools_offering_strand = px.treemap(
-                           strand_counts_df, path=[px.Constant("All Strands"), 'Strand'], values='Schools Offering',
-                           title='Number of Schools Offering Each SHS Strand/Track (Filtered Base)',
-                           labels={'Schools Offering': 'Count of Schools', 'Strand': 'Strand/Track'},
-                           template=PLOT_TEMPLATE, color='Schools Offering',
-                           color_continuous_scale=px.colors.sequential.YlGnBu)
-                       fig_schools_offering_strand.update_layout(title_font_size=14, title_x=0.5, height=400, width=600) # Added height
-                       fig_schools_offering_strand.update_traces(textinfo="label+value")
-
-
         # --- Watchlist Table (Least Populated Schools) ---
         watchlist_table_component = html.P("No schools data available for watchlist based on current filters.", style={"fontSize": "0.9rem", "fontStyle": "italic", "textAlign": "center"})
-        if 'BEIS School ID' in filtered_df.columns and 'School Name' in filtered_df.columns and not filtered_df.empty and numeric_enrollment_cols_filtered:
-             enrollment_per_school_watchlist = filtered_df.groupby(['BEIS School ID', 'School Name'])[numeric_enrollment_cols_filtered].sum().sum(axis=1).reset_index(name='Filtered Total Enrollment')
-             least_populated = enrollment_per_school_watchlist[enrollment_per_school_watchlist['Filtered Total Enrollment'] > 0].nsmallest(10, 'Filtered Total Enrollment')
+        if school_totals is not None:
+             least = positive_schools[first_positions(school_totals[positive_schools], 10, largest=False)]
+             least_populated = data['school_table'].iloc[least].reset_index(drop=True)
+             least_populated['Filtered Total Enrollment'] = school_totals[least]
 
              if not least_populated.empty:
-                  cols_to_merge = ['BEIS School ID', 'Region', 'Division', 'Sector', 'School Type', 'School Subclassification']
+                  # Attributes of each school's first filtered row (what a merge on BEIS School ID would pick)
+                  cols_to_merge = ['Region', 'Division', 'Sector', 'School Type', 'School Subclassification']
                   cols_to_merge_present = [col for col in cols_to_merge if col in filtered_df.columns]
-
-                  if cols_to_merge_present:
-                       merge_info_df = filtered_df[cols_to_merge_present].drop_duplicates(subset=['BEIS School ID'])
-                       least_populated = pd.merge(least_populated, merge_info_df, on='BEIS School ID', how='left')
+                  attribute_rows = first_selected_rows(data, selected_positions, least)
+                  for col in cols_to_merge_present:
+                       least_populated[col] = data['df_all'][col].to_numpy()[attribute_rows]
 
                   table_cols_order = ['BEIS School ID', 'School Name', 'Filtered Total Enrollment', 'Sector', 'Division', 'Region', 'School Type', 'School Subclassification']
                   table_cols_final = [col for col in table_cols_order if col in least_populated.columns]
@@ -565,14 +897,128 @@ def create_dash_app_report(flask_app):
 
 
         # --- Return all figures and components ---
-        return (kpis, fig_region_bar, fig_grade_gender_parity, fig_sector, fig_education_stage,
+        return (kpis, fig_grade_gender_parity, fig_sector, fig_education_stage,
                 fig_shs_strand_gender_combined,
                 fig_top_schools,
                 fig_strand_trend,
-                fig_schools_offering_strand,
                 watchlist_table_component
                )
 
+    # --- Grade-independent figures (region bar, strand treemap) ---
+    @dash_app_report.callback(
+        Output('region-enrollment-bar', 'figure'),
+        Output('schools-offering-strand-treemap', 'figure'),
+        Input('region-filter', 'value'),
+        Input('division-filter', 'value'),
+        Input('sector-filter', 'value'),
+        Input('beis-id-filter', 'value'),
+    )
+    def update_geo_figures(selected_region, selected_division, selected_sector, selected_beis_id):
+        return cached_callback_result('update_geo_figures', build_geo_figures,
+                                      selected_region, selected_division, selected_sector, selected_beis_id)
+
+    def build_geo_figures(data, selected_region, selected_division, selected_sector, selected_beis_id):
+        enrollment_cols = data['enrollment_cols']
+        report_cube = data['report_cube']
+        selection = current_selection(data, selected_region, selected_division, selected_sector, selected_beis_id)
+        filtered_df_base_after_geo_sector_id = selection['filtered_df']
+        selected_positions = selection['positions']
+        agg_source = selection['agg_source']
+        all_numeric_enrollment_cols_in_base = [
+             col for col in enrollment_cols
+             if col in filtered_df_base_after_geo_sector_id.columns and pd.api.types.is_numeric_dtype(filtered_df_base_after_geo_sector_id[col])
+        ]
+
+        # 1. Region Enrollment Bar - ADDED height=400
+        fig_region_bar = create_placeholder_figure("Total Enrollment by Region")
+        region_df_for_chart = report_cube if not selected_region else agg_source
+        all_numeric_cols_region = [col for col in enrollment_cols if col in region_df_for_chart.columns and pd.api.types.is_numeric_dtype(region_df_for_chart[col])]
+
+        if 'Region' in region_df_for_chart.columns and not region_df_for_chart.empty and all_numeric_cols_region:
+             region_enrollment = region_df_for_chart.groupby("Region")[all_numeric_cols_region].sum().sum(axis=1).reset_index(name='Total Enrollment')
+             region_enrollment = region_enrollment[(region_enrollment['Total Enrollment'] > 0) & (region_enrollment['Region'] != 'Unknown')].sort_values('Total Enrollment', ascending=False)
+             if not region_enrollment.empty:
+                 fig_region_bar = px.bar(region_enrollment, x="Region", y="Total Enrollment", title="Total Enrollment by Region", labels={'Total Enrollment': 'Enrollment Count', 'Region': 'Region'}, template=PLOT_TEMPLATE, color_discrete_sequence=QUALITATIVE_COLOR_SEQUENCE)
+                 fig_region_bar.update_layout(title_font_size=14, title_x=0.5, xaxis={'categoryorder':'total descending'}, height=400, width=600) # Added height
+
+
+        # 9. Number of Schools Offering Each Strand (Treemap) - ADDED height=400
+        fig_schools_offering_strand = create_placeholder_figure('Number of Schools Offering Each SHS Strand')
+        shs_cols_base = [col for col in all_numeric_enrollment_cols_in_base if col.startswith('G11 ') or col.startswith('G12 ')]
+
+        if shs_cols_base and 'BEIS School ID' in filtered_df_base_after_geo_sector_id.columns and not filtered_df_base_after_geo_sector_id.empty:
+             schools_offering = schools_offering_strands(data, selected_positions, shs_cols_base)
+
+             if schools_offering:
+                  strand_counts = [{'Strand': strand, 'Schools Offering': count} for strand, count in schools_offering]
+                  strand_counts_df = pd.DataFrame(strand_counts).sort_values('Schools Offering', ascending=False)
+
+                  if not strand_counts_df.empty:
+                       fig_schools_offering_strand = px.treemap(
+                           strand_counts_df, path=[px.Constant("All Strands"), 'Strand'], values='Schools Offering',
+                           title='Number of Schools Offering Each SHS Strand/Track (Filtered Base)',
+                           labels={'Schools Offering': 'Count of Schools', 'Strand': 'Strand/Track'},
+                           template=PLOT_TEMPLATE, color='Schools Offering',
+                           color_continuous_scale=px.colors.sequential.YlGnBu)
+                       fig_schools_offering_strand.update_layout(title_font_size=14, title_x=0.5, height=400, width=600) # Added height
+                       fig_schools_offering_strand.update_traces(textinfo="label+value")
+
+
+        return fig_region_bar, fig_schools_offering_strand
+
+    # --- Client-side mode: callbacks for the CLIENTSIDE_ID_PREFIX layout (see build_clientside_aggregate) ---
+    if CLIENTSIDE_FILTERING:
+        def client(component_id):
+            return CLIENTSIDE_ID_PREFIX + component_id
+
+        client_filters = [client(filter_id) for filter_id in ['region-filter', 'division-filter', 'grade-filter', 'sector-filter']]
+
+        dash_app_report.clientside_callback(
+            ClientsideFunction(namespace='tanawReport', function_name='updateDashboard'),
+            Output(client('kpi-cards'), 'children'),
+            Output(client('region-enrollment-bar'), 'figure'),
+            Output(client('grade-gender-parity-bar'), 'figure'),
+            Output(client('sector-distribution'), 'figure'),
+            Output(client('education-stage-distribution'), 'figure'),
+            Output(client('shs-strand-gender-combined-bar'), 'figure'),
+            Output(client('strand-enrollment-trend-line'), 'figure'),
+            *[Input(filter_id, 'value') for filter_id in client_filters],
+            Input(client('report-aggregate'), 'data'),
+        )
+        dash_app_report.clientside_callback(
+            ClientsideFunction(namespace='tanawReport', function_name='divisionOptions'),
+            Output(client('division-filter'), 'options'),
+            Output(client('division-filter'), 'disabled'),
+            Input(client('region-filter'), 'value'),
+            State(client('report-aggregate'), 'data'),
+        )
+        dash_app_report.clientside_callback(
+            ClientsideFunction(namespace='tanawReport', function_name='resetFilters'),
+            *[Output(filter_id, 'value') for filter_id in client_filters],
+            Input(client('reset-button'), 'n_clicks'),
+            prevent_initial_call=True,
+        )
+
+        # Downloads still come from the server: the browser only has the aggregate
+        @dash_app_report.callback(
+            Output(client('download-data'), 'data'),
+            Input(client('btn-download'), 'n_clicks'),
+            *[State(filter_id, 'value') for filter_id in client_filters],
+            prevent_initial_call=True,
+        )
+        def download_client_filtered_data(n_clicks, selected_region, selected_division, selected_grade, selected_sector):
+            return build_filtered_download(current_report_data(), selected_region, selected_division, selected_grade, selected_sector, None)
+
+    def warm_up():
+        """Loads the active dataset and computes the unfiltered view (run off the request path at startup)."""
+        current_report_data()
+        update_dashboard(None, None, None, None, None)
+        update_geo_figures(None, None, None, None)
+        update_beis_ids_dropdown(None, None, None, None)
+
+    # Called by app.py's startup warm-up thread; the app itself loads nothing until it is used
+    dash_app_report.warm_up = warm_up
+
     @dash_app_report.callback(
         Output("download-data", "data"),
         Input("btn-download", "n_clicks"),
@@ -584,15 +1030,12 @@ def create_dash_app_report(flask_app):
         prevent_initial_call=True,
     )
     def download_filtered_data(n_clicks, selected_region, selected_division, selected_grade, selected_sector, selected_beis_id):
-        filtered_df_download = df_all.copy()
-        query_parts = []
-        if selected_region and selected_region != 'Unknown': query_parts.append(f"Region == '{selected_region}'")
-        if selected_division and selected_division != 'Unknown': query_parts.append(f"Division == '{selected_division}'")
-        if selected_sector and selected_sector != 'Unknown': query_parts.append(f"Sector == '{selected_sector}'")
-        if selected_beis_id and selected_beis_id != 'Unknown': query_parts.append(f"`BEIS School ID` == '{str(selected_beis_id)}'")
-
-        if query_parts:
-             filtered_df_download = filtered_df_download.query(" and ".join(query_parts)).copy()
+        # Not cached: the CSV text would crowd the figures out of the cache, and a download is a one-off
+        return build_filtered_download(current_report_data(), selected_region, selected_division, selected_grade, selected_sector, selected_beis_id)
+
+    def build_filtered_download(data, selected_region, selected_division, selected_grade, selected_sector, selected_beis_id):
+        df_all = data['df_all']
+        filtered_df_download = select_schools(data, selected_region, selected_division, selected_sector, selected_beis_id)
 
         all_enrollment_cols = [
              col for col in df_all.columns
@@ -0,0 +1,87 @@
+import os
+import re
+import json
+import time
+import uuid
+import threading
+
+# Staged uploads waiting for the user to confirm a replacement live here, one <token>.csv each
+STAGING_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_folder', 'staged')
+# Stages the user never confirmed (closed the modal, left the page) are removed after this long
+STAGE_EXPIRY_SECONDS = int(os.environ.get('TANAW_STAGE_EXPIRY_SECONDS', str(60 * 60)))
+
+_TOKEN_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+_staging_lock = threading.Lock()
+
+def _stage_paths(token):
+    return os.path.join(STAGING_FOLDER, f"{token}.csv"), os.path.join(STAGING_FOLDER, f"{token}.json")
+
+def stage_upload(file_storage, **metadata):
+    """
+    Streams an uploaded file to the staging folder once and returns its token.
+    metadata (school year, file name, ...) is kept beside it so the confirm step only needs the token.
+    """
+    os.makedirs(STAGING_FOLDER, exist_ok=True)
+    discard_expired_stages()
+    token = uuid.uuid4().hex
+    data_path, meta_path = _stage_paths(token)
+    file_storage.save(data_path)
+    with open(meta_path, 'w') as f:
+        json.dump(dict(metadata, staged_at=time.time()), f)
+    return token
+
+def claim_staged_upload(token):
+    """
+    Takes ownership of a staged upload: moves the file out of the staging folder (where
+    discard_expired_stages could delete it mid-job) to temp_folder/upload_<token>.csv and
+    returns (data_path, metadata), so the caller is responsible for the file from here on.
+    Returns None for unknown, malformed or expired tokens.
+    """
+    if not token or not _TOKEN_PATTERN.match(token):
+        return None
+    data_path, meta_path = _stage_paths(token)
+    claimed_path = os.path.join(os.path.dirname(STAGING_FOLDER), f"upload_{token}.csv")
+    with _staging_lock:
+        try:
+            with open(meta_path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.remove(meta_path)
+        expired = time.time() - metadata.get('staged_at', 0) > STAGE_EXPIRY_SECONDS
+        if not expired:
+            try:
+                os.replace(data_path, claimed_path)
+            except FileNotFoundError:
+                return None
+    if expired:
+        discard_staged_upload(token)
+        return None
+    return claimed_path, metadata
+
+def discard_staged_upload(token):
+    if not token or not _TOKEN_PATTERN.match(token):
+        return
+    for path in _stage_paths(token):
+        if os.path.exists(path):
+            os.remove(path)
+
+def discard_expired_stages():
+    """Removes staged files older than STAGE_EXPIRY_SECONDS; returns how many stages were dropped."""
+    if not os.path.isdir(STAGING_FOLDER):
+        return 0
+    cutoff = time.time() - STAGE_EXPIRY_SECONDS
+    expired = set()
+    with _staging_lock:
+        for entry in os.scandir(STAGING_FOLDER):
+            token = os.path.splitext(entry.name)[0]
+            try:
+                if _TOKEN_PATTERN.match(token) and entry.stat().st_mtime < cutoff:
+                    expired.add(token)
+            except FileNotFoundError:
+                continue
+    for token in expired:
+        discard_staged_upload(token)
+    if expired:
+        print(f"Discarded {len(expired)} expired staged upload(s).")
+    return len(expired)
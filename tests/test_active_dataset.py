@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_config
+
+
+def write_state_as_other_worker(state_path, csv_path, version):
+    tmp_path = f"{state_path}.other.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'path': os.path.relpath(csv_path, os.path.dirname(os.path.abspath(data_config.__file__))), 'version': version}, f)
+    os.replace(tmp_path, state_path)
+
+
+def test_workers_converge_on_the_state_file(tmp_path, monkeypatch):
+    state_path = str(tmp_path / 'active_dataset.json')
+    monkeypatch.setattr(data_config, 'ACTIVE_DATASET_STATE_PATH', state_path)
+    monkeypatch.setattr(data_config, '_active_dataset', {'path': None, 'version': 0, 'state': None})
+    first, second = str(tmp_path / 'first.csv'), str(tmp_path / 'second.csv')
+    for path in (first, second):
+        with open(path, 'w') as f:
+            f.write('Region,K Male\nNCR,1\n')
+
+    assert data_config.activate_dataset(first) == 1
+    assert data_config.get_active_dataset() == (first, 1)
+
+    write_state_as_other_worker(state_path, second, 2)
+    assert data_config.get_active_dataset() == (second, 2)
+
+    # The next activation here moves past the version the other worker recorded
+    assert data_config.activate_dataset(first) == 3
+    with open(state_path) as f:
+        assert json.load(f)['version'] == 3
+    assert data_config.get_active_dataset() == (first, 3)
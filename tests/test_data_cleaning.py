@@ -0,0 +1,41 @@
+import os
+import sys
+import shutil
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning import write_cleaned_chunks, clean_data
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def test_write_cleaned_chunks_writes_all_chunks(tmp_path):
+    cleaned_path = tmp_path / 'school_cleaned.csv'
+    chunks = [pd.DataFrame({'Region': ['NCR'], 'K Male': [3]}), pd.DataFrame({'Region': ['CAR'], 'K Male': [5]})]
+    assert write_cleaned_chunks(iter(chunks), str(cleaned_path)) == 2
+    assert pd.read_csv(cleaned_path).to_dict('list') == {'Region': ['NCR', 'CAR'], 'K Male': [3, 5]}
+    assert os.listdir(tmp_path) == ['school_cleaned.csv']
+
+
+def test_write_cleaned_chunks_leaves_no_partial_file(tmp_path):
+    def chunks():
+        yield pd.DataFrame({'Region': ['NCR'], 'K Male': [3]})
+        raise ValueError('bad chunk')
+
+    with pytest.raises(ValueError):
+        write_cleaned_chunks(chunks(), str(tmp_path / 'school_cleaned.csv'))
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunked_clean_matches_in_memory_clean(tmp_path):
+    # The fixture has blank enrollment cells in its first and second chunk of four rows only
+    outputs = []
+    for name, chunksize in (('memory', None), ('chunked', 4)):
+        os.makedirs(tmp_path / name)
+        upload = shutil.copy(os.path.join(FIXTURES, 'enrollment_school.csv'), tmp_path / name / 'upload.csv')
+        with open(clean_data(str(upload), chunksize=chunksize), 'rb') as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
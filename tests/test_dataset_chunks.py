@@ -0,0 +1,29 @@
+import os
+import sys
+import shutil
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_config
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.mark.parametrize('csv_name', ['enrollment_school.csv', 'enrollment_regional.csv'])
+def test_chunked_sidecar_and_cube_match_whole_file(tmp_path, csv_name):
+    csv_path = shutil.copy(os.path.join(FIXTURES, csv_name), tmp_path / csv_name)
+    whole = data_config.compact_dataset_frame(data_config.read_csv_dataset(csv_path))
+    cube = data_config.build_enrollment_cube(whole)
+
+    chunked_cube = data_config.build_enrollment_cube_from_chunks(data_config.iter_dataset_chunks(csv_path, chunksize=4))
+    pd.testing.assert_frame_equal(chunked_cube, cube)
+
+    if not data_config.HAS_PYARROW:
+        return
+    sidecar_path = data_config.write_columnar_sidecar(csv_path, chunksize=4)
+    pd.testing.assert_frame_equal(data_config.compact_dataset_frame(pd.read_parquet(sidecar_path)), whole)
+    chunked_cube = data_config.build_enrollment_cube_from_chunks(data_config.iter_dataset_chunks(csv_path, chunksize=4))
+    pd.testing.assert_frame_equal(chunked_cube, cube)
@@ -0,0 +1,47 @@
+"""
+/api/enrollment_data against payloads captured from the app before build_enrollment_summary
+replaced the per-block passes over the rows. The response bytes must match exactly, key order
+and number formatting included, for a school-level file (with blank cells) and a regional one.
+"""
+import os
+import sys
+import shutil
+
+import pytest
+
+os.environ.setdefault('TANAW_WARMUP', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as tanaw_app
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def client():
+    tanaw_app.app.config['TESTING'] = True
+    with tanaw_app.app.test_client() as client:
+        yield client
+
+
+@pytest.mark.parametrize('csv_name, expected_name', [
+    ('enrollment_school.csv', 'enrollment_summary_school.json'),
+    ('enrollment_regional.csv', 'enrollment_summary_regional.json'),
+])
+def test_enrollment_data_matches_baseline(client, tmp_path, csv_name, expected_name):
+    csv_path = tmp_path / csv_name
+    shutil.copy(os.path.join(FIXTURES, csv_name), csv_path)
+    with open(os.path.join(FIXTURES, expected_name), 'rb') as f:
+        expected = f.read()
+    assert b'"strandRegionMatrix"' in expected
+
+    with client.session_transaction() as session:
+        session['selected_dashboard_file_path'] = str(csv_path)
+
+    first = client.get('/api/enrollment_data')
+    assert first.status_code == 200
+    assert first.get_data() == expected
+
+    # The second request is served from the summary memoized by the first
+    second = client.get('/api/enrollment_data')
+    assert second.get_data() == expected
@@ -0,0 +1,38 @@
+import os
+import sys
+import shutil
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_config import school_id_label
+from dataset_store import build_sqlite_store, select_rows
+from report import load_report_data, select_schools
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def test_school_id_label_is_canonical():
+    assert school_id_label(100067) == '100067'
+    assert school_id_label(100067.0) == '100067'
+    assert school_id_label('100067.0') == '100067'
+    assert school_id_label('0100067') == '100067'
+    assert school_id_label('ALS-12') == 'ALS-12'
+
+
+def test_school_id_filter_matches_in_memory_and_in_store(tmp_path):
+    # A blank ID makes pandas parse the column as float (100067.0)
+    df = pd.read_csv(os.path.join(FIXTURES, 'enrollment_school.csv'), dtype=str)
+    df.loc[5, 'BEIS School ID'] = None
+    csv_path = str(tmp_path / 'school.csv')
+    df.to_csv(csv_path, index=False)
+    school_id = df.loc[0, 'BEIS School ID']
+
+    data = load_report_data(csv_path)
+    in_memory = select_schools(data, selected_beis_id=school_id)
+    assert in_memory['BEIS School ID'].tolist() == [school_id]
+
+    build_sqlite_store(csv_path)
+    in_store = select_rows(csv_path, {'BEIS School ID': school_id})
+    assert in_store['BEIS School ID'].tolist() == [school_id]
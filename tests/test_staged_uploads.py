@@ -0,0 +1,28 @@
+import io
+import os
+import sys
+import time
+
+from werkzeug.datastructures import FileStorage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import staged_uploads
+
+
+def test_claimed_upload_survives_expired_stage_cleanup(tmp_path, monkeypatch):
+    monkeypatch.setattr(staged_uploads, 'STAGING_FOLDER', str(tmp_path / 'staged'))
+    token = staged_uploads.stage_upload(FileStorage(io.BytesIO(b'Region,K Male\nNCR,1\n')), school_year='2024-2025')
+    data_path, metadata = staged_uploads.claim_staged_upload(token)
+
+    assert os.path.dirname(data_path) == str(tmp_path)
+    assert metadata['school_year'] == '2024-2025'
+    assert os.listdir(tmp_path / 'staged') == []
+
+    # Even a claim older than the expiry window is out of reach of the cleanup
+    old = time.time() - staged_uploads.STAGE_EXPIRY_SECONDS - 60
+    os.utime(data_path, (old, old))
+    staged_uploads.discard_expired_stages()
+    with open(data_path, 'rb') as f:
+        assert f.read() == b'Region,K Male\nNCR,1\n'
+    assert staged_uploads.claim_staged_upload(token) is None
@@ -0,0 +1,63 @@
+import os
+import time
+import threading
+
+# Set TANAW_WARMUP=0 to skip the startup warm-up (data is then loaded by the first request)
+WARMUP_ENABLED = os.environ.get('TANAW_WARMUP', '1') != '0'
+
+_warmup_lock = threading.Lock()
+_warmup = {'state': 'pending', 'started': None, 'finished': None, 'steps': []}
+
+def _run_steps(steps):
+    for name, func in steps:
+        step = {'name': name, 'state': 'running', 'seconds': None, 'error': None}
+        with _warmup_lock:
+            _warmup['steps'].append(step)
+        started = time.perf_counter()
+        try:
+            func()
+            step['state'] = 'done'
+        except Exception as e:
+            # A dataset that fails to load is reported, not fatal: the app keeps serving
+            print(f"Warm-up step '{name}' failed: {e}")
+            step['state'] = 'failed'
+            step['error'] = str(e)
+        step['seconds'] = round(time.perf_counter() - started, 3)
+        print(f"Warm-up: {name} {step['state']} in {step['seconds']}s")
+
+    with _warmup_lock:
+        _warmup['state'] = 'ready'
+        _warmup['finished'] = time.time()
+
+def start_warmup(steps):
+    """
+    Runs steps ([(name, callable)]) one after another on a daemon thread, so the
+    server starts listening without waiting for datasets to load. Returns the
+    thread, or None when warm-up is disabled or already started.
+    """
+    with _warmup_lock:
+        if _warmup['state'] != 'pending':
+            return None
+        _warmup['started'] = time.time()
+        if not WARMUP_ENABLED:
+            _warmup['state'] = 'ready'
+            _warmup['finished'] = _warmup['started']
+            return None
+        _warmup['state'] = 'warming'
+    thread = threading.Thread(target=_run_steps, args=(list(steps),), name='tanaw-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def warmup_status():
+    """{'ready', 'state', 'seconds', 'steps'} -- 'ready' once every step has finished (or failed)."""
+    with _warmup_lock:
+        status = {
+            'ready': _warmup['state'] == 'ready',
+            'state': _warmup['state'],
+            'seconds': None,
+            'steps': [dict(step) for step in _warmup['steps']],
+        }
+        if _warmup['started'] is not None:
+            end = _warmup['finished'] or time.time()
+            status['seconds'] = round(end - _warmup['started'], 3)
+    return status
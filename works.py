@@ -1,8 +1,8 @@
 from flask import Flask, render_template_string
 from dash import Dash, dcc, html, Input, Output, dash_table
 import plotly.express as px
-import pandas as pd
-from data_config import get_dataset_path
+from data_config import get_dataset_path, load_dataset
+from dataset_store import sqlite_store_enabled, select_rows, distinct_values, column_names, count_distinct_and_average_total
 
 # Flask server
 server = Flask(__name__)
@@ -65,7 +65,9 @@ def create_dash_app(server, url_base_pathname='/dashenrollment/'):
         Input('region-dropdown', 'id')  # dummy input
     )
     def populate_regions(_):
-        df = pd.read_csv(get_dataset_path())
+        if sqlite_store_enabled():
+            return [{'label': region, 'value': region} for region in distinct_values(get_dataset_path(), 'Region')]
+        df = load_dataset(get_dataset_path())
         return [{'label': region, 'value': region} for region in sorted(df['Region'].dropna().unique())]
 
     @dash_app_works.callback(
@@ -73,7 +75,10 @@ def create_dash_app(server, url_base_pathname='/dashenrollment/'):
         Input('region-dropdown', 'value')
     )
     def update_schools(region):
-        df = pd.read_csv(get_dataset_path())
+        if sqlite_store_enabled():
+            filtered_df = select_rows(get_dataset_path(), {'Region': region or None}, columns=['School Name'])
+            return [{'label': school, 'value': school} for school in filtered_df['School Name'].unique()]
+        df = load_dataset(get_dataset_path())
         filtered_df = df if not region else df[df['Region'] == region]
         return [{'label': school, 'value': school} for school in filtered_df['School Name'].unique()]
 
@@ -86,12 +91,17 @@ def create_dash_app(server, url_base_pathname='/dashenrollment/'):
         Input('school-dropdown', 'value')
     )
     def update_dashboard(selected_school):
-        df = pd.read_csv(get_dataset_path())
         if not selected_school:
             empty_fig = px.bar(title='Select a school to view enrollment')
             return [], empty_fig, "", px.pie(title=''), px.line(title='')
 
-        school_df = df[df['School Name'] == selected_school]
+        if sqlite_store_enabled():
+            # Indexed lookup of this school's rows; the full frame is never loaded
+            school_df = select_rows(get_dataset_path(), {'School Name': selected_school})
+            df = school_df
+        else:
+            df = load_dataset(get_dataset_path())
+            school_df = df[df['School Name'] == selected_school]
         table_data = school_df[["School Name", "Region", "Province", "Municipality"]].to_dict('records')
 
         grade_cols = [col for col in df.columns if col.startswith(('K ', 'G'))]
@@ -145,7 +155,12 @@ def create_dash_app(server, url_base_pathname='/dashenrollment/'):
         Input('region-dropdown', 'value')
     )
     def update_summary(region):
-        df = pd.read_csv(get_dataset_path())
+        if sqlite_store_enabled():
+            grade_cols = [col for col in column_names(get_dataset_path()) if col.startswith(('K ', 'G'))]
+            total_schools, avg_enrollment = count_distinct_and_average_total(
+                get_dataset_path(), 'School Name', grade_cols, {'Region': region or None})
+            return f"Total Schools: {total_schools} | Average Enrollment: {int(avg_enrollment)}"
+        df = load_dataset(get_dataset_path())
         if region:
             df = df[df['Region'] == region]
         total_schools = df['School Name'].nunique()
@@ -154,4 +169,14 @@ def create_dash_app(server, url_base_pathname='/dashenrollment/'):
 
         return f"Total Schools: {total_schools} | Average Enrollment: {int(avg_enrollment)}"
 
+    def warm_up():
+        """Loads the active dataset (or builds its SQLite store) before the first request needs it."""
+        dataset_path = get_dataset_path()
+        if sqlite_store_enabled():
+            column_names(dataset_path)
+        else:
+            load_dataset(dataset_path)
+
+    dash_app_works.warm_up = warm_up
+
     return dash_app_works
\ No newline at end of file